@@ -0,0 +1,64 @@
+import argparse
+import json
+import sys
+
+from src.helpers.analytics_store import create_analytics_store
+
+# 分析ストアの書き出しとレポート
+#   python analytics.py export turns --format csv --days 365 -o turns.csv
+#   python analytics.py report hours --days 30
+#   python analytics.py log session_20250401_093000_1
+
+REPORTS = {
+    "summary": "summary",
+    "hours": "busiest_hours",
+    "questions": "top_questions",
+    "latency": "tool_latency",
+    "sessions": "sessions",
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Session analytics (read-only)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="write sessions or turns as csv/jsonl")
+    export.add_argument("table", choices=["sessions", "turns"])
+    export.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    export.add_argument("--days", type=int, default=365)
+    export.add_argument("-o", "--output", help="file to write (default: stdout)")
+
+    report = sub.add_parser("report", help="print a report as JSON")
+    report.add_argument("name", choices=list(REPORTS))
+    report.add_argument("--days", type=int, default=30)
+
+    log = sub.add_parser("log", help="render the text log of one session")
+    log.add_argument("session_id")
+
+    args = parser.parse_args(argv)
+    store = create_analytics_store(readonly=True)
+    try:
+        if args.command == "export":
+            out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+            try:
+                count = store.export(args.table, out, args.format, args.days)
+            finally:
+                if args.output:
+                    out.close()
+            print(f"{count} rows", file=sys.stderr)
+        elif args.command == "report":
+            result = getattr(store, REPORTS[args.name])(args.days)
+            print(json.dumps(result, ensure_ascii=False, indent=2, default=str))
+        else:
+            text = store.render_log(args.session_id)
+            if text is None:
+                print(f"unknown session: {args.session_id}", file=sys.stderr)
+                return 1
+            print(text, end="")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
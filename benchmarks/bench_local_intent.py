@@ -0,0 +1,44 @@
+"""Accuracy / latency report for the local yes/no/correction classifier.
+
+Run from the repository root:
+    python -m benchmarks.bench_local_intent
+"""
+import statistics
+import time
+from pathlib import Path
+
+from src.llm.local_intent import TRAINING_DATA, LocalIntentClassifier, load_samples
+
+EVAL_DATA = Path(__file__).parent / "data" / "intent_eval.jsonl"
+
+
+def main():
+    start = time.perf_counter()
+    classifier = LocalIntentClassifier().fit(load_samples(TRAINING_DATA))
+    train_ms = (time.perf_counter() - start) * 1000
+
+    samples = load_samples(EVAL_DATA)
+    latencies, handled, handled_correct, correct = [], 0, 0, 0
+    for text, label in samples:
+        start = time.perf_counter()
+        prediction = classifier.predict(text)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        correct += prediction.label == label
+        if prediction.confident:
+            handled += 1
+            handled_correct += prediction.label == label
+        elif prediction.label != label:
+            print(f"  deferred: {text!r} -> {prediction.label} ({prediction.confidence:.2f}), expected {label}")
+
+    latencies.sort()
+    total = len(samples)
+    print(f"training time          : {train_ms:.1f} ms ({len(classifier.vocabulary)} features)")
+    print(f"eval samples           : {total}")
+    print(f"overall accuracy       : {correct / total:.1%}")
+    print(f"handled locally        : {handled / total:.1%}")
+    print(f"accuracy when handled  : {handled_correct / max(handled, 1):.1%}")
+    print(f"latency p50 / p99      : {statistics.median(latencies):.1f} / {latencies[int(total * 0.99) - 1]:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
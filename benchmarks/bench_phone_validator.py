@@ -0,0 +1,95 @@
+"""Microbenchmark: table-driven phone validator vs. the previous regex version.
+
+Run from the repository root:
+    python -m benchmarks.bench_phone_validator
+"""
+import asyncio
+import logging
+import re
+import time
+
+from src.helpers.phone_validator import validate_phone_number, validate_phone_numbers
+
+SAMPLES = [
+    "090-1234-5678", "08012345678", "03-1234-5678", "0312345678", "045-123-4567",
+    "0123-45-6789", "01267-2-3456", "050-1234-5678", "0120-123-456", "090-1234",
+    "abc-1234-5678", "０９０－１２３４－５６７８", "+81 90 1234 5678", "06 1234 5678",
+]
+ITERATIONS = 4000
+REPEAT = 7   # 各方式を何回測って最小値を取るか（他のプロセスの影響を除く）
+
+legacy_logger = logging.getLogger("bench.legacy_phone")
+
+
+async def legacy_is_valid_japanese_phone_number(phone: str) -> bool:
+    """Copy of the previous async implementation (debug logs go to a disabled logger)."""
+    if not re.fullmatch(r"[0-9\-]+", phone):
+        legacy_logger.debug(f"数字とハイフン以外の文字が含まれている: {phone}")
+        return False
+    raw = phone.replace("-", "")
+    if not re.fullmatch(r"\d{10,11}", raw):
+        legacy_logger.debug(f"10桁または11桁ではない: {raw}")
+        return False
+    if re.fullmatch(r"0[789]0\d{8}", raw):
+        legacy_logger.debug(f"携帯電話（070, 080, 090）: 11桁: {raw}")
+        return True
+    if re.fullmatch(r"050\d{8}", raw):
+        legacy_logger.debug(f"IP電話（050）: 11桁: {raw}")
+        return True
+    if len(raw) == 10 and not raw.startswith(("070", "080", "090", "0120")):
+        if re.fullmatch(r"0[36]\d{8}", raw):
+            legacy_logger.debug(f"03, 06: 2桁市外局番＋8桁: {raw}")
+            return True
+        if re.fullmatch(r"0\d{2}\d{7}", raw):
+            legacy_logger.debug(f"3桁市外局番+7桁: {raw}")
+            return True
+        if re.fullmatch(r"0\d{3}\d{6}", raw):
+            legacy_logger.debug(f"4桁市外局番+6桁: {raw}")
+            return True
+        if re.fullmatch(r"0\d{4}\d{5}", raw):
+            legacy_logger.debug(f"5桁市外局番+5桁: {raw}")
+            return True
+    return False
+
+
+async def _run_legacy() -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for phone in SAMPLES:
+            await legacy_is_valid_japanese_phone_number(phone)
+    return time.perf_counter() - start
+
+
+def _run_current(cached: bool) -> float:
+    validate = validate_phone_number if cached else validate_phone_number.__wrapped__
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for phone in SAMPLES:
+            validate(phone)
+    return time.perf_counter() - start
+
+
+def _run_batch() -> float:
+    contacts = SAMPLES * ITERATIONS
+    validate_phone_number.cache_clear()
+    start = time.perf_counter()
+    validate_phone_numbers(contacts)
+    return time.perf_counter() - start
+
+
+def main():
+    calls = ITERATIONS * len(SAMPLES)
+    runs = {
+        "legacy (async regex)": lambda: asyncio.run(_run_legacy()),
+        "table-driven (uncached)": lambda: _run_current(cached=False),
+        "table-driven (cached)": lambda: _run_current(cached=True),
+        "batch API": _run_batch,
+    }
+    results = {name: min(run() for _ in range(REPEAT)) for name, run in runs.items()}
+    baseline = results["legacy (async regex)"]
+    for name, elapsed in results.items():
+        print(f"{name:26s} {elapsed * 1e9 / calls:8.0f} ns/call  x{baseline / elapsed:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
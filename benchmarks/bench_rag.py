@@ -0,0 +1,245 @@
+"""Retrieval speed / quality report for the InformationTool datasets.
+
+Compares flat FAISS (what RAGBuilder builds today), HNSW, BM25 and a hybrid
+(reciprocal rank fusion of flat + BM25) on a labeled query set, per dataset.
+Embeddings come from the offline transport by default, so no network is needed;
+absolute quality numbers are only meaningful with --embeddings openai.
+Query embeddings are computed up front; latency columns are the search alone.
+
+Run from the repository root:
+    python -m benchmarks.bench_rag
+    python -m benchmarks.bench_rag --source xlsx --queries my_queries.jsonl --k 3
+    python -m benchmarks.bench_rag --embeddings openai   # real embeddings (network)
+"""
+import argparse
+import math
+import sys
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+import faiss
+import httpx
+import numpy as np
+import orjson
+from langchain.docstore.document import Document
+from langchain_openai import OpenAIEmbeddings
+
+from src.helpers.conf_loader import MODELS_CONF, RAG_CONF
+from src.llm.offline_openai import OfflineOpenAITransport
+
+FIXTURE_FAQ = Path(__file__).parent / "data" / "rag_faq.jsonl"
+FIXTURE_QUERIES = Path(__file__).parent / "data" / "rag_queries.jsonl"
+RRF_K = 60
+
+
+def read_jsonl(path) -> List[dict]:
+    with open(path, "rb") as f:
+        return [orjson.loads(line) for line in f if line.strip()]
+
+
+def load_documents(source: str) -> Dict[str, List[Document]]:
+    """Documents per dataset, in the same "Question / Answer" form RAGBuilder indexes."""
+    datasets: Dict[str, List[Document]] = defaultdict(list)
+    if source == "fixture":
+        for row in read_jsonl(FIXTURE_FAQ):
+            datasets[row["dataset"]].append(Document(
+                page_content=f"Question: {row['question']}\nAnswer: {row['answer']}",
+                metadata={"Category": row.get("category", ""), "Source": row["dataset"]},
+            ))
+        return datasets
+
+    from src.tools.rag_builder import RAGBuilder
+
+    embedding = MODELS_CONF["embedding"]
+    for dataset in RAG_CONF["datasets"]:
+        builder = RAGBuilder(dataset["name"], dataset, embedding["model_name"],
+                             embedding["chunk_size"], embedding["chunk_overlap"])
+        datasets[dataset["name"]] = builder._split_documents(builder._load_documents())
+    return datasets
+
+
+def make_embeddings(kind: str) -> OpenAIEmbeddings:
+    model = MODELS_CONF["embedding"]["model_name"]
+    if kind == "openai":
+        return OpenAIEmbeddings(model=model)
+    transport = OfflineOpenAITransport(embedding_dim=(MODELS_CONF.get("offline") or {}).get("embedding_dim", 256))
+    return OpenAIEmbeddings(model=model, api_key="sk-offline", http_client=httpx.Client(transport=transport),
+                            check_embedding_ctx_length=False)
+
+
+def bigrams(text: str) -> List[str]:
+    """Character bigrams: works for Japanese without a tokenizer."""
+    text = "".join(text.lower().split())
+    return [text[i:i + 2] for i in range(len(text) - 1)] or [text]
+
+
+class BM25:
+    """Okapi BM25 over character bigrams."""
+
+    def __init__(self, texts: List[str], k1: float = 1.5, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.lengths = []
+        for doc_id, text in enumerate(texts):
+            terms = Counter(bigrams(text))
+            self.lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term][doc_id] = tf
+        self.avg_length = sum(self.lengths) / max(len(self.lengths), 1)
+        n = len(texts)
+        self.idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in self.postings.items()}
+
+    def search(self, query: str, k: int) -> List[int]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(bigrams(query)):
+            for doc_id, tf in self.postings.get(term, {}).items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_id] / self.avg_length)
+                scores[doc_id] += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores, key=scores.get, reverse=True)[:k]
+
+
+class DenseRetriever:
+    """FAISS search over pre-embedded queries, so latency is the index alone."""
+
+    def __init__(self, index, query_vectors: Dict[str, np.ndarray]):
+        self.index = index
+        self.query_vectors = query_vectors
+
+    def search(self, query: str, k: int) -> List[int]:
+        _, ids = self.index.search(self.query_vectors[query], k)
+        return [int(i) for i in ids[0] if i >= 0]
+
+
+class HybridRetriever:
+    """Reciprocal rank fusion of a dense and a sparse retriever."""
+
+    def __init__(self, dense: DenseRetriever, sparse: BM25, depth: int = 20):
+        self.dense, self.sparse, self.depth = dense, sparse, depth
+
+    def search(self, query: str, k: int) -> List[int]:
+        scores: Dict[int, float] = defaultdict(float)
+        for ranking in (self.dense.search(query, self.depth), self.sparse.search(query, self.depth)):
+            for rank, doc_id in enumerate(ranking):
+                scores[doc_id] += 1 / (RRF_K + rank + 1)
+        return sorted(scores, key=scores.get, reverse=True)[:k]
+
+
+def build_retrievers(texts: List[str], vectors: np.ndarray, query_vectors, hnsw_m: int, ef_search: int):
+    """Build every configuration; returns {name: (retriever, build_ms, index_bytes)}."""
+    dim = vectors.shape[1]
+    built = {}
+
+    start = time.perf_counter()
+    flat = faiss.IndexFlatL2(dim)
+    flat.add(vectors)
+    built["flat"] = (DenseRetriever(flat, query_vectors), (time.perf_counter() - start) * 1000,
+                     faiss.serialize_index(flat).nbytes)
+
+    start = time.perf_counter()
+    hnsw = faiss.IndexHNSWFlat(dim, hnsw_m)
+    hnsw.hnsw.efSearch = ef_search
+    hnsw.add(vectors)
+    built["hnsw"] = (DenseRetriever(hnsw, query_vectors), (time.perf_counter() - start) * 1000,
+                     faiss.serialize_index(hnsw).nbytes)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    bm25 = BM25(texts)
+    build_ms = (time.perf_counter() - start) * 1000
+    bm25_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    built["bm25"] = (bm25, build_ms, bm25_bytes)
+
+    built["hybrid"] = (HybridRetriever(built["flat"][0], bm25), built["flat"][1] + build_ms,
+                       built["flat"][2] + bm25_bytes)
+    return built
+
+
+def evaluate(retriever, queries: List[dict], texts: List[str], k: int, field: str):
+    """recall@k, MRR@k and per-query latency (ms) for one retriever."""
+    hits, reciprocal, latencies, misses = 0, 0.0, [], []
+    for query in queries:
+        start = time.perf_counter()
+        ranking = retriever.search(query[field], k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        expected = f"Question: {query['expected']}"
+        rank = next((r for r, doc_id in enumerate(ranking) if texts[doc_id].startswith(expected)), None)
+        if rank is None:
+            misses.append(query[field])
+        else:
+            hits += 1
+            reciprocal += 1 / (rank + 1)
+    total = max(len(queries), 1)
+    return hits / total, reciprocal / total, latencies, misses
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))] if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval benchmark for the RAG datasets")
+    parser.add_argument("--source", choices=("fixture", "xlsx"), default="fixture",
+                        help="benchmarks/data fixture or the xlsx files in rag.datasets")
+    parser.add_argument("--queries", default=str(FIXTURE_QUERIES))
+    parser.add_argument("--embeddings", choices=("offline", "openai"), default="offline")
+    parser.add_argument("--k", type=int, default=4, help="InformationTool retrieves 4 by default")
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--verbose", action="store_true", help="list missed queries")
+    args = parser.parse_args()
+
+    datasets = load_documents(args.source)
+    queries = read_jsonl(args.queries)
+    embeddings = make_embeddings(args.embeddings)
+
+    print(f"{'dataset':<17} {'retriever':<7} {'queries':<14} {'recall@' + str(args.k):>9} {'MRR':>6} "
+          f"{'p50':>8} {'p95':>8} {'build':>9} {'index':>10}")
+    for name, docs in datasets.items():
+        dataset_queries = [q for q in queries if q["dataset"] == name]
+        if not docs or not dataset_queries:
+            print(f"{name:<17} skipped (docs={len(docs)}, queries={len(dataset_queries)})", file=sys.stderr)
+            continue
+        texts = [doc.page_content for doc in docs]
+
+        start = time.perf_counter()
+        vectors = np.asarray(embeddings.embed_documents(texts), dtype="float32")
+        embed_ms = (time.perf_counter() - start) * 1000
+        query_texts = sorted({q[f] for q in dataset_queries for f in ("query", "translated") if q.get(f)})
+        start = time.perf_counter()
+        query_vectors = {
+            text: np.asarray([vector], dtype="float32")
+            for text, vector in zip(query_texts, embeddings.embed_documents(query_texts))
+        }
+        query_ms = (time.perf_counter() - start) * 1000
+        print(f"{name:<17} {len(texts)} chunks, dim {vectors.shape[1]}, embedding {embed_ms:.1f} ms "
+              f"(+{len(query_texts)} queries {query_ms:.1f} ms)")
+
+        groups = [("ja", "query", [q for q in dataset_queries if q.get("lang", "ja") == "ja"])]
+        translated = [q for q in dataset_queries if q.get("lang", "ja") != "ja"]
+        if translated:
+            # 本番は日本語以外の質問を翻訳してから検索する。翻訳前後の両方を測る
+            groups.append(("raw", "query", translated))
+            groups.append(("translated", "translated", [q for q in translated if q.get("translated")]))
+
+        for retriever_name, (retriever, build_ms, index_bytes) in build_retrievers(
+                texts, vectors, query_vectors, args.hnsw_m, args.ef_search).items():
+            for group, field, group_queries in groups:
+                if not group_queries:
+                    continue
+                recall, mrr, latencies, misses = evaluate(retriever, group_queries, texts, args.k, field)
+                label = f"{group} ({len(group_queries)})"
+                print(f"{'':<17} {retriever_name:<7} {label:<14} {recall:>9.1%} {mrr:>6.3f} "
+                      f"{percentile(latencies, 0.5):>6.2f}ms {percentile(latencies, 0.95):>6.2f}ms "
+                      f"{build_ms:>7.2f}ms {index_bytes / 1024:>8.1f}KB")
+                if args.verbose:
+                    for miss in misses:
+                        print(f"{'':<25} miss: {miss}")
+
+
+if __name__ == "__main__":
+    main()
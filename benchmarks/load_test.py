@@ -0,0 +1,290 @@
+"""Load generator for the /ws conversation path.
+
+Drives N simulated kiosks through the scripts in benchmarks/data/load_scripts.json.
+The app serves one kiosk per process, so by default one `src.app:app` server is
+spawned per kiosk, all pointed at the local stubs in benchmarks.stub_services
+(OpenAI, Open-Meteo, LINE). Run from the repository root:
+
+    python -m benchmarks.load_test --kiosks 4 --iterations 3 --llm-latency-ms 300
+    python -m benchmarks.load_test --kiosks 4 --save-baseline main
+    python -m benchmarks.load_test --kiosks 4 --compare main
+    python -m benchmarks.load_test --target ws://127.0.0.1:8080/ws   # existing server
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import uvicorn
+import websockets
+
+from benchmarks.stub_services import create_app
+from src.message_templates import ws_codec
+
+ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS = Path(__file__).parent / "data" / "load_scripts.json"
+BASELINES = Path(__file__).parent / "baselines"
+
+
+@dataclass
+class StepResult:
+    kind: str
+    latency_ms: float
+    ok: bool
+    error: str = ""
+
+
+class Kiosk:
+    """One simulated kiosk client running scripts over a single WebSocket."""
+
+    def __init__(self, url: str, turn_timeout: float):
+        self.url = url
+        self.turn_timeout = turn_timeout
+        self.results: List[StepResult] = []
+        self._frames: asyncio.Queue = asyncio.Queue()
+        self._ws = None
+
+    async def run(self, scripts: List[dict]):
+        try:
+            async with websockets.connect(self.url, subprotocols=[ws_codec.JSON_SUBPROTOCOL], max_queue=None) as ws:
+                self._ws = ws
+                reader = asyncio.create_task(self._read())
+                try:
+                    for script in scripts:
+                        for step in script["steps"]:
+                            await self._step(step)
+                finally:
+                    reader.cancel()
+        except Exception as e:
+            self.results.append(StepResult("connect", 0.0, False, repr(e)))
+
+    async def _read(self):
+        async for raw in self._ws:
+            await self._frames.put(ws_codec.JSON_CODEC.decode(raw))
+
+    async def _send(self, payload: dict):
+        await self._ws.send(ws_codec.JSON_CODEC.encode(payload))
+
+    async def _reply(self) -> dict:
+        """Wait for the next frame that carries visible text."""
+        while True:
+            frame = await self._frames.get()
+            if frame.get("message"):
+                return frame
+
+    async def _timed(self, kind: str, payload: dict, wait: bool = True):
+        while not self._frames.empty():
+            self._frames.get_nowait()
+        start = time.perf_counter()
+        await self._send(payload)
+        if not wait:
+            return
+        try:
+            await asyncio.wait_for(self._reply(), self.turn_timeout)
+            self.results.append(StepResult(kind, (time.perf_counter() - start) * 1000, True))
+        except asyncio.TimeoutError:
+            self.results.append(StepResult(kind, self.turn_timeout * 1000, False, "timeout"))
+
+    async def _step(self, step: dict):
+        op = step["op"]
+        if op == "start":
+            await self._timed("start", {"type": "chat_action", "message": step.get("button", "button_1"),
+                                        "action": {"action_type": "start_session", "params": {}}})
+        elif op == "chat":
+            await self._timed("chat", {"type": "chat", "message": step["text"]}, step.get("wait", True))
+        elif op == "end":
+            await self._timed("end", {"type": "action", "action_type": "end_session", "params": {}})
+        elif op == "action":
+            await self._send({"type": "action", "action_type": step["action_type"], "params": step.get("params", {})})
+        elif op == "touch":
+            start = time.perf_counter()
+            for _ in range(step.get("count", 10)):
+                await self._send({"type": "action", "action_type": "touch_action", "params": {}})
+                await asyncio.sleep(step.get("interval_ms", 5) / 1000)
+            self.results.append(StepResult("touch", (time.perf_counter() - start) * 1000, True))
+        else:
+            raise ValueError(f"unknown step op: {op}")
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(results: List[StepResult], elapsed: float) -> Dict[str, dict]:
+    by_kind: Dict[str, List[StepResult]] = defaultdict(list)
+    for result in results:
+        by_kind[result.kind].append(result)
+    turns = [r for r in results if r.kind in ("start", "chat", "end")]
+    by_kind["all_turns"] = turns
+
+    summary = {}
+    for kind, items in by_kind.items():
+        latencies = [r.latency_ms for r in items if r.ok]
+        summary[kind] = {
+            "count": len(items),
+            "errors": sum(not r.ok for r in items),
+            "error_rate": sum(not r.ok for r in items) / max(len(items), 1),
+            "p50_ms": percentile(latencies, 0.50),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+        }
+    summary["all_turns"]["throughput_per_s"] = len(turns) / max(elapsed, 1e-9)
+    summary["all_turns"]["elapsed_s"] = elapsed
+    return summary
+
+
+def print_summary(summary: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None):
+    print(f"{'kind':<10} {'count':>6} {'err%':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for kind, row in summary.items():
+        line = (f"{kind:<10} {row['count']:>6} {row['error_rate']:>6.1%} "
+                f"{row['p50_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms {row['p99_ms']:>7.1f}ms")
+        if baseline and kind in baseline and baseline[kind]["p95_ms"]:
+            delta = row["p95_ms"] / baseline[kind]["p95_ms"] - 1
+            line += f"   p95 {delta:+.1%} vs baseline"
+        print(line)
+    turns = summary["all_turns"]
+    print(f"throughput: {turns['throughput_per_s']:.2f} turns/s over {turns['elapsed_s']:.1f}s")
+
+
+def regressions(summary: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    failed = []
+    for kind in ("start", "chat", "end", "all_turns"):
+        if kind not in summary or kind not in baseline:
+            continue
+        now, before = summary[kind], baseline[kind]
+        if before["p95_ms"] and now["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            failed.append(f"{kind} p95 {before['p95_ms']:.1f} -> {now['p95_ms']:.1f} ms")
+        if now["error_rate"] > before["error_rate"] + 0.01:
+            failed.append(f"{kind} error rate {before['error_rate']:.1%} -> {now['error_rate']:.1%}")
+    return failed
+
+
+async def start_stub(port: int, latency_ms: float) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(create_app(latency_ms), host="127.0.0.1", port=port, log_level="warning"))
+    asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    return server
+
+
+def spawn_apps(count: int, base_port: int, stub_url: str) -> List[subprocess.Popen]:
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-stub"),
+        "OPENAI_BASE_URL": f"{stub_url}/v1",
+        "WEATHER_API_URL": f"{stub_url}/v1/forecast",
+        "LINE_API_URL": stub_url,
+    }
+    return [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.app:app", "--host", "127.0.0.1",
+             "--port", str(base_port + i), "--log-level", "warning"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        for i in range(count)
+    ]
+
+
+async def wait_ready(processes: List[subprocess.Popen], base_port: int, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        for i, process in enumerate(processes):
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"app server {i} exited:\n{process.stderr.read().decode(errors='replace')[-2000:]}")
+                try:
+                    if (await client.get(f"http://127.0.0.1:{base_port + i}/ws/schema")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"app server {i} did not start within {timeout}s")
+                await asyncio.sleep(0.25)
+
+
+async def run(args) -> Dict[str, dict]:
+    scripts = json.loads(Path(args.scripts).read_text(encoding="utf-8"))
+    rng = random.Random(args.seed)
+    weights = [s.get("weight", 1) for s in scripts]
+
+    stub, processes = None, []
+    try:
+        if args.target:
+            urls = args.target
+        else:
+            stub = await start_stub(args.stub_port, args.llm_latency_ms)
+            processes = spawn_apps(args.kiosks, args.base_port, f"http://127.0.0.1:{args.stub_port}")
+            await wait_ready(processes, args.base_port)
+            urls = [f"ws://127.0.0.1:{args.base_port + i}/ws" for i in range(args.kiosks)]
+
+        kiosks = [Kiosk(urls[i % len(urls)], args.turn_timeout) for i in range(args.kiosks)]
+        plans = [rng.choices(scripts, weights, k=args.iterations) for _ in kiosks]
+        start = time.perf_counter()
+        await asyncio.gather(*(kiosk.run(plan) for kiosk, plan in zip(kiosks, plans)))
+        elapsed = time.perf_counter() - start
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=10)
+        if stub is not None:
+            stub.should_exit = True
+
+    results = [r for kiosk in kiosks for r in kiosk.results]
+    for result in results:
+        if not result.ok and args.verbose:
+            print(f"  error: {asdict(result)}")
+    return summarize(results, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for the /ws conversation path")
+    parser.add_argument("--kiosks", type=int, default=4, help="concurrent simulated kiosks")
+    parser.add_argument("--iterations", type=int, default=2, help="scripts per kiosk")
+    parser.add_argument("--scripts", default=str(SCRIPTS))
+    parser.add_argument("--target", action="append", help="existing ws:// endpoint(s); skips spawning")
+    parser.add_argument("--base-port", type=int, default=8300)
+    parser.add_argument("--stub-port", type=int, default=9100)
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--turn-timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 regression vs baseline")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        baseline = json.loads((BASELINES / f"{args.compare}.json").read_text(encoding="utf-8"))["summary"]
+    print_summary(summary, baseline)
+
+    if args.save_baseline:
+        BASELINES.mkdir(exist_ok=True)
+        path = BASELINES / f"{args.save_baseline}.json"
+        path.write_text(json.dumps({"args": vars(args), "summary": summary}, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"baseline saved: {path}")
+
+    if baseline:
+        failed = regressions(summary, baseline, args.tolerance)
+        for line in failed:
+            print(f"REGRESSION: {line}")
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Local stand-ins for OpenAI, Open-Meteo and LINE used by the load test.
+
+Run standalone (then point the app at it with OPENAI_BASE_URL etc.):
+    python -m benchmarks.stub_services --port 9100 --latency-ms 300
+"""
+import argparse
+import asyncio
+
+import orjson
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from src.helpers.conf_loader import MODELS_CONF
+from src.llm.offline_openai import OfflineOpenAITransport, completion, embeddings_response, stream_chunks
+
+
+def create_app(latency_ms: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    app.state.calls = {"weather": 0, "line": 0}
+    # 応答の中身はアプリ内の offline トランスポートと同じ（録画 → ルールの順）
+    offline = OfflineOpenAITransport(recordings=(MODELS_CONF.get("offline") or {}).get("recordings"))
+    app.state.offline = offline
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = orjson.loads(await request.body())
+        offline.calls["chat"] += 1
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        message = offline.reply(body)
+        if body.get("stream"):
+            return StreamingResponse(stream_chunks(body, message), media_type="text/event-stream")
+        return JSONResponse(completion(body, message))
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        offline.calls["embeddings"] += 1
+        return JSONResponse(embeddings_response(orjson.loads(await request.body())))
+
+    @app.get("/v1/forecast")
+    async def forecast(latitude: float = 35.69, longitude: float = 139.74):
+        app.state.calls["weather"] += 1
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "current": {"temperature_2m": 18.5, "weather_code": 1, "wind_speed_10m": 3.2},
+            "daily": {"temperature_2m_max": [21.0], "temperature_2m_min": [12.4], "precipitation_sum": [0.0]},
+        }
+
+    @app.post("/v2/bot/{path:path}")
+    async def line(path: str):
+        app.state.calls["line"] += 1
+        return Response(content=b"{}", media_type="application/json")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated LLM latency per call")
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,81 @@
+import argparse
+import os
+import subprocess
+import sys
+
 import uvicorn
 
+from src.helpers.conf_loader import DEPLOY_CONF, WS_CONF
+
+HOST = "0.0.0.0"
+PORT = 8080
+# 再起動をまたいで残すと困る共有状態（セッション連番は ID が重ならないよう残す）
+VOLATILE_NAMESPACES = ("ws_routes", "sessions", "settings", "flags",
+                       "availability_responses", "availability_timestamps")
+
+
+def run_single():
+    uvicorn.run(
+        "src.app:app",
+        host=HOST,
+        port=PORT,
+        timeout_keep_alive=90,
+        ws="auto",
+        ws_per_message_deflate=WS_CONF.get("per_message_deflate", True),
+        ws_ping_interval=WS_CONF.get("ping_interval", 20.0),
+        ws_ping_timeout=WS_CONF.get("ping_timeout", 20.0),
+    )
+
+
+def run_workers(workers: int):
+    """One app process per worker (1 kiosk each) behind a sticky /ws router on PORT."""
+    from src.api.sticky_router import create_router
+    from src.helpers.state_store import create_state_store
+
+    state_db = DEPLOY_CONF.get("state_db", "data/state.db")
+    store = create_state_store("sqlite", state_db)
+    for namespace in VOLATILE_NAMESPACES:
+        store.clear(namespace)
+
+    base_port = DEPLOY_CONF.get("worker_base_port", PORT + 1)
+    ports = [base_port + i for i in range(workers)]
+    processes = []
+    for i, port in enumerate(ports):
+        env = {**os.environ, "STATE_STORE": "sqlite", "WORKER_ID": str(i)}
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.app:app",
+             "--host", "127.0.0.1", "--port", str(port),
+             "--timeout-keep-alive", "90",
+             # ルーターとの間はローカル接続なので圧縮しない
+             "--ws-per-message-deflate", "false",
+             "--ws-ping-interval", str(WS_CONF.get("ping_interval", 20.0)),
+             "--ws-ping-timeout", str(WS_CONF.get("ping_timeout", 20.0))],
+            env=env,
+        ))
+    try:
+        uvicorn.run(
+            create_router(ports, store),
+            host=HOST,
+            port=PORT,
+            timeout_keep_alive=90,
+            ws_per_message_deflate=WS_CONF.get("per_message_deflate", True),
+            ws_ping_interval=WS_CONF.get("ping_interval", 20.0),
+            ws_ping_timeout=WS_CONF.get("ping_timeout", 20.0),
+        )
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=15)
+        store.close()
+
+
 if __name__ == "__main__":
-    uvicorn.run("src.app:app", host="0.0.0.0", port=8080, timeout_keep_alive=90, ws="auto")
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=DEPLOY_CONF.get("workers", 1),
+                        help="worker processes (one kiosk each); >1 adds the sticky router")
+    args = parser.parse_args()
+    if args.workers > 1:
+        run_workers(args.workers)
+    else:
+        run_single()
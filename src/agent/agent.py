@@ -6,11 +6,13 @@ from langchain.agents.output_parsers import OpenAIFunctionsAgentOutputParser
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.schema import AIMessage, HumanMessage
 from langchain_core.utils.function_calling import convert_to_openai_function
-from langchain_openai import ChatOpenAI
 from pydantic.v1 import BaseModel, Field
 
-from src.helpers.conf_loader import MODELS_CONF
-from src.helpers.env_loader import OPENAI_API_KEY
+from src.llm.llm_registry import get_llm
+
+
+class DirectAnswer(str):
+    """Tool output that should be sent to the user as is, decided per call (not via tool.return_direct)."""
 
 
 class ChatHistoryFormatter:
@@ -33,13 +35,12 @@ class OpenAIAgent:
         self.prompt = self._initialize_prompt()
         self.agent = self._initialize_agent()
 
-    def _initialize_llm(self) -> ChatOpenAI:
-        return ChatOpenAI(
-            api_key=OPENAI_API_KEY,
-            temperature=0,
-            model=MODELS_CONF["llm"]["version"],
+    def _initialize_llm(self) -> Any:
+        return get_llm(
+            "agent",
             streaming=True,
-        ).bind(functions=[convert_to_openai_function(t) for t in self.tools])
+            functions=[convert_to_openai_function(t) for t in self.tools],
+        )
 
     def _initialize_prompt(self) -> ChatPromptTemplate:
         return ChatPromptTemplate.from_messages(
@@ -1,11 +1,27 @@
 from typing import Any, Dict, List
 
 from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentFinish
 
-from src.agent.agent import AgentIO, OpenAIAgent, Output
+from src.agent.agent import AgentIO, DirectAnswer, OpenAIAgent, Output
 from src.agent.tool_loader import ToolLoader
-from src.helpers.conf_loader import AGENT_TOOLS, MODELS_CONF
+from src.agent.tool_prefetcher import ToolPrefetcher
+from src.helpers.conf_loader import AGENT_TOOLS, MODELS_CONF, PREFETCH_CONF
 from src.helpers.logger import logger
+
+
+class DirectAnswerExecutor(AgentExecutor):
+    """AgentExecutor that also ends the run when a tool returns a DirectAnswer."""
+
+    def _get_tool_return(self, next_step_output):
+        # ツールの共有属性（return_direct）を呼び出しごとに書き換えると並行実行で競合するので、戻り値で判断する
+        agent_action, observation = next_step_output
+        if isinstance(observation, DirectAnswer):
+            return_value_key = (self._action_agent.return_values or ["output"])[0]
+            return AgentFinish({return_value_key: str(observation)}, "")
+        return super()._get_tool_return(next_step_output)
+
+
 class AgentManager:
     """Manages the agent execution and setup."""
 
@@ -14,7 +30,6 @@ class AgentManager:
         ws_manager=None,
         message_manager=None,
         session_manager=None,
-        user_profile=None,
         prompt_manager=None,
     ):
         self.tool_loader = ToolLoader(
@@ -22,7 +37,6 @@ class AgentManager:
             ws_manager=ws_manager,
             message_manager=message_manager,
             session_manager=session_manager,
-            user_profile=user_profile,
         )
 
         # Load default tools and setup
@@ -37,9 +51,12 @@ class AgentManager:
         self.default_prompt = ""
         self.tools = []
         self.workflow_cleanup_done = False
+        self.prefetcher = ToolPrefetcher(
+            PREFETCH_CONF.get("routes") or {}, enabled=PREFETCH_CONF.get("enabled", False)
+        )
 
     def _initialize_executor(self, tools: List[Any]) -> AgentExecutor:
-        return AgentExecutor(
+        return DirectAnswerExecutor(
             agent=self.agent.agent,
             tools=tools,
             verbose=MODELS_CONF["llm"]["agent_thinking_visible"],
@@ -72,7 +89,10 @@ class AgentManager:
         return result
 
     async def run(self, input_data: Dict[str, Any]) -> Output:
-        return await self.executor.ainvoke(input_data, force_tool=True)
+        # 取得系ツールは LLM がツールを選んでいる間に先行実行する
+        user_input = input_data.get("raw_input") or input_data.get("input", "")
+        async with self.prefetcher.speculate(self.executor.tools, user_input):
+            return await self.executor.ainvoke(input_data, force_tool=True)
 
     async def _run_locked_tool(
         self, tool_name: str, input_data: Dict[str, Any]
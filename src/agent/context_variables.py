@@ -1,33 +1,96 @@
+from dataclasses import dataclass, field, fields, replace
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 from src.agent.conversation_state import ConversationState
+from src.agent.turn_log import TurnLog
+from src.message_templates.websocket_message_template import UserProfile
 
+
+@dataclass(slots=True)
 class ContextMemory:
-    def __init__(self):
-        self.button_id: None
-        self.session_id: Optional[str] = None
-        self.session_start_time: Optional[datetime] = None
-        self.session_end_time: Optional[datetime] = None
-        self.conversation_state: str = ConversationState.GATHER_USER_INFO
+    """The one per-session state object; UserProfile is derived from it, not kept alongside."""
+
+    button_id: Optional[str] = None
+    session_id: Optional[str] = None
+    session_start_time: Optional[datetime] = None
+    session_end_time: Optional[datetime] = None
+    conversation_state: str = ConversationState.GATHER_USER_INFO
+
+    name: Optional[str] = None
+    purpose: Optional[str] = None
+    phone: Optional[str] = None
+
+    name_retry: int = 0
+    purpose_retry: int = 0
+    phone_retry: int = 0
+    phone_correct: bool = False
+
+    turns: TurnLog = field(default_factory=TurnLog)
+    workflow_active: bool = True
+    _last_tool_name: Optional[str] = None
+    turn_tool: Optional[str] = None     # この発話で使われたツール（process_chat が毎回リセット）
+    side_effect_tool: Optional[str] = None  # 実行中の外部に作用するツール。この間はターンを取り消さない
+    answer_path: Optional[str] = None
+
+    @property
+    def last_tool_name(self) -> Optional[str]:
+        return self._last_tool_name
 
-        self.name: Optional[str] = None
-        self.purpose: Optional[str] = None
-        self.phone: Optional[str] = None
+    @last_tool_name.setter
+    def last_tool_name(self, name: Optional[str]):
+        self._last_tool_name = name
+        self.turn_tool = name
 
-        self.name_retry: int = 0
-        self.purpose_retry: int = 0
-        self.phone_retry: int = 0
-        self.phone_correct: bool = False
+    def can_supersede(self) -> bool:
+        """Whether a newer utterance may cancel the running turn.
 
-        self.memory_log: list = []
-        self.workflow_active: bool = True
-        self.last_tool_name: Optional[str] = None
+        workflow_active is not consulted: it starts True and only the locked contact
+        workflow clears it, so on the normal agent path it would block every cancel.
+        The contact tools mark their whole run through side_effect_tool instead.
+        """
+        return self.side_effect_tool is None
 
-    def add_memory(self, memory: str):
-        self.memory_log.append(memory)
+    @property
+    def profile(self) -> UserProfile:
+        return UserProfile(self.name, self.phone, self.purpose)
 
     def get_memory(self) -> list:
-        return self.memory_log
+        return self.turns.lines()
 
     def clear(self):
-        self.__init__()
+        # __init__ を呼び直さず、既定値を書き戻すだけにする
+        for name, default in _DEFAULTS:
+            setattr(self, name, default)
+        self.turns = TurnLog()
+
+    def copy(self) -> "ContextMemory":
+        """Independent copy for background log writing."""
+        return replace(self, turns=self.turns.copy())
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-safe dict of the whole session, for resuming it elsewhere."""
+        data = {}
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, TurnLog):
+                value = value.to_dict()
+            data[f.name] = value
+        return data
+
+    def restore(self, data: Dict[str, Any]):
+        """Load a snapshot() into this object in place (tools keep their reference)."""
+        self.clear()
+        for f in fields(self):
+            if f.name not in data:
+                continue
+            value = data[f.name]
+            if f.name == "turns":
+                value = TurnLog.from_dict(value)
+            elif f.name.endswith("_time") and value:
+                value = datetime.fromisoformat(value)
+            setattr(self, f.name, value)
+
+
+_DEFAULTS = tuple((f.name, f.default) for f in fields(ContextMemory) if f.name != "turns")
@@ -6,6 +6,13 @@ from src.helpers.session_logger import (
     copy_image_to_log_folder
 )
 from src.agent.context_variables import ContextMemory
+from src.helpers.env_loader import WORKER_ID
+from src.helpers.analytics_store import analytics_store
+from src.helpers.availability_storage import pending_requests
+from src.helpers.conf_loader import ANALYTICS_CONF, CAMERA_CONF, server_config_loader
+from src.helpers.executors import executors
+from src.helpers.session_journal import session_journal
+from src.helpers.state_store import state_store
 from src.capture_image import capture_image
 
 class ChatSessionManager:
@@ -13,32 +20,31 @@ class ChatSessionManager:
 
     def __init__(self):
         self.active_session = None
-        self.chat_history = []
-        self.session_counter = {}
         self.context = ContextMemory()
-        self.latest_input = None
+
+    @property
+    def chat_history(self):
+        return self.context.turns.pairs()
 
     def _generate_session_id(self):
         now = datetime.now().replace(microsecond=0)
         date_str = now.strftime("%Y%m%d")
         time_str = now.strftime("%H%M%S")
 
-        if date_str not in self.session_counter:
-            self.session_counter[date_str] = 1
-        else:
-            self.session_counter[date_str] += 1
-
-        count = self.session_counter[date_str]
+        # 連番は全ワーカーで共有し、同じ秒に始まったセッションでも ID が重ならないようにする
+        count = state_store.incr("session_counter", date_str)
         return f"session_{date_str}_{time_str}_{count}"
 
     def clear_history(self):
-        self.chat_history = []
+        # エージェントに渡す履歴だけを区切る（ログには残る）
+        self.context.turns.reset_history()
 
     def start_new_session(self):
 
         if self.context.session_id:
             self.context.session_end_time = datetime.now().replace(microsecond=0)
-            write_user_session_log(self.context)
+            # 終了せずに次のセッションが始まった
+            self._save_logs(self.context, "abandoned")
             logger.info(f"前回のセッションログを保存しました: {self.context.session_id}")
         
         self.active_session = self._generate_session_id()
@@ -46,24 +52,79 @@ class ChatSessionManager:
         self.context.clear()
         self.context.session_id = self.active_session
         self.context.session_start_time = datetime.now().replace(microsecond=0)
+        state_store.set("sessions", self.active_session, {
+            "worker": WORKER_ID, "started": self.context.session_start_time.isoformat(),
+        })
+        session_journal.checkpoint(self.context)
         logger.info(f"セッション開始: {self.active_session}")
-        # capture_image(self.active_session)
-        # logger.info(f"画像キャプチャ完了")
+        if CAMERA_CONF.get("capture_on_session_start", False):
+            # 撮影と保存は裏で進むので、ここでは待たない
+            capture_image(self.active_session)
 
-    def end_session(self):
+    def end_session(self, outcome: str = "completed"):
         self.context.session_end_time = datetime.now().replace(microsecond=0)
-        logger.info(f"ログ保存してセッション終了: {self.active_session}")
+        logger.info(f"ログ保存してセッション終了: {self.active_session} ({outcome})")
  
-        copy_image_to_log_folder(self.context)
-        write_user_session_log(self.context)
+        if self.active_session:
+            state_store.delete("sessions", self.active_session)
+        self._save_logs(self.context, outcome)
         self.clear_history()
         self.context.clear()
 
-    def update_chat_history(self, user_input: str, response: str):
-        self.latest_input = user_input
-        self.chat_history.append((user_input, response))
-        self.context.add_memory(f"来訪者: {user_input}, アバター: {response}")
-        # print(f"Chat history updated: {self.chat_history}")
+    @staticmethod
+    def _record(context: ContextMemory, outcome: str, note: str = None):
+        analytics_store.record_session(
+            context, outcome, server_config_loader.get_language(), server_config_loader.get_mode(), note
+        )
+        if ANALYTICS_CONF.get("text_logs", False):
+            write_user_session_log(context, note)
+
+    @classmethod
+    def _save_logs(cls, context: ContextMemory, outcome: str):
+        """Record the session and copy the photo on the io pool (context is cleared right after)."""
+        if not context.session_id:
+            return
+        snapshot = context.copy()
+        logger.info(f"会話統計 {context.session_id}: {snapshot.turns.stats()}")
+        executors.submit("io", copy_image_to_log_folder, snapshot)
+        # 記録し終えてからジャーナルから消す（途中で落ちたら次の起動で記録し直す）
+        executors.submit("io", cls._record, snapshot, outcome).add_done_callback(
+            lambda f: f.exception() is None and session_journal.finish(snapshot.session_id)
+        )
+
+    def recover_unfinished(self) -> int:
+        """Record sessions the previous process left open; call at startup."""
+        recovered = 0
+        for entry in session_journal.unfinished():
+            context = ContextMemory()
+            context.restore(entry["snapshot"])
+            updated = datetime.fromtimestamp(entry["updated"]).replace(microsecond=0)
+            context.session_end_time = context.session_end_time or updated
+            note = f"サーバー停止により中断（最終記録 {updated}）"
+            availability = entry["extra"].get("availability")
+            if availability:
+                note += f" / LINE 応対可否確認 待機: {availability['waiting']} 返信: {availability['responses']}"
+            try:
+                self._record(context, "interrupted", note)
+                copy_image_to_log_folder(context)
+            except Exception as e:
+                logger.error(f"中断セッションのログ保存に失敗しました {context.session_id}: {e}")
+                continue
+            session_journal.finish(context.session_id)
+            state_store.delete("sessions", context.session_id)
+            recovered += 1
+            logger.warning(f"中断されたセッションのログを保存しました: {context.session_id}")
+        return recovered
+
+    def update_chat_history(self, user_input: str, response: str, tool: str = None, latency_ms: float = None,
+                            tokens: int = 0):
+        self.context.turns.record(user_input, response, tool, latency_ms, tokens)
+        if not session_journal.enabled:
+            # ジャーナル無効時はスナップショットに添える取次状態（ストア 2 回の読み出し）も要らない
+            return
+        # 書き込みは別スレッドがまとめて行うので、ここではキューに置くだけ
+        availability = pending_requests()
+        session_journal.checkpoint(self.context, {"availability": availability} if availability else None)
 
     def get_chat_data(self):
         return {"chat_history": self.chat_history}
@@ -14,13 +14,11 @@ class ToolLoader:
         ws_manager=None,
         message_manager=None,
         session_manager=None,
-        user_profile=None,
     ):
         self.agent_tools = agent_tools
         self.ws_manager = ws_manager
         self.message_manager = message_manager
         self.session_manager = session_manager
-        self.user_profile = user_profile
         self.retrievers = build_all_retrievers()
 
         self.tool_factories: Dict[str, Callable[[], Any]] = {
@@ -44,7 +42,6 @@ class ToolLoader:
                 ws_manager=self.ws_manager,
                 message_manager=self.message_manager,
                 session_manager=self.session_manager,
-                user_profile=self.user_profile,
                 name="faq_tool",
                 description="会社やステラリンクに関するFAQ情報を取得するツール。",
             ),
@@ -53,7 +50,6 @@ class ToolLoader:
                 ws_manager=self.ws_manager,
                 message_manager=self.message_manager,
                 session_manager=self.session_manager,
-                user_profile=self.user_profile,
                 name="support_tool",
                 description="訪問者対応や顧客サポートに関する質問に答えるツール。",
             ),
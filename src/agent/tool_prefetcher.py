@@ -0,0 +1,94 @@
+import asyncio
+import re
+import unicodedata
+from collections import Counter
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.helpers.logger import logger
+
+# エージェントの 1 回目の LLM 呼び出しと並行して、副作用のないツール処理を先に始める
+
+# ツール名 -> (先行実行に使った入力のキー, タスク)
+_prefetched: ContextVar[Optional[Dict[str, Tuple[str, asyncio.Task]]]] = ContextVar("prefetched_tools", default=None)
+prefetch_stats: Counter = Counter()
+_QUERY_NOISE_RE = re.compile(r"[\W_]+")
+
+
+def query_key(text: str) -> str:
+    """Form of a query used to decide whether a prefetch was for the same question."""
+    return _QUERY_NOISE_RE.sub("", unicodedata.normalize("NFKC", text or "").lower())
+
+
+class ToolPrefetcher:
+    """Keyword router that speculatively runs prefetchable tools for a turn."""
+
+    def __init__(self, routes: Dict[str, List[str]], enabled: bool = True):
+        self.enabled = enabled
+        self.routes = {name: [k.lower() for k in keywords or []] for name, keywords in routes.items()}
+
+    def route(self, user_input: str) -> List[str]:
+        """Return the tool names whose keywords appear in the input."""
+        text = user_input.lower()
+        return [name for name, keywords in self.routes.items() if any(k in text for k in keywords)]
+
+    @asynccontextmanager
+    async def speculate(self, tools: List[Any], user_input: str):
+        """Start prefetches for the routed tools; unused results are dropped on exit."""
+        tasks: Dict[str, Tuple[str, asyncio.Task]] = {}
+        if self.enabled:
+            by_name = {tool.name: tool for tool in tools}
+            for name in self.route(user_input):
+                tool = by_name.get(name)
+                if tool is not None and hasattr(tool, "prefetch"):
+                    # 質問に依らないツール（天気など）は prefetch_key で自分の入力のキーを返す
+                    key = tool.prefetch_key(user_input) if hasattr(tool, "prefetch_key") else query_key(user_input)
+                    tasks[name] = (key, asyncio.create_task(tool.prefetch(user_input)))
+                    prefetch_stats["started"] += 1
+            if tasks:
+                logger.debug(f"先行実行: {list(tasks)}")
+
+        token = _prefetched.set(tasks)
+        try:
+            yield
+        finally:
+            _prefetched.reset(token)
+            for _, task in tasks.values():
+                prefetch_stats["discarded"] += 1
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # 使われなかった失敗は握りつぶす
+
+
+async def take_prefetched(tool_name: str, query: Optional[str] = None, key: Optional[str] = None) -> Optional[Any]:
+    """Return the speculative result for this tool in the current turn, if any.
+
+    The prefetch ran on the raw user input, so it is only used when the tool was
+    called with the same question (or, for tools with prefetch_key, the same key).
+    Each result is used at most once; mismatches and failures fall back to the normal path.
+    """
+    if key is None:
+        if query is None:
+            raise TypeError("take_prefetched() needs a query or a key")
+        key = query_key(query)
+    tasks = _prefetched.get()
+    entry = tasks.get(tool_name) if tasks else None
+    if entry is None:
+        return None
+    prefetched_key, task = entry
+    if prefetched_key != key:
+        # エージェントが言い換えた・別の質問にした場合は使わない（終了時に破棄される）
+        prefetch_stats["mismatched"] += 1
+        logger.debug(f"先行実行と質問が異なるため使いません ({tool_name}): {query!r}")
+        return None
+    del tasks[tool_name]
+    try:
+        result = await task
+    except Exception as e:
+        logger.warning(f"先行実行の結果を使えません ({tool_name}): {e}")
+        return None
+    prefetch_stats["used"] += 1
+    logger.debug(f"先行実行の結果を再利用: {tool_name}")
+    return result
@@ -0,0 +1,157 @@
+import time
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+# 1 セッション分の会話。chat_history（エージェント用）、ユーザーログ、計測値をすべてここから作る。
+# 発話ごとにオブジェクトを作らず、列ごとの配列に詰めて持つ。
+
+USER, AVATAR = 0, 1
+ROLE_LABELS = ("来訪者", "アバター")
+NO_LATENCY = -1.0
+
+
+class Turn:
+    """One utterance, materialized on demand from a TurnLog row."""
+
+    __slots__ = ("role", "text", "at", "tool", "latency_ms", "tokens")
+
+    def __init__(self, role: int, text: str, at: float, tool: Optional[str], latency_ms: Optional[float],
+                 tokens: int = 0):
+        self.role = role
+        self.text = text
+        self.at = at
+        self.tool = tool
+        self.latency_ms = latency_ms
+        self.tokens = tokens
+
+    @property
+    def label(self) -> str:
+        return ROLE_LABELS[self.role]
+
+    def __repr__(self) -> str:
+        return f"Turn({self.label}: {self.text!r})"
+
+
+class TurnLog:
+    """Append-only, column-backed list of turns with a movable start for the agent history."""
+
+    __slots__ = ("_roles", "_texts", "_at", "_tools", "_latency", "_tokens", "_history_start")
+
+    def __init__(self):
+        self._roles = bytearray()
+        self._texts: List[str] = []
+        self._at = array("d")
+        self._tools: List[Optional[str]] = []
+        self._latency = array("f")
+        self._tokens = array("I")
+        self._history_start = 0
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __iter__(self) -> Iterator[Turn]:
+        return (self[i] for i in range(len(self)))
+
+    def __getitem__(self, i: int) -> Turn:
+        latency = self._latency[i]
+        return Turn(self._roles[i], self._texts[i], self._at[i], self._tools[i],
+                    None if latency == NO_LATENCY else latency, self._tokens[i])
+
+    def add(self, role: int, text: str, tool: Optional[str] = None, latency_ms: Optional[float] = None,
+            tokens: int = 0):
+        self._roles.append(role)
+        self._texts.append(text)
+        self._at.append(time.time())
+        self._tools.append(tool)
+        self._latency.append(NO_LATENCY if latency_ms is None else latency_ms)
+        self._tokens.append(tokens)
+
+    def record(self, user_input: str, response: str, tool: Optional[str] = None, latency_ms: Optional[float] = None,
+               tokens: int = 0):
+        """Old (user, avatar) pair interface; empty sides are not stored."""
+        if user_input:
+            self.add(USER, user_input)
+        if response:
+            self.add(AVATAR, response, tool, latency_ms, tokens)
+
+    def discard_last(self, role: int, text: str) -> bool:
+        """Remove the newest turn if it is (role, text); used for turns that were cancelled."""
+        if not self._texts or self._roles[-1] != role or self._texts[-1] != text:
+            return False
+        for column in (self._roles, self._texts, self._at, self._tools, self._latency, self._tokens):
+            column.pop()
+        self._history_start = min(self._history_start, len(self))
+        return True
+
+    def reset_history(self):
+        """Hide earlier turns from the agent; the user log still has them."""
+        self._history_start = len(self)
+
+    def pairs(self) -> List[Tuple[str, str]]:
+        """(human, ai) pairs for the agent prompt since the last reset_history()."""
+        pairs = []
+        for i in range(self._history_start, len(self)):
+            text = self._texts[i]
+            if self._roles[i] == USER:
+                pairs.append((text, ""))
+            elif pairs and not pairs[-1][1]:
+                pairs[-1] = (pairs[-1][0], text)
+            else:
+                pairs.append(("", text))
+        return pairs
+
+    def lines(self) -> List[str]:
+        """'来訪者: ...' / 'アバター: ...' lines for the session log, consecutive repeats dropped."""
+        lines = []
+        for role, text in zip(self._roles, self._texts):
+            line = f"{ROLE_LABELS[role]}: {text}"
+            if not lines or lines[-1] != line:
+                lines.append(line)
+        return lines
+
+    def stats(self) -> dict:
+        latencies = sorted(v for v in self._latency if v != NO_LATENCY)
+        return {
+            "turns": len(self),
+            "user_turns": self._roles.count(USER),
+            "avatar_turns": self._roles.count(AVATAR),
+            "tools": sorted({t for t in self._tools if t}),
+            "tokens": sum(self._tokens),
+            "p50_latency_ms": round(latencies[len(latencies) // 2], 1) if latencies else None,
+            "max_latency_ms": round(latencies[-1], 1) if latencies else None,
+        }
+
+    def to_dict(self) -> dict:
+        """Plain columns for JSON; from_dict() reverses it."""
+        return {
+            "roles": list(self._roles),
+            "texts": self._texts,
+            "at": self._at.tolist(),
+            "tools": self._tools,
+            "latency": self._latency.tolist(),
+            "tokens": self._tokens.tolist(),
+            "history_start": self._history_start,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TurnLog":
+        turns = cls()
+        turns._roles = bytearray(data["roles"])
+        turns._texts = list(data["texts"])
+        turns._at = array("d", data["at"])
+        turns._tools = list(data["tools"])
+        turns._latency = array("f", data["latency"])
+        turns._tokens = array("I", data.get("tokens") or [0] * len(turns._texts))
+        turns._history_start = data.get("history_start", 0)
+        return turns
+
+    def copy(self) -> "TurnLog":
+        other = TurnLog()
+        other._roles = bytearray(self._roles)
+        other._texts = list(self._texts)
+        other._at = array("d", self._at)
+        other._tools = list(self._tools)
+        other._latency = array("f", self._latency)
+        other._tokens = array("I", self._tokens)
+        other._history_start = self._history_start
+        return other
@@ -0,0 +1,116 @@
+import asyncio
+from collections import Counter, deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+from src.helpers.logger import logger
+
+# セッションごとにチャットのターンを 1 本の列で順番に処理する
+# 新しい発話が来たら実行中の古いターンは取り消し、LLM トークンを無駄にしない
+# ただし LINE 送信や取次ぎの待ち受けなど外部に作用する処理の途中では取り消さない（can_supersede）
+
+TurnHandler = Callable[[str], Awaitable[None]]
+
+
+class _SessionLane:
+    """Pending inputs and the running turn of one session."""
+
+    def __init__(self, max_pending: int):
+        self.pending: Deque[str] = deque()
+        self.max_pending = max_pending
+        self.wakeup = asyncio.Event()
+        self.current: Optional[asyncio.Task] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.closed = False
+        self.kept = False   # 取り消せないターンの後ろに溜まった発話は 1 つずつ全部処理する
+
+
+class TurnScheduler:
+    """Serializes chat turns per session and supersedes stale ones."""
+
+    def __init__(self, handler: TurnHandler, max_pending: int = 4, supersede: bool = True,
+                 can_supersede: Callable[[], bool] = lambda: True,
+                 on_cancelled: Optional[Callable[[str], None]] = None):
+        self.handler = handler
+        self.max_pending = max_pending
+        self.supersede = supersede
+        self.can_supersede = can_supersede
+        self.on_cancelled = on_cancelled
+        self.stats: Counter = Counter()
+        self._lanes: Dict[str, _SessionLane] = {}
+
+    def submit(self, session_id: str, user_input: str) -> bool:
+        """Queue a turn. Returns False if the input was dropped for backpressure."""
+        lane = self._lanes.get(session_id)
+        if lane is None:
+            lane = self._lanes[session_id] = _SessionLane(self.max_pending)
+            lane.worker = asyncio.create_task(self._drain(session_id, lane))
+
+        accepted = True
+        if len(lane.pending) >= lane.max_pending:
+            # 溢れたら一番古い未処理の発話から捨てる
+            dropped = lane.pending.popleft()
+            self.stats["dropped"] += 1
+            logger.warning(f"ターンが溢れたため破棄: {dropped!r}")
+            accepted = False
+        lane.pending.append(user_input)
+        self.stats["submitted"] += 1
+
+        if self.supersede and lane.current is not None and not lane.current.done():
+            if self.can_supersede():
+                lane.current.cancel()
+            else:
+                # 実行中のターンは最後まで走らせ、新しい発話はその後に処理する
+                lane.kept = True
+                self.stats["kept"] += 1
+        lane.wakeup.set()
+        return accepted
+
+    async def _drain(self, session_id: str, lane: _SessionLane):
+        while not lane.closed:
+            if not lane.pending:
+                lane.wakeup.clear()
+                await lane.wakeup.wait()
+                continue
+
+            if self.supersede and not lane.kept:
+                # 後ろに新しい発話があるなら古いものは実行しない
+                while len(lane.pending) > 1:
+                    lane.pending.popleft()
+                    self.stats["superseded"] += 1
+            user_input = lane.pending.popleft()
+            if not lane.pending:
+                lane.kept = False
+
+            task = lane.current = asyncio.create_task(self.handler(user_input))
+            try:
+                await asyncio.shield(task)
+                self.stats["completed"] += 1
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    # worker 自体が止められた
+                    task.cancel()
+                    raise
+                self.stats["cancelled"] += 1
+                logger.info(f"古いターンを取り消しました: {user_input!r}")
+                if self.on_cancelled is not None:
+                    self.on_cancelled(user_input)
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"ターン処理エラー ({session_id}): {e}")
+            finally:
+                lane.current = None
+
+    async def cancel_session(self, session_id: Optional[str]):
+        """Drop pending turns and cancel the running one when a session ends."""
+        lane = self._lanes.pop(session_id, None) if session_id else None
+        if lane is None:
+            return
+        lane.closed = True
+        lane.pending.clear()
+        lane.wakeup.set()
+        if lane.current is asyncio.current_task():
+            # ターンの中からセッションが終了された場合、そのターンは最後まで走らせる
+            return
+        if lane.current is not None:
+            lane.current.cancel()
+        await asyncio.gather(lane.worker, return_exceptions=True)
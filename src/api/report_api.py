@@ -0,0 +1,49 @@
+import sqlite3
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from src.helpers.analytics_store import create_analytics_store
+
+# 分析ストアの読み取り専用レポート（書き込み用とは別の接続を使う）
+router = APIRouter(prefix="/reports")
+reports = create_analytics_store(readonly=True)
+
+
+def _run(query, *args, **kwargs):
+    try:
+        return query(*args, **kwargs)
+    except sqlite3.OperationalError as e:
+        # まだ 1 件も記録されていない（ファイルがない）場合など
+        raise HTTPException(status_code=503, detail=f"analytics store unavailable: {e}")
+
+
+@router.get("/summary")
+def summary(days: int = Query(30, ge=1, le=3660)):
+    return _run(reports.summary, days)
+
+
+@router.get("/busiest-hours")
+def busiest_hours(days: int = Query(30, ge=1, le=3660)):
+    return _run(reports.busiest_hours, days)
+
+
+@router.get("/top-questions")
+def top_questions(days: int = Query(30, ge=1, le=3660), limit: int = Query(10, ge=1, le=100)):
+    return _run(reports.top_questions, days, limit)
+
+
+@router.get("/tool-latency")
+def tool_latency(days: int = Query(30, ge=1, le=3660)):
+    return _run(reports.tool_latency, days)
+
+
+@router.get("/sessions")
+def sessions(days: int = Query(7, ge=1, le=3660), limit: int = Query(100, ge=1, le=1000)):
+    return _run(reports.sessions, days, limit)
+
+
+@router.get("/sessions/{session_id}/log", response_class=PlainTextResponse)
+def session_log(session_id: str):
+    text = _run(reports.render_log, session_id)
+    if text is None:
+        raise HTTPException(status_code=404, detail=f"unknown session: {session_id}")
+    return text
@@ -0,0 +1,84 @@
+import asyncio
+from typing import NamedTuple, Optional
+
+from src.helpers.enums import WaitOutcome
+from src.helpers.logger import logger
+
+# 来訪者の返答待ち。締め切りは 1 つだけ持ち、タッチは締め切りを延ばすだけ（タスクを作り直さない）
+
+
+class WaitResult(NamedTuple):
+    """How a wait ended, and the visitor's reply if there was one."""
+
+    outcome: WaitOutcome
+    text: Optional[str] = None
+
+    @property
+    def responded(self) -> bool:
+        return self.outcome is WaitOutcome.RESPONSE
+
+
+class ResponseWaiter:
+    """Single-waiter state machine: one future, one deadline driven by loop.call_at."""
+
+    def __init__(self):
+        self._future: Optional[asyncio.Future] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timeout = 0.0
+        self._deadline = 0.0
+        self._armed_for = 0.0
+        self.touches = 0
+        self.rearms = 0
+
+    @property
+    def waiting(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    async def wait(self, timeout: float) -> WaitResult:
+        """Wait for a reply, a timeout (extended by touches) or the end of the session."""
+        if self.waiting:
+            raise RuntimeError("already waiting for a response")
+        loop = asyncio.get_running_loop()
+        self._future = loop.create_future()
+        self._timeout = timeout
+        self._deadline = self._armed_for = loop.time() + timeout
+        self._timer = loop.call_at(self._deadline, self._on_deadline)
+        try:
+            return await self._future
+        finally:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._future = None
+
+    def touch(self):
+        """Push the deadline back; the timer re-arms itself lazily when it fires."""
+        if self.waiting:
+            self._deadline = self._future.get_loop().time() + self._timeout
+            self.touches += 1
+
+    def submit(self, text: str) -> bool:
+        """Deliver the visitor's reply. Returns False if nobody is waiting."""
+        return self._resolve(WaitResult(WaitOutcome.RESPONSE, text.strip()))
+
+    def end_session(self) -> bool:
+        return self._resolve(WaitResult(WaitOutcome.SESSION_ENDED))
+
+    def _on_deadline(self):
+        self._timer = None
+        if not self.waiting:
+            return
+        if self._deadline > self._armed_for:
+            # 途中でタッチされたので、延びた締め切りで 1 回だけ張り直す
+            self._armed_for = self._deadline
+            self._timer = self._future.get_loop().call_at(self._deadline, self._on_deadline)
+            self.rearms += 1
+            return
+        logger.info("タイムアウトしました。")
+        self._resolve(WaitResult(WaitOutcome.TIMEOUT))
+
+    def _resolve(self, result: WaitResult) -> bool:
+        if not self.waiting:
+            return False
+        self._future.set_result(result)
+        return True
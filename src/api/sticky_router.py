@@ -0,0 +1,170 @@
+import asyncio
+import itertools
+import re
+from collections import Counter
+from typing import List, Optional
+
+import httpx
+import websockets
+from fastapi import FastAPI, Request, WebSocket
+from fastapi.responses import Response
+from starlette.websockets import WebSocketDisconnect
+
+from src.helpers.conf_loader import WS_CONF
+from src.helpers.logger import logger
+from src.helpers.state_store import StateStore
+
+# 複数ワーカー構成の前段。/ws はキオスクごとに同じワーカーへ固定し、HTTP は順番に振り分ける
+# （1 ワーカー = 1 キオスク。会話状態はワーカーのメモリにあるため）
+
+ROUTES = "ws_routes"
+# 全ワーカーに送る HTTP ルート
+BROADCAST_PATHS = {"/config/reload", "/shutdown"}
+# 全ワーカーに送る POST（索引の作り直し・巻き戻しはワーカーごとのメモリにも効かせる）
+BROADCAST_POST_RE = re.compile(r"/rag/[^/]+/(?:reload|rollback)")
+HOP_HEADERS = {"host", "content-length", "content-encoding", "transfer-encoding", "connection", "keep-alive"}
+
+
+class WorkerPool:
+    """Worker ports plus the kiosk -> worker assignment kept in the state store.
+
+    An assignment is kept while the kiosk is connected and for release_after
+    seconds after its last connection closes (the worker's resume grace), then
+    the worker is free for another kiosk.
+    """
+
+    def __init__(self, ports: List[int], store: StateStore, release_after: Optional[float] = None):
+        self.ports = ports
+        self.store = store
+        self.release_after = WS_CONF.get("resume_grace", 30) if release_after is None else release_after
+        self.connections = [0] * len(ports)
+        self.kiosk_connections: Counter = Counter()
+        self._round_robin = itertools.cycle(range(len(ports)))
+
+    def pick(self, kiosk: str) -> int:
+        """Worker for a kiosk: its previous worker, else a free one, else the least busy."""
+        index = self.store.get(ROUTES, kiosk)
+        if isinstance(index, int) and 0 <= index < len(self.ports):
+            return index
+        taken = set(self.store.items(ROUTES).values())
+        free = [i for i in range(len(self.ports)) if i not in taken]
+        if free:
+            index = free[0]
+        else:
+            index = min(range(len(self.ports)), key=lambda i: self.connections[i])
+            logger.warning(f"空きワーカーがありません。キオスク {kiosk} をワーカー {index} と共有します。")
+        # 接続が成立するまでは期限付き（ワーカーに繋がらなければそのまま解放される）
+        self.store.set(ROUTES, kiosk, index, ttl=self.release_after)
+        logger.info(f"キオスク {kiosk} をワーカー {index} (port {self.ports[index]}) に割り当てました")
+        return index
+
+    def connected(self, kiosk: str, index: int):
+        self.connections[index] += 1
+        self.kiosk_connections[kiosk] += 1
+        # 猶予中の再接続なら期限を外す
+        self.store.set(ROUTES, kiosk, index)
+
+    def disconnected(self, kiosk: str, index: int):
+        self.connections[index] -= 1
+        self.kiosk_connections[kiosk] -= 1
+        if self.kiosk_connections[kiosk] <= 0:
+            del self.kiosk_connections[kiosk]
+            # 再接続の猶予が過ぎたら割り当てを解き、接続元アドレスが変わるキオスクでワーカーを使い切らないようにする
+            self.store.set(ROUTES, kiosk, index, ttl=self.release_after)
+
+    def next_http(self) -> int:
+        return next(self._round_robin)
+
+
+def is_broadcast(method: str, path: str) -> bool:
+    return path in BROADCAST_PATHS or (method == "POST" and BROADCAST_POST_RE.fullmatch(path) is not None)
+
+
+def _forward_headers(headers) -> dict:
+    return {k: v for k, v in headers.items() if k.lower() not in HOP_HEADERS}
+
+
+def create_router(ports: List[int], store: StateStore, host: str = "127.0.0.1",
+                  release_after: Optional[float] = None) -> FastAPI:
+    app = FastAPI()
+    pool = WorkerPool(ports, store, release_after)
+    client = httpx.AsyncClient(timeout=60.0)
+    app.state.pool = pool
+
+    @app.on_event("shutdown")
+    async def close_client():
+        await client.aclose()
+
+    @app.websocket("/ws")
+    async def ws_proxy(websocket: WebSocket):
+        # kiosk パラメータがなければ接続元アドレスで固定する
+        kiosk = websocket.query_params.get("kiosk") or (websocket.client.host if websocket.client else "unknown")
+        index = pool.pick(kiosk)
+        query = websocket.url.query
+        url = f"ws://{host}:{ports[index]}/ws" + (f"?{query}" if query else "")
+        offered = websocket.scope.get("subprotocols") or None
+        try:
+            # ワーカーとの間はローカルなので圧縮しない（クライアント側は uvicorn が deflate する）
+            upstream = await websockets.connect(url, subprotocols=offered, compression=None, max_size=None)
+        except (OSError, websockets.InvalidHandshake) as e:
+            logger.error(f"ワーカー {index} に接続できません: {e}")
+            await websocket.close(code=1013)
+            return
+
+        await websocket.accept(subprotocol=upstream.subprotocol)
+        pool.connected(kiosk, index)
+
+        async def client_to_worker():
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("bytes") is not None:
+                    await upstream.send(message["bytes"])
+                else:
+                    await upstream.send(message.get("text") or "")
+
+        async def worker_to_client():
+            async for frame in upstream:
+                if isinstance(frame, bytes):
+                    await websocket.send_bytes(frame)
+                else:
+                    await websocket.send_text(frame)
+
+        tasks = [asyncio.create_task(client_to_worker()), asyncio.create_task(worker_to_client())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            pool.disconnected(kiosk, index)
+            # ワーカー側は通常の切断として扱い、再接続の猶予に入る
+            await upstream.close()
+            try:
+                await websocket.close()
+            except (RuntimeError, WebSocketDisconnect):
+                pass
+
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
+    async def http_proxy(path: str, request: Request):
+        body = await request.body()
+        targets = range(len(ports)) if is_broadcast(request.method, f"/{path}") else [pool.next_http()]
+        response = None
+        for index in targets:
+            try:
+                response = await client.request(
+                    request.method,
+                    f"http://{host}:{ports[index]}/{path}",
+                    params=request.query_params,
+                    content=body,
+                    headers=_forward_headers(request.headers),
+                )
+            except httpx.TransportError as e:
+                logger.error(f"ワーカー {index} への転送に失敗しました: {e}")
+        if response is None:
+            return Response(status_code=502)
+        return Response(content=response.content, status_code=response.status_code,
+                        headers=_forward_headers(response.headers))
+
+    return app
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Request
 import httpx
-from src.helpers.availability_storage import availability_responses, set_response
+from src.helpers.availability_storage import set_response
 from src.helpers.conf_loader import server_config_loader, server_config
 from src.helpers.enums import Mode
 from src.helpers.logger import logger
 from src.message_templates.line_push_template import ResponseNotiMessage
 from src.message_templates.line_reply_template import reply_to_user
 from src.helpers.conf_loader import LINE_USER1, LINE_USER2
-from src.helpers.env_loader import CHANNEL_ACCESS_TOKEN
+from src.helpers.env_loader import CHANNEL_ACCESS_TOKEN, LINE_API_URL
 
 router = APIRouter()
 
@@ -72,7 +72,7 @@ async def handle_message(event, reply_token, user_id):
         reply_to_user(reply_token, "申し訳ございません。対応できないリクエストです。")
 
 async def switch_rich_menu(user_id: str, rich_menu_id: str):
-    url = f"https://api.line.me/v2/bot/user/{user_id}/richmenu/{rich_menu_id}"
+    url = f"{LINE_API_URL}/v2/bot/user/{user_id}/richmenu/{rich_menu_id}"
     headers = {
         "Authorization": f"Bearer {CHANNEL_ACCESS_TOKEN}",
         "Content-Type": "application/json"
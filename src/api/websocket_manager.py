@@ -1,24 +1,42 @@
-import asyncio
+import logging
+import secrets
+from collections import deque
 from typing import Optional
 
-from fastapi import WebSocket
+from fastapi import WebSocket, WebSocketDisconnect
 
+from src.api.response_waiter import ResponseWaiter, WaitResult
 from src.helpers import logger
+from src.helpers.conf_loader import WS_CONF
 from src.helpers.enums import ActionType
-from src.message_templates.websocket_message_template import ActionMessage, ChatActionMessage
+from src.message_templates import ws_codec
+from src.message_templates.websocket_message_template import ActionMessage, ChatActionMessage, StaticFrame
+
+
+def _describe(message: object) -> str:
+    """Type (and action_type) of an outgoing frame, for the send log."""
+    if isinstance(message, StaticFrame):
+        message = message.message
+    action = getattr(message, "action", message)
+    action_type = getattr(action, "action_type", None)
+    return f"{message.type}/{action_type}" if action_type else message.type
+
 
 class WebSocketManager:
     """WebSocketの接続とメッセージ管理を行うクラス。"""
 
     def __init__(self):
         self.active_client: WebSocket | None = None
-        self.response_queue = asyncio.Queue()
-        self.waiting_for_response = False
+        self.response_waiter = ResponseWaiter()
         self.connected = False
         self.button_id: Optional[str] = None
-        self.session_end_event = asyncio.Event()
-        self.touch_event = None
         self.location_data = None
+        self.codec = ws_codec.JSON_CODEC
+        # 短い切断から復帰するための再接続トークンと、切断中に溜める送信待ちフレーム
+        self.resume_token: Optional[str] = None
+        self.detached = False
+        self.outbox: deque = deque(maxlen=WS_CONF.get("outbox_size", 64))
+        self.grace_timer = None
 
     def set_button_id(self, button_id: str):
         self.button_id = button_id
@@ -36,8 +54,33 @@ class WebSocketManager:
     def get_location_data(self) -> Optional[dict]:
         return self.location_data
 
-    async def connect(self, websocket: WebSocket):
-        """WebSocket接続を受け付ける。"""
+    def issue_resume_token(self) -> str:
+        """セッション開始時に再接続トークンを発行する。"""
+        self.resume_token = secrets.token_urlsafe(24)
+        return self.resume_token
+
+    def clear_resume(self):
+        """セッション終了時に再接続の状態を破棄する。"""
+        self.resume_token = None
+        self.detached = False
+        self.outbox.clear()
+        if self.grace_timer is not None:
+            self.grace_timer.cancel()
+            self.grace_timer = None
+
+    def can_resume(self, token: Optional[str]) -> bool:
+        return bool(token and self.resume_token and secrets.compare_digest(token, self.resume_token))
+
+    def detach(self, websocket: WebSocket, grace_timer=None):
+        """切断されたがセッションは残す。再接続まで送信は outbox に溜める。"""
+        if self.active_client is websocket:
+            self.active_client = None
+            self.connected = False
+        self.detached = True
+        self.grace_timer = grace_timer
+
+    async def connect(self, websocket: WebSocket, resume_token: Optional[str] = None) -> bool:
+        """WebSocket接続を受け付ける。再接続トークンが有効ならセッションに戻り True を返す。"""
         if self.active_client and self.connected:
             logger.warning(
                 "新しいクライアントが接続しようとしています。既存の接続を切断します..."
@@ -47,11 +90,30 @@ class WebSocketManager:
             except RuntimeError:
                 logger.warning("既存の接続はすでに切断されています。無視します。")
 
-        await websocket.accept()
+        # クライアントが提示したサブプロトコルから転送方式を決める
+        self.codec = ws_codec.negotiate(
+            websocket.scope.get("subprotocols", []),
+            WS_CONF.get("subprotocols", [ws_codec.MSGPACK_SUBPROTOCOL, ws_codec.JSON_SUBPROTOCOL]),
+        )
+        await websocket.accept(subprotocol=self.codec.subprotocol)
+        logger.info(f"転送方式: {self.codec.subprotocol or 'json'}")
         self.active_client = websocket
         self.connected = True
         logger.info("クライアントが接続されました。")
 
+        if not (self.detached and self.can_resume(resume_token)):
+            return False
+        if self.grace_timer is not None:
+            self.grace_timer.cancel()
+            self.grace_timer = None
+        self.detached = False
+        pending = list(self.outbox)
+        self.outbox.clear()
+        logger.info(f"セッションに再接続しました。未送信フレーム: {len(pending)}")
+        for message in pending:
+            await self._send(message)
+        return True
+
     async def disconnect(self):
         """WebSocket接続を切断する。"""
         if self.active_client and self.connected:
@@ -66,96 +128,71 @@ class WebSocketManager:
 
     async def send_to_client(self, message: object):
         """クライアントにメッセージを送信する。"""
+        inner = message.message if isinstance(message, StaticFrame) else message
         allow_send = (
             self.button_id is not None
-            or (isinstance(message, ActionMessage) and message.action_type == ActionType.SHOW_TOP.value)
-            or (isinstance(message, ChatActionMessage) and message.action.action_type == ActionType.SHOW_TOP.value)
-            or (isinstance(message, ActionMessage) and message.action_type == ActionType.PHONEEND_ACTION.value)
-            or (isinstance(message, ChatActionMessage) and message.action.action_type == ActionType.SHOW_PHONE_PAGE.value)
-            or (isinstance(message, ActionMessage) and message.action_type == ActionType.SET_LANGUAGE.value)
+            or (isinstance(inner, ActionMessage) and inner.action_type == ActionType.SHOW_TOP.value)
+            or (isinstance(inner, ChatActionMessage) and inner.action.action_type == ActionType.SHOW_TOP.value)
+            or (isinstance(inner, ActionMessage) and inner.action_type == ActionType.PHONEEND_ACTION.value)
+            or (isinstance(inner, ChatActionMessage) and inner.action.action_type == ActionType.SHOW_PHONE_PAGE.value)
+            or (isinstance(inner, ActionMessage) and inner.action_type == ActionType.SET_LANGUAGE.value)
         )
-        if self.active_client and self.connected:
-            
-            if allow_send:
-                try:
-                    logger.info(f"Websocket Message sent: {message.__dict__}")
-                    await self.active_client.send_text(message.to_json())
-                except Exception as e:
-                    logger.error(
-                        f"クライアントへのメッセージ送信中にエラーが発生しました: {e}"
-                    )
-                    # await self.disconnect()
-            else:
+        if not allow_send:
+            if self.active_client and self.connected:
                 logger.warning(
                     "ボタンIDが設定されていません。メッセージを送信できません。"
                 )
+            return
+        if self.active_client and self.connected:
+            await self._send(message)
+        elif self.detached:
+            # 再接続時にまとめて送る（上限を超えたら古いものから捨てる）
+            self.outbox.append(message)
 
-    def notify_touch(self):
-        if self.touch_event and not self.touch_event.is_set():
-            self.touch_event.set()
+    async def _send(self, message: object):
+        try:
+            if isinstance(message, StaticFrame):
+                frame = message.encode(self.codec)
+            else:
+                frame = self.codec.encode(message.to_dict())
+            if self.codec.binary:
+                await self.active_client.send_bytes(frame)
+            else:
+                await self.active_client.send_text(frame)
+            if logger.isEnabledFor(logging.DEBUG):
+                # 送信ごとにメッセージ全体を文字列化しない。種類と大きさだけ残す
+                logger.debug(f"Websocket Message sent: {_describe(message)} ({len(frame)} bytes)")
+        except Exception as e:
+            logger.error(
+                f"クライアントへのメッセージ送信中にエラーが発生しました: {e}"
+            )
+            # await self.disconnect()
 
-    async def wait_for_user_response(self, timeout: int = 30) -> str:
-        """ユーザーの応答を指定時間まで待機する。"""
-        self.waiting_for_response = True
-        self.session_end_event = asyncio.Event()
-        self.touch_event = asyncio.Event()
-        # logger.info("ユーザーの応答を待機中... LOL")
+    async def receive_frame(self, websocket: WebSocket):
+        """Receive one text or binary frame (raises WebSocketDisconnect on close)."""
+        event = await websocket.receive()
+        if event["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(event.get("code", 1000))
+        text = event.get("text")
+        return text if text is not None else event.get("bytes")
 
-        response_task = asyncio.create_task(self.response_queue.get())
-        end_session_task = asyncio.create_task(self.session_end_event.wait())
-        timeout_task = asyncio.create_task(asyncio.sleep(timeout))
-        touch_task = asyncio.create_task(self.touch_event.wait())
+    def notify_touch(self):
+        """タッチされたら返答待ちの締め切りを延ばす。"""
+        self.response_waiter.touch()
 
-        try:
-            while True:
-                # end_session_task = asyncio.create_task(self.session_end_event.wait())
-                # touch_reset_task = asyncio.create_task(self.touch_event.wait())
+    @property
+    def waiting_for_response(self) -> bool:
+        return self.response_waiter.waiting
 
-                done, _ = await asyncio.wait(
-                    [response_task, end_session_task, timeout_task, touch_task],
-                    return_when=asyncio.FIRST_COMPLETED,
-                )
+    def end_waiting(self):
+        """セッション終了時に返答待ちを解除する。"""
+        self.response_waiter.end_session()
 
-                if end_session_task in done:
-                    logger.info("セッション終了を検出。応答待機を中断。")
-                    return None  # Signal to stop the session gracefully
-
-                if response_task in done:
-                    user_response = await response_task
-                    return user_response.strip()
-                
-                if touch_task in done:
-                    # logger.info("タッチが検出されました。タイマーをリセットします。")
-                    self.touch_event.clear()
-
-                    # Cancel and restart the timeout timer
-                    timeout_task.cancel()
-                    try:
-                        await timeout_task
-                    except asyncio.CancelledError:
-                        pass
-                    timeout_task = asyncio.create_task(asyncio.sleep(timeout))
-
-                    # Restart touch_task too
-                    touch_task = asyncio.create_task(self.touch_event.wait())
-
-                if timeout_task in done:
-                    logger.info("タイムアウトしました。")
-                    return "timeout"
-
-        finally:
-            self.waiting_for_response = False
-            for task in [response_task, end_session_task, timeout_task, touch_task]:
-                if task and not task.done():
-                    task.cancel()
-                    try:
-                        await task
-                    except asyncio.CancelledError:
-                        pass
+    async def wait_for_user_response(self, timeout: int = 30) -> WaitResult:
+        """ユーザーの応答を指定時間まで待機する。タッチのたびに締め切りが延びる。"""
+        return await self.response_waiter.wait(timeout)
 
     async def receive_message(self, message: str):
         """ユーザーからのメッセージを受信する。"""
-        if self.waiting_for_response:
-            await self.response_queue.put(message)
-        else:
-            logger.info("通常メッセージを処理中:", message)
+        if not self.response_waiter.submit(message):
+            logger.info(f"通常メッセージを処理中: {message}")
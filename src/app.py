@@ -1,33 +1,69 @@
 import asyncio
-import json
 import os
 import time
 from pathlib import Path
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
 
 from src.api.webhook_api import router as webhook_router
 from src.api.phone_api import router as phone_router
+from src.api.report_api import router as report_router
 from src.helpers import logger
-from src.helpers.conf_loader import GREET_MSG, server_config_loader, DAILOGUE
+from src.agent.turn_log import USER
+from src.agent.turn_scheduler import TurnScheduler
+from src.helpers.executors import executors, run_blocking
+from src.helpers.session_journal import session_journal
+from src.capture_image import camera_service
+from src.helpers.conf_loader import CAMERA_CONF, RAG_CONF, TURN_CONF, WS_CONF, ai_config_loader, server_config_loader, DAILOGUE
 from src.helpers.enums import ActionType, MessageType, Mode
 from src.helpers import system_flags
+from src.helpers.phone_validator import is_valid_japanese_phone_number
+from src.helpers.timer_wheel import timer_wheel
 from src.helpers.website_handler import handle_phonecall_action
-from src.llm.llm_manager import is_valid_japanese_phone_number
-from src.message_templates.websocket_message_template import LanguageData
+from src.llm.llm_registry import llm_registry, token_usage
+from src.llm.rule_extractor import get_extraction_stats
+from src.message_templates.websocket_message_template import LanguageData, ResumeData
+from src.message_templates.ws_codec import ProtocolError, protocol_schema
+from src.tools.information_tool import answer_path_stats
+from src.tools.rag_watcher import RAGWatcher, rag_reload_stats
 from src.main import (
     agent_executor,
     message_manager,
     session_manager,
-    user_profile,
     ws_manager,
 )
 
 app = FastAPI()
+# チャットのターンはセッションごとに順番に処理し、新しい発話が来たら古いものは取り消す
+def _can_supersede() -> bool:
+    # 取り消してよいのは LLM や検索の途中だけ。取次ぎなど外部に作用するツールの途中は待つ
+    return session_manager.get_context_memory().can_supersede()
+
+
+def _discard_cancelled_turn(user_input: str):
+    # 取り消されたターンの入力は応答の無いまま履歴に残るので取り除く
+    session_manager.get_context_memory().turns.discard_last(USER, user_input)
+
+
+turn_scheduler = TurnScheduler(
+    lambda user_input: process_chat(user_input),
+    max_pending=TURN_CONF.get("max_pending", 4),
+    supersede=TURN_CONF.get("supersede", True),
+    can_supersede=_can_supersede,
+    on_cancelled=_discard_cancelled_turn,
+)
+# FAQ の xlsx が更新されたら裏で索引を作り直して差し替える
+watch_conf = RAG_CONF.get("watch") or {}
+rag_watcher = RAGWatcher(
+    agent_executor.tool_loader.retrievers,
+    interval=watch_conf.get("interval", 2),
+    settle=watch_conf.get("settle", 1),
+)
 app.include_router(webhook_router)  
 app.include_router(phone_router)
+app.include_router(report_router)
 
 app.mount(
     "/line_images",
@@ -56,11 +92,34 @@ def read_phone():
     html_path = Path(__file__).parent / "static" / "phone.html"
     return html_path.read_text(encoding="utf-8")
 
+@app.on_event("startup")
+async def startup_event():
+    # 前回プロセスが落ちて残ったセッションのログを先に書き出す
+    await run_blocking("io", session_manager.recover_unfinished)
+    if CAMERA_CONF.get("capture_on_session_start", False):
+        # 撮影するときだけカメラを確保する。デバイスの準備（数秒かかることがある）は最初のセッションより前に裏で済ませる
+        camera_service.start()
+    if watch_conf.get("enabled", True):
+        rag_watcher.start()
+
+
 @app.on_event("shutdown")
-def shutdown_event():
+async def shutdown_event():
     logger.info("Server is shutting down!")
+    await rag_watcher.stop()
+    logger.info(f"RAG 索引差し替え統計: {dict(rag_reload_stats)}")
+    logger.info(f"抽出パス統計: {get_extraction_stats()}")
+    logger.info(f"RAG 回答経路統計: {dict(answer_path_stats)}")
+    logger.info(f"ターン統計: {dict(turn_scheduler.stats)}")
+    logger.info(f"実行プール統計: {executors.stats()}")
+    await llm_registry.aclose()
     session_manager.line_images_delete()
-    session_manager.end_session()
+    session_manager.end_session("shutdown")
+    # 通話の監視スレッドにも終了を伝え、書きかけのセッションログを待ってから終了する
+    system_flags.set_phone_call_active(False)
+    camera_service.close()
+    executors.shutdown(wait=True)
+    session_journal.close()
 
 
 @app.post("/shutdown")
@@ -69,48 +128,91 @@ def shutdown():
 
     logger.info("Server is shutting down from /shutdown route!")
     session_manager.line_images_delete()
-    session_manager.end_session()    
+    session_manager.end_session("shutdown")
 
     def delayed_exit():
         time.sleep(0.5)
+        system_flags.set_phone_call_active(False)
+        camera_service.close()
+        executors.shutdown(wait=True)
+        session_journal.close()
         os._exit(0)
 
     threading.Thread(target=delayed_exit).start()
     return {"status": "shutting down"}
 
 
+@app.post("/config/reload")
+def reload_config():
+    """Re-read AI_conf.yaml (rebuilds the pre-encoded frames)."""
+    ai_config_loader.reload()
+    return {"status": "reloaded"}
+
+
+@app.get("/executors")
+def executor_stats():
+    """In-flight / saturation counters of the executor pools."""
+    return executors.stats()
+
+
+@app.get("/rag")
+def rag_status():
+    """Version and size of each hot-swappable RAG index."""
+    return rag_watcher.status()
+
+
+@app.post("/rag/{name}/reload")
+async def rag_reload(name: str):
+    """Rebuild one index now instead of waiting for the file watcher."""
+    if name not in rag_watcher.names:
+        raise HTTPException(status_code=404, detail=f"unknown dataset: {name}")
+    return {"swapped": await rag_watcher.reload(name), **rag_watcher.status()[name]}
+
+
+@app.post("/rag/{name}/rollback")
+def rag_rollback(name: str):
+    """Serve the previous index version again."""
+    if name not in rag_watcher.names:
+        raise HTTPException(status_code=404, detail=f"unknown dataset: {name}")
+    return {"rolled_back": rag_watcher.rollback(name), **rag_watcher.status()[name]}
+
+
+@app.get("/ws/schema")
+def ws_schema():
+    """JSON Schema of the /ws protocol."""
+    return protocol_schema()
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint to handle chat and triggers."""
-    await ws_manager.connect(websocket)
+    resumed = await ws_manager.connect(websocket, websocket.query_params.get("resume"))
+    if not resumed and ws_manager.detached:
+        # 再接続トークンのない新しい接続が来たら、切断中のセッションは終了する
+        await end_session("disconnected")
     #send current language
     await ws_manager.send_to_client(
         message_manager.action_message(ActionType.SET_LANGUAGE.value, LanguageData(language=server_config_loader.get_language()))
     )
+    # 無操作タイムアウトは受信ごとにリセットする（生存確認は uvicorn の ping/pong）
+    idle_timer = timer_wheel.schedule(
+        WS_CONF.get("idle_timeout", 120), lambda: asyncio.create_task(on_idle_timeout(idle_timer))
+    )
     try:
         while True:
-            try:
-                message = await asyncio.wait_for(websocket.receive_text(), timeout=120)
-                
-            except asyncio.TimeoutError:
-                logger.info("Waiting for conection")
-                if not system_flags.get_phone_call_active():
-                    # await ws_manager.send_to_client(
-                    #     message_manager.action_message(ActionType.SHOW_TOP.value)
-                    # )
-                    if session_manager.get_context_memory().session_id:
-                        await ws_manager.send_to_client(
-                            message_manager.chat_message("セッションがタイムアウトしました。")
-                        )
-                        await end_session()
-                continue
+            message = await ws_manager.receive_frame(websocket)
+            idle_timer.reset()
 
             if message == "exit":
                 break
 
-            data = message_manager.parse_message(json.loads(message))
+            try:
+                data = message_manager.decode(message, ws_manager.codec)
+            except ProtocolError as e:
+                logger.warning(f"不正なフレームを破棄しました: {e}")
+                continue
             if not(data.type == MessageType.ACTION.value and data.action_type == ActionType.TOUCH_ACTION.value):
-                logger.info(f"Websocket Message received: {data.__dict__}")
+                logger.info(f"Websocket Message received: {data}")
 
             if ws_manager.waiting_for_response:
                 if session_manager.get_context_memory().session_id is not None:
@@ -129,7 +231,7 @@ async def websocket_endpoint(websocket: WebSocket):
                             message_manager.action_message(ActionType.HIDE_WEBVIEW.value)
                         )
                         session_manager.get_context_memory().last_tool_name = None
-                    asyncio.create_task(process_chat(data.message))
+                    turn_scheduler.submit(session_manager.get_context_memory().session_id, data.message)
                         
             elif data.type == MessageType.ACTION.value:
                 if session_manager.get_context_memory().session_id is not None or data.action_type == ActionType.START_SESSION.value or data.action_type == ActionType.PHONECALL_ACTION.value or data.action_type == ActionType.PHONEEND_ACTION.value or data.action_type == ActionType.CHECK_CURRENT_MODE.value or data.action_type == ActionType.SET_LANGUAGE.value or data.action_type == ActionType.SET_LOCATION.value:
@@ -144,13 +246,43 @@ async def websocket_endpoint(websocket: WebSocket):
                     )
 
     except WebSocketDisconnect:
-        await end_session()
-        logger.info(f"Client disconnected")
+        if ws_manager.active_client is not websocket and ws_manager.connected:
+            # 新しい接続に置き換えられた古い接続
+            logger.info("Client replaced by a new connection")
+        elif ws_manager.resume_token and session_manager.get_context_memory().session_id:
+            grace = WS_CONF.get("resume_grace", 30)
+            ws_manager.detach(
+                websocket, timer_wheel.schedule(grace, lambda: asyncio.create_task(on_resume_expired()))
+            )
+            logger.info(f"Client disconnected — waiting {grace}s for resume")
+        else:
+            await end_session("disconnected")
+            logger.info(f"Client disconnected")
     finally:
-        if ws_manager.connected:
+        idle_timer.cancel()
+        if ws_manager.connected and ws_manager.active_client is websocket:
             await ws_manager.disconnect()
 
 
+async def on_idle_timeout(idle_timer):
+    """無操作が続いたらセッションを終了する（電話中は除く）。"""
+    logger.info("Waiting for conection")
+    idle_timer.reset()
+    if not system_flags.get_phone_call_active():
+        if session_manager.get_context_memory().session_id:
+            await ws_manager.send_to_client(
+                message_manager.chat_message("セッションがタイムアウトしました。")
+            )
+            await end_session("timeout")
+
+
+async def on_resume_expired():
+    """再接続の猶予が切れたらセッションを終了する。"""
+    if ws_manager.detached:
+        logger.info("再接続されなかったためセッションを終了します。")
+        await end_session("disconnected")
+
+
 async def process_action(action_type: str, params):
     match action_type:
 
@@ -158,7 +290,7 @@ async def process_action(action_type: str, params):
             await start_new_session_and_greet()
 
         case ActionType.END_SESSION.value:
-            ws_manager.session_end_event.set()
+            ws_manager.end_waiting()
             await end_session_from_client()
         
         case ActionType.SET_LANGUAGE.value:
@@ -173,15 +305,12 @@ async def process_action(action_type: str, params):
         case ActionType.INPUT_NAME.value:
             logger.debug(f"Name received: {params.name}")  
             if params.name:
-                user_profile.name = params.name
                 session_manager.get_context_memory().name = params.name
                 session_manager.update_chat_history(params.name, "")
 
         case ActionType.INPUT_PHONE.value:
             logger.debug(f"Contact received: {params.contact}")  
             if params.contact:
-                user_profile.contact = params.contact
-                session_manager.get_context_memory().contact = params.contact
                 session_manager.update_chat_history(params.contact, "")
 
         case ActionType.SHOW_CONFIRM_INFO.value:
@@ -190,19 +319,16 @@ async def process_action(action_type: str, params):
 
             # Only overwrite if param is non-empty
             if params.purpose and params.purpose.strip():
-                user_profile.purpose = params.purpose
                 ctx.purpose = params.purpose
 
             if params.name and params.name.strip():
-                user_profile.name = params.name
                 ctx.name = params.name
 
             if params.contact and params.contact.strip():
                 logger.debug(
                     f"validating contact: {params.contact}"
                 )  # Debugging output
-                if await is_valid_japanese_phone_number(params.contact):
-                    user_profile.contact = params.contact
+                if is_valid_japanese_phone_number(params.contact):
                     ctx.phone = params.contact
                     ctx.phone_correct = True
                 else:
@@ -244,10 +370,14 @@ async def process_chat(user_input: str):
     """Process chat input and get agent response."""
 
     session_manager.update_chat_history(user_input, "")
+    session_manager.get_context_memory().answer_path = None
+    session_manager.get_context_memory().turn_tool = None
+    started, tokens_before = time.perf_counter(), token_usage.total
     language_instruction = _get_language_instruction(server_config_loader.get_language()) 
     response = await agent_executor.run(
         {
             "input": f"{language_instruction}\n{user_input}",
+            "raw_input": user_input,
             "chat_history": session_manager.get_chat_data()["chat_history"],
             "mode": server_config_loader.get_mode(),
         }
@@ -274,9 +404,15 @@ async def process_chat(user_input: str):
         return
     bot_response = bot_response.strip("「」")
 
-    if session_manager.latest_input and user_input != session_manager.latest_input:
-        user_input = session_manager.latest_input
-    session_manager.update_chat_history(user_input, bot_response)
+    # 入力は実行前に記録済みなので、ここでは応答だけを所要時間と一緒に残す
+    session_manager.update_chat_history(
+        "", bot_response,
+        tool=session_manager.get_context_memory().turn_tool,
+        latency_ms=(time.perf_counter() - started) * 1000,
+        tokens=token_usage.total - tokens_before,
+    )
+    if session_manager.get_context_memory().answer_path:
+        logger.info(f"回答経路: {session_manager.get_context_memory().answer_path}")
 
     await ws_manager.send_to_client(message_manager.chat_message(bot_response))
         
@@ -289,33 +425,42 @@ async def process_chat_action(message: str, action_type: str, params):
 
 async def start_new_session_and_greet():
     """Start a new session, configure button, and greet user."""
+    await turn_scheduler.cancel_session(session_manager.get_context_memory().session_id)
     session_manager.start_new_session()
     button_id = ws_manager.get_button_id()
     session_manager.get_context_memory().button_id = button_id
     agent_executor.configure_for_button(button_id)
     agent_executor.setup(initial_prompt=True)
 
-    greet_message = GREET_MSG[f"greet_{server_config_loader.get_language()}"]
+    greet_message = message_manager.greeting_text("greet", server_config_loader.get_language())
     session_manager.update_chat_history(greet_message, "")
     await ws_manager.send_to_client(message_manager.chat_message(greet_message))
+    # 短い切断のあとに同じセッションへ戻るためのトークン
+    await ws_manager.send_to_client(
+        message_manager.action_message(ActionType.SESSION_TOKEN.value, ResumeData(ws_manager.issue_resume_token()))
+    )
 
 
 async def end_session_from_client():
-    greet_message = GREET_MSG[f"end_{server_config_loader.get_language()}"]
+    greet_message = message_manager.greeting_text("end", server_config_loader.get_language())
     session_manager.update_chat_history(greet_message, "")
     await ws_manager.send_to_client(message_manager.chat_message(greet_message))
 
+    await turn_scheduler.cancel_session(session_manager.get_context_memory().session_id)
     session_manager.end_session()
+    ws_manager.clear_resume()
     ws_manager.clear_button_id()
-    ws_manager.waiting_for_response = False
+    ws_manager.end_waiting()
 
-async def end_session():
-    session_manager.end_session()
+async def end_session(outcome: str = "completed"):
+    await turn_scheduler.cancel_session(session_manager.get_context_memory().session_id)
+    session_manager.end_session(outcome)
     await ws_manager.send_to_client(
         message_manager.action_message(ActionType.END_SESSION.value)
     )
+    ws_manager.clear_resume()
     ws_manager.clear_button_id()
-    ws_manager.waiting_for_response = False
+    ws_manager.end_waiting()
 
 def _get_language_instruction(current_language: str) -> str:
     """Get strong language instruction"""
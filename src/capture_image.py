@@ -1,29 +1,247 @@
+import asyncio
 import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional, Union
 
 import cv2
 
+from src.helpers.conf_loader import CAMERA_CONF
+from src.helpers.env_loader import CAMERA_SOURCE
+from src.helpers.executors import executors
 from src.helpers.logger import logger
 from src.resource_path import src_path
 
+# カメラは専用スレッドが開きっぱなしで持ち、撮影の要求はキューで受ける。
+# 開けたバックエンドは覚えておき、次に開き直すときは最初にそれを試す。
+# 縮小と JPEG 変換は io プールで行う（OpenCV は処理中 GIL を解放する）。
 
-def capture_image(session_id, camera_index=0):
-    # Try multiple backends
-    folder_path = src_path("line_images")
-    filename = os.path.join(folder_path, f"{session_id}.jpg")
-    backends = [cv2.CAP_DSHOW, cv2.CAP_MSMF, cv2.CAP_V4L2, 0]
+BACKENDS = {
+    "dshow": cv2.CAP_DSHOW,
+    "msmf": cv2.CAP_MSMF,
+    "v4l2": cv2.CAP_V4L2,
+    "any": cv2.CAP_ANY,
+}
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".bmp")
 
-    for backend in backends:
 
-        cap = cv2.VideoCapture(camera_index, backend)
-        logger.info(f"Trying to open camera :{cap} with backend {backend}")
-        if cap.isOpened():
-            ret, frame = cap.read()
+class FileCamera:
+    """Stands in for cv2.VideoCapture: serves an image file, or the images of a folder in turn."""
+
+    def __init__(self, path: Union[str, Path]):
+        path = Path(path)
+        files = sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES) if path.is_dir() else [path]
+        self._frames = [frame for frame in (cv2.imread(str(f)) for f in files) if frame is not None]
+        self._next = 0
+
+    def isOpened(self) -> bool:
+        return bool(self._frames)
+
+    def read(self):
+        if not self._frames:
+            return False, None
+        frame = self._frames[self._next % len(self._frames)]
+        self._next += 1
+        return True, frame.copy()
+
+    def grab(self) -> bool:
+        # ドライバのバッファが無いので読み捨てるものも無い
+        return bool(self._frames)
+
+    def release(self):
+        pass
+
+
+def save_jpeg(frame, path: str, width: Optional[int] = None, quality: int = 85) -> str:
+    """Resize to width (keeping aspect) and write a JPEG atomically; returns path."""
+    height, current = frame.shape[:2]
+    if width and current > width:
+        frame = cv2.resize(frame, (width, round(height * width / current)), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(encoded.tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+class CameraService:
+    """Owns the camera on one thread; grab() and capture() return Futures and never block the caller."""
+
+    def __init__(self, source: Union[int, str] = 0, backends=("dshow", "msmf", "v4l2", "any"),
+                 width: Optional[int] = 640, quality: int = 85, ring_size: int = 2, drain: int = 4,
+                 folder: Optional[str] = None):
+        self.source = source
+        self.backends = [b for b in backends if b in BACKENDS]
+        self.width = width
+        self.quality = quality
+        self.drain = drain
+        self.folder = folder or str(src_path("line_images"))
+        self.backend: Optional[str] = None
+        self.frames = deque(maxlen=ring_size)    # (撮影時刻, フレーム)
+        self.stats = Counter()
+        self._cap = None
+        self._requests: "queue.Queue[Optional[Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    # ----------- カメラスレッド -----------
+    def _open(self):
+        if isinstance(self.source, str) and self.source.startswith("file:"):
+            cap = FileCamera(self.source[len("file:"):])
+            if not cap.isOpened():
+                raise RuntimeError(f"no images in {self.source}")
+            self.backend = "file"
+            return cap
+        order = self.backends
+        if self.backend in order:
+            order = [self.backend] + [b for b in order if b != self.backend]
+        for name in order:
+            started = time.perf_counter()
+            cap = cv2.VideoCapture(self.source, BACKENDS[name])
+            if cap.isOpened():
+                # 対応していないドライバもあるので、撮影時の読み捨て（_fresh_read）と併用する
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                self.backend = name
+                logger.info(f"カメラを開きました: {self.source} ({name}, {(time.perf_counter() - started) * 1000:.0f}ms)")
+                return cap
             cap.release()
-            if ret:
-                cv2.imwrite(filename, frame)
-                logger.info(f"Image saved as {filename} using backend {backend}")
+            logger.warning(f"カメラを開けませんでした: {self.source} ({name})")
+        raise RuntimeError(f"could not open camera {self.source}")
+
+    def _fresh_read(self):
+        # 開きっぱなしのデバイスはドライバのバッファに前回以降のフレームが溜まっているので、
+        # 読み捨ててから今の映像を取る
+        for _ in range(self.drain):
+            if not self._cap.grab():
+                break
+        return self._cap.read()
+
+    def _read(self):
+        if self._cap is None:
+            self._cap = self._open()
+            self.stats["opens"] += 1
+        ok, frame = self._fresh_read()
+        if not ok:
+            # 抜き差しやスリープ復帰で壊れたハンドルは一度だけ開き直す
+            self.stats["read_failures"] += 1
+            self._release()
+            self._cap = self._open()
+            self.stats["opens"] += 1
+            ok, frame = self._cap.read()
+            if not ok:
+                self._release()
+                raise RuntimeError("failed to read a frame")
+        self.frames.append((time.time(), frame))
+        self.stats["frames"] += 1
+        return frame
+
+    def _release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+    def _run(self):
+        while True:
+            future = self._requests.get()
+            if future is None:
+                self._release()
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._read())
+            except Exception as e:
+                self.stats["errors"] += 1
+                future.set_exception(e)
+
+    # ----------- 呼び出し側 -----------
+    def start(self):
+        """Start the camera thread and open the device in the background."""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="camera", daemon=True)
+                self._thread.start()
+                self._submit().add_done_callback(self._log_warmup)
+
+    @staticmethod
+    def _log_warmup(future: Future):
+        if future.exception() is not None:
+            logger.error(f"カメラの準備に失敗しました: {future.exception()}")
+
+    def _submit(self) -> Future:
+        future: Future = Future()
+        self._requests.put(future)
+        return future
+
+    def grab(self) -> Future:
+        """Future of a fresh frame (also kept in the ring buffer)."""
+        self.start()
+        return self._submit()
+
+    def latest(self, max_age: Optional[float] = None):
+        """Most recent frame in the ring buffer, or None if there is none (that young)."""
+        if not self.frames:
+            return None
+        taken, frame = self.frames[-1]
+        if max_age is not None and time.time() - taken > max_age:
+            return None
+        return frame
+
+    def capture(self, name: str) -> Future:
+        """Future of the path of {folder}/{name}.jpg, grabbed on the camera thread and encoded on the io pool."""
+        path = os.path.join(self.folder, f"{name}.jpg")
+        result: Future = Future()
+
+        def encode(grabbed: Future):
+            if grabbed.exception() is not None:
+                result.set_exception(grabbed.exception())
                 return
-            else:
-                logger.error(f"Failed to capture frame with backend {backend}")
-        else:
-            logger.error(f"Could not open camera with backend {backend}")
+            saved = executors.submit("io", save_jpeg, grabbed.result(), path, self.width, self.quality)
+            saved.add_done_callback(
+                lambda f: result.set_exception(f.exception()) if f.exception() else result.set_result(f.result())
+            )
+
+        self.grab().add_done_callback(encode)
+        return result
+
+    async def capture_async(self, name: str) -> str:
+        return await asyncio.wrap_future(self.capture(name))
+
+    def close(self):
+        if self._thread is not None:
+            self._requests.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def _source(value) -> Union[int, str]:
+    value = CAMERA_SOURCE if CAMERA_SOURCE is not None else value
+    return int(value) if isinstance(value, str) and value.isdigit() else value
+
+
+camera_service = CameraService(
+    source=_source(CAMERA_CONF.get("source", 0)),
+    backends=CAMERA_CONF.get("backends", ("dshow", "msmf", "v4l2", "any")),
+    width=CAMERA_CONF.get("width", 640),
+    quality=CAMERA_CONF.get("jpeg_quality", 85),
+    ring_size=CAMERA_CONF.get("ring_size", 2),
+    drain=CAMERA_CONF.get("drain", 4),
+)
+
+
+def capture_image(session_id) -> Future:
+    """Save line_images/{session_id}.jpg in the background; returns a Future of the path."""
+    future = camera_service.capture(session_id)
+    future.add_done_callback(
+        lambda f: logger.error(f"画像の保存に失敗しました: {f.exception()}") if f.exception()
+        else logger.info(f"Image saved as {f.result()} using backend {camera_service.backend}")
+    )
+    return future
@@ -0,0 +1,241 @@
+import csv
+import io
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import orjson
+
+from src.helpers.conf_loader import ANALYTICS_CONF
+from src.helpers.env_loader import WORKER_ID
+
+# セッションと発話を SQLite に貯め、集計とテキストログの再生成はここから行う。
+# 1 セッション 1 トランザクションで追記するだけなので、書き込みは io プールで十分速い。
+# 集計でよく使う「日」と「時」は書き込み時に列として持たせ、関数を通さずにインデックスで引けるようにする。
+
+FAQ_TOOLS = ("faq_tool", "support_tool")
+ROLE_LABELS = ("来訪者", "アバター")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    started REAL, ended REAL, day TEXT, hour INTEGER,
+    button_id TEXT, language TEXT, mode TEXT, outcome TEXT, note TEXT,
+    name TEXT, purpose TEXT, phone TEXT,
+    turns INTEGER, tools TEXT, tokens INTEGER, worker TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_day ON sessions (day, hour, outcome, turns, tokens, started, ended);
+CREATE TABLE IF NOT EXISTS turns (
+    session_id TEXT NOT NULL, seq INTEGER NOT NULL,
+    at REAL, day TEXT, role INTEGER, text TEXT, question TEXT,
+    tool TEXT, latency_ms REAL, tokens INTEGER,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS turns_tool_day ON turns (tool, day, question);
+CREATE TABLE IF NOT EXISTS tool_daily (
+    day TEXT NOT NULL, tool TEXT NOT NULL,
+    replies INTEGER, total_ms REAL, max_ms REAL, tokens INTEGER,
+    PRIMARY KEY (day, tool)
+) WITHOUT ROWID;
+"""
+
+# 応答時間の日次集計は発話を毎回なめると 1 年分で数百 ms かかるので、記録時に足し込んでおく
+TOOL_DAILY_UPSERT = (
+    "INSERT INTO tool_daily VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (day, tool) DO UPDATE SET"
+    " replies = replies + excluded.replies, total_ms = total_ms + excluded.total_ms,"
+    " max_ms = MAX(max_ms, excluded.max_ms), tokens = tokens + excluded.tokens"
+)
+
+
+def _day_hour(ts: Optional[float]):
+    if ts is None:
+        return None, None
+    local = datetime.fromtimestamp(ts)
+    return local.strftime("%Y-%m-%d"), local.hour
+
+
+def _ts(value) -> Optional[float]:
+    return value.timestamp() if isinstance(value, datetime) else value
+
+
+def since_day(days: int) -> str:
+    return datetime.fromtimestamp(time.time() - days * 86400).strftime("%Y-%m-%d")
+
+
+class AnalyticsStore:
+    """Append-only store of finished sessions and their turns, with the report queries."""
+
+    def __init__(self, path: str, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        # 最初に使うときに開く（import しただけではファイルを作らない）
+        if self._db is None:
+            if self.readonly:
+                self._db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            else:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._db = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.executescript(SCHEMA)
+        return self._db
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    # ----------- 書き込み -----------
+    def record_session(self, ctx, outcome: str, language: str = None, mode: str = None, note: str = None):
+        """Store one finished session (ContextMemory); re-recording the same id replaces it."""
+        if not ctx.session_id:
+            return
+        started, ended = _ts(ctx.session_start_time), _ts(ctx.session_end_time) or time.time()
+        day, hour = _day_hour(started)
+        stats = ctx.turns.stats()
+        turn_rows, question = [], None
+        for seq, turn in enumerate(ctx.turns):
+            if turn.role == 0:
+                question = turn.text
+            turn_rows.append((
+                ctx.session_id, seq, turn.at, _day_hour(turn.at)[0], turn.role, turn.text,
+                question if turn.role == 1 and turn.tool else None,
+                turn.tool, turn.latency_ms, turn.tokens,
+            ))
+        daily = {}
+        for row in turn_rows:
+            if row[4] == 1 and row[8] is not None:
+                replies, total_ms, max_ms, tokens = daily.get((row[3], row[7] or ""), (0, 0.0, 0.0, 0))
+                daily[(row[3], row[7] or "")] = (replies + 1, total_ms + row[8], max(max_ms, row[8]), tokens + row[9])
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                # 同じセッションを記録し直す場合（中断からの復旧など）は前回分を差し引く。最大値は戻せない
+                old = self._conn.execute(
+                    "SELECT day, COALESCE(tool, ''), -COUNT(*), -SUM(latency_ms), 0, -SUM(tokens) FROM turns"
+                    " WHERE session_id = ? AND role = 1 AND latency_ms IS NOT NULL GROUP BY day, tool",
+                    (ctx.session_id,),
+                ).fetchall()
+                self._conn.executemany(TOOL_DAILY_UPSERT, old)
+                self._conn.executemany(TOOL_DAILY_UPSERT, [(*key, *value) for key, value in daily.items()])
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (ctx.session_id, started, ended, day, hour, ctx.button_id, language, mode, outcome, note,
+                     ctx.name, ctx.purpose, ctx.phone, stats["turns"], ",".join(stats["tools"]),
+                     stats["tokens"], WORKER_ID),
+                )
+                self._conn.execute("DELETE FROM turns WHERE session_id = ?", (ctx.session_id,))
+                self._conn.executemany("INSERT INTO turns VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", turn_rows)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # ----------- 集計 -----------
+    def summary(self, days: int = 30) -> Dict[str, Any]:
+        rows = self._query(
+            "SELECT COUNT(*) AS sessions, COALESCE(SUM(turns), 0) AS turns, COALESCE(SUM(tokens), 0) AS tokens,"
+            " AVG(ended - started) AS avg_duration_s FROM sessions WHERE day >= ?",
+            (since_day(days),),
+        )
+        outcomes = self._query(
+            "SELECT outcome, COUNT(*) AS sessions FROM sessions WHERE day >= ? GROUP BY outcome ORDER BY 2 DESC",
+            (since_day(days),),
+        )
+        return {**rows[0], "outcomes": outcomes}
+
+    def busiest_hours(self, days: int = 30) -> List[Dict[str, Any]]:
+        return self._query(
+            "SELECT hour, COUNT(*) AS sessions, ROUND(COUNT(*) * 1.0 / COUNT(DISTINCT day), 2) AS per_day"
+            " FROM sessions WHERE day >= ? GROUP BY hour ORDER BY sessions DESC",
+            (since_day(days),),
+        )
+
+    def top_questions(self, days: int = 30, limit: int = 10, tools: Iterable[str] = FAQ_TOOLS) -> List[Dict[str, Any]]:
+        tools = tuple(tools)
+        marks = ",".join("?" * len(tools))
+        return self._query(
+            f"SELECT question, tool, COUNT(*) AS asked FROM turns"
+            f" WHERE tool IN ({marks}) AND day >= ? AND question IS NOT NULL"
+            f" GROUP BY question, tool ORDER BY asked DESC LIMIT ?",
+            (*tools, since_day(days), limit),
+        )
+
+    def tool_latency(self, days: int = 30) -> List[Dict[str, Any]]:
+        """Daily mean and max reply latency per tool (tool '' = answered without a tool)."""
+        return self._query(
+            "SELECT day, tool, replies, ROUND(total_ms / replies, 1) AS avg_ms, ROUND(max_ms, 1) AS max_ms, tokens"
+            " FROM tool_daily WHERE day >= ? AND replies > 0 ORDER BY day, tool",
+            (since_day(days),),
+        )
+
+    def sessions(self, days: int = 30, limit: int = 100) -> List[Dict[str, Any]]:
+        return self._query(
+            "SELECT session_id, started, ended, button_id, language, mode, outcome, turns, tools, tokens"
+            " FROM sessions WHERE day >= ? ORDER BY started DESC LIMIT ?",
+            (since_day(days), limit),
+        )
+
+    # ----------- テキストログ -----------
+    def render_log(self, session_id: str) -> Optional[str]:
+        """The old per-session .log text, rebuilt from the store."""
+        rows = self._query("SELECT * FROM sessions WHERE session_id = ?", (session_id,))
+        if not rows:
+            return None
+        s = rows[0]
+        fmt = lambda ts: datetime.fromtimestamp(ts).replace(microsecond=0) if ts else "進行中"
+        out = io.StringIO()
+        out.write(f"セッションID  : {session_id}\n")
+        out.write(f"開始時刻  : {fmt(s['started'])}\n")
+        out.write(f"終了時刻  : {fmt(s['ended'])}\n")
+        out.write(f"選択したボタン    : 一般会話\n")
+        out.write(f"来訪者氏名    : {s['name'] or '未入力'}\n")
+        out.write(f"来訪目的  : {s['purpose'] or '未入力'}\n")
+        out.write(f"連絡先    : {s['phone'] or '未入力'}\n")
+        if s["note"]:
+            out.write(f"備考  : {s['note']}\n")
+        out.write("\n会話ログ :\n")
+        previous = None
+        for turn in self._query("SELECT role, text FROM turns WHERE session_id = ? ORDER BY seq", (session_id,)):
+            line = f"{ROLE_LABELS[turn['role']]}: {turn['text']}"
+            if line != previous:
+                out.write(line + "\n")
+                previous = line
+        return out.getvalue()
+
+    # ----------- 書き出し -----------
+    def export(self, table: str, out, fmt: str = "csv", days: int = 365):
+        """Write sessions or turns from the last days to out as csv or jsonl."""
+        if table not in ("sessions", "turns"):
+            raise ValueError(f"unknown table: {table}")
+        rows = self._query(f"SELECT * FROM {table} WHERE day >= ?", (since_day(days),))
+        if fmt == "jsonl":
+            for row in rows:
+                out.write(orjson.dumps(row).decode() + "\n")
+        elif rows:
+            writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def create_analytics_store(readonly: bool = False) -> AnalyticsStore:
+    return AnalyticsStore(ANALYTICS_CONF.get("path", "data/analytics.db"), readonly)
+
+
+analytics_store = create_analytics_store()
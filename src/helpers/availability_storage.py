@@ -1,41 +1,65 @@
 import time
 from src.helpers.logger import logger
 from src.helpers.conf_loader import LINE_WAIT_TIME
+from src.helpers.env_loader import WORKER_ID
+from src.helpers.state_store import state_store
 
-availability_responses = {}  
-availability_timestamps = {} 
+# LINE の webhook を受けたワーカーとキオスクのワーカーが違っても見えるよう、状態ストアに置く
+# キーは "<問い合わせたワーカー>/<LINE ユーザー>"。キオスク同士で返信や待機を消し合わないようにする
+RESPONSES = "availability_responses"
+TIMESTAMPS = "availability_timestamps"
+
+def _key(user_id) -> str:
+    return f"{WORKER_ID}/{user_id}"
+
+def _own(namespace: str) -> dict:
+    """Entries of this worker's kiosk, keyed by LINE user id."""
+    prefix = _key("")
+    return {key[len(prefix):]: value for key, value in state_store.items(namespace).items() if key.startswith(prefix)}
 
 def mark_message_sent(user_id):
     """Call this when sending CheckAvailabilityMessage."""
-    availability_timestamps[user_id] = time.time()
+    state_store.set(TIMESTAMPS, _key(user_id), time.time(), ttl=LINE_WAIT_TIME)
 
 def set_response(user_id, response_type):
-    """Set response only if it's within 20 seconds of the message being sent."""
-    now = time.time()
-    message_time = availability_timestamps.get(user_id)
+    """Set response only if it's within 20 seconds of the message being sent.
 
-    if message_time is None:
-        logger.info(f"[set_response] No availability message timestamp for {user_id}. Ignored.")
-        return
+    The webhook may run on any worker, so the reply goes to every kiosk still asking this user.
+    """
+    asked_by = [key for key in state_store.items(TIMESTAMPS) if key.split("/", 1)[1] == user_id]
 
-    if now - message_time > LINE_WAIT_TIME:
-        logger.info(f"[set_response] Response from {user_id} expired. Ignored.")
+    if not asked_by:
+        logger.info(f"[set_response] No availability message timestamp (or expired) for {user_id}. Ignored.")
         return
 
-    current = availability_responses.get(user_id)
-    if current != response_type:
-        availability_responses[user_id] = response_type
-        logger.info(f"[set_response] Stored response from {user_id}: {response_type}")
-    else:
-        logger.info(f"[set_response] Duplicate response from {user_id} ignored.")
+    for key in asked_by:
+        current = state_store.get(RESPONSES, key)
+        if current != response_type:
+            state_store.set(RESPONSES, key, response_type)
+            logger.info(f"[set_response] Stored response from {user_id} for worker {key.split('/', 1)[0]}: {response_type}")
+        else:
+            logger.info(f"[set_response] Duplicate response from {user_id} ignored.")
+
+def get_responses() -> dict:
+    return _own(RESPONSES)
+
+def pending_requests() -> dict:
+    """LINE users still being asked, and replies not yet consumed; {} when there are none."""
+    waiting = _own(TIMESTAMPS)
+    responses = get_responses()
+    if not waiting and not responses:
+        return {}
+    return {"waiting": sorted(waiting), "responses": responses}
 
 def pop_response(user_id):
-    availability_timestamps.pop(user_id, None)
-    return availability_responses.pop(user_id, None)
+    state_store.delete(TIMESTAMPS, _key(user_id))
+    return state_store.pop(RESPONSES, _key(user_id))
 
 def clear_all_responses():
-    availability_responses.clear()
-    availability_timestamps.clear()
+    # 他のキオスクが待っている返信は残す
+    for namespace in (RESPONSES, TIMESTAMPS):
+        for user_id in _own(namespace):
+            state_store.delete(namespace, _key(user_id))
 
 def rank_responses(reply_messages: list):
     rank_order = ["今すぐ対応する", "2分以内に対応する", "対応出来ない"]
@@ -11,6 +11,9 @@ class ConfigLoader:
         self.config = self.load_yaml()
         self.current_mode = self.config.get("mode", "不在モード")  
         self.current_language = self.config.get("language", "ja")  # Default to Japanese
+        self._reload_hooks = []
+        self._sections = {}
+        self._state = None
 
     def load_yaml(self):
         """Load YAML configuration."""
@@ -24,6 +27,51 @@ class ConfigLoader:
             logger.error(f"YAML parsing error in {self.config_file}: {e}")
             return {}
 
+    def use_state_store(self, store):
+        """Share the mode through `store` so every worker sees LINE-side changes.
+
+        The language stays per worker: each worker serves one kiosk, and SET_LANGUAGE
+        from one kiosk must not switch the others.
+        """
+        self._state = store
+        # 先に起動したワーカーが変更済みなら、その値を優先する
+        if store.get("settings", "mode") is None:
+            store.set("settings", "mode", self.current_mode)
+
+    def section(self, key: str) -> dict:
+        """The `key` section as a dict that reload() refreshes in place, so it is safe to bind at import."""
+        with self._lock:
+            section = self._sections.get(key)
+            if section is None:
+                section = self._sections[key] = dict(self.config.get(key) or {})
+            return section
+
+    @staticmethod
+    def _refresh(section: dict, new: dict):
+        # 先に新しい値を入れてから消えたキーを落とす（読み手が空の dict を見ないように）
+        section.update(new)
+        for key in [key for key in section if key not in new]:
+            del section[key]
+
+    def add_reload_hook(self, hook):
+        """Register a callback(config) that runs after reload()."""
+        self._reload_hooks.append(hook)
+
+    def reload(self):
+        """Re-read the YAML file in place and notify the reload hooks."""
+        with self._lock:
+            self.config.clear()
+            self.config.update(self.load_yaml())
+            # import 時に束縛された定数（DAILOGUE など）は同じ dict なので、中身を入れ替えれば全員に反映される
+            for key, section in self._sections.items():
+                self._refresh(section, self.config.get(key) or {})
+        for hook in self._reload_hooks:
+            try:
+                hook(self.config)
+            except Exception as e:
+                logger.error(f"設定再読み込み後の処理でエラー: {e}")
+        logger.info(f"設定を再読み込みしました: {self.config_file}")
+
     def update_mode(self, new_mode: str):
         """Thread-safe update of mode in YAML and server state."""
         with self._lock:
@@ -32,6 +80,8 @@ class ConfigLoader:
 
             # Update the current mode in server state
             self.current_mode = new_mode
+            if self._state is not None:
+                self._state.set("settings", "mode", new_mode)
 
             logger.info(f"モード変更しました: {new_mode}")
     
@@ -41,7 +91,7 @@ class ConfigLoader:
             self.config["language"] = new_language
             self.save_config(self.config)  # Save updated config
 
-            # Update the current language in server state
+            # 言語はこのワーカー（キオスク）だけの設定
             self.current_language = new_language
 
             logger.info(f"言語が変更されました: {new_language}")
@@ -56,11 +106,13 @@ class ConfigLoader:
             logger.error(f"Error saving config to {self.config_file}: {e}")
 
     def get_mode(self):
-        """Get the current mode from memory."""
+        """Get the current mode (from the shared state store when attached)."""
+        if self._state is not None:
+            return self._state.get("settings", "mode", self.current_mode)
         return self.current_mode
     
     def get_language(self):
-        """Get the current language from memory."""
+        """Get the current language of this worker's kiosk."""
         return self.current_language
 
 
@@ -69,16 +121,23 @@ ai_config_loader = ConfigLoader(config_file=src_path("configs/AI_conf.yaml"))
 server_config_loader = ConfigLoader(config_file=src_path("configs/server_conf.yaml"))
 
 # Load configurations
-ai_config = ai_config_loader.load_yaml()
-server_config = server_config_loader.load_yaml()
-
-# Access configurations
-AGENT_TOOLS = ai_config.get("tools", {})
-MODELS_CONF = ai_config.get("model", {})
-DAILOGUE = ai_config.get("dailogue", {})
-GREET_MSG = ai_config.get("greeting", {})
-DISPLAY_TXT = ai_config.get("display_text", {})
-RAG_CONF = ai_config.get("rag", {})
+ai_config = ai_config_loader.config
+server_config = server_config_loader.config
+
+# Access configurations (AI_conf.yaml sections follow ai_config_loader.reload())
+AGENT_TOOLS = ai_config_loader.section("tools")
+MODELS_CONF = ai_config_loader.section("model")
+DAILOGUE = ai_config_loader.section("dailogue")
+GREET_MSG = ai_config_loader.section("greeting")
+DISPLAY_TXT = ai_config_loader.section("display_text")
+RAG_CONF = ai_config_loader.section("rag")
+PREFETCH_CONF = ai_config_loader.section("prefetch")
+TURN_CONF = ai_config_loader.section("turns")
+WS_CONF = ai_config_loader.section("websocket")
+EXECUTOR_CONF = ai_config_loader.section("executors")
+JOURNAL_CONF = ai_config_loader.section("session_journal")
+ANALYTICS_CONF = ai_config_loader.section("analytics")
+CAMERA_CONF = ai_config_loader.section("camera")
 
 HOST = server_config.get("host", "0.0.0.0")
 PORT = server_config.get("port", 8000)
@@ -89,5 +148,6 @@ LINE_WAIT_TIME = server_config.get("line_wait_time",20)
 NGROK_URL = server_config.get("ngrok_url", "")
 PHONECALL_URL = server_config.get("phonecall_url", "http://127.0.0.1:8080/phone")
 OPEN_LINE_MESSAGES = server_config.get("line_messages", False)
+DEPLOY_CONF = server_config.get("deployment") or {}
 
 # logger.info(f"サーバー起動 モード: {server_config_loader.get_mode()}")
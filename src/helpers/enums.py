@@ -7,6 +7,14 @@ class Mode(Enum):
     FUZAI = "不在モード"
 
 
+class PhoneType(Enum):
+    MOBILE = "携帯電話"
+    IP = "IP電話"
+    FIXED = "固定電話"
+    FREE_DIAL = "フリーダイヤル"
+    NAVI_DIAL = "ナビダイヤル"
+
+
 class MessageType(Enum):
     CHAT = "chat"
     ACTION = "action"
@@ -47,4 +55,56 @@ class ActionType(Enum):
     HIDE_WEBVIEW = "hide_webview"
     SHOW_MAP = "show_map"
     SET_LOCATION = "set_location"
+    SESSION_TOKEN = "session_token"
+
+
+
+# バイナリ (MessagePack) 転送で使う短い整数コード。番号は変更・再利用しないこと（追加は末尾に）
+MESSAGE_TYPE_CODES = {
+    MessageType.CHAT: 1,
+    MessageType.ACTION: 2,
+    MessageType.CHAT_ACTION: 3,
+    MessageType.CONFIRM_ACTION: 4,
+    MessageType.URL_ACTION: 5,
+}
+
+ACTION_TYPE_CODES = {
+    ActionType.START_SESSION: 1,
+    ActionType.END_SESSION: 2,
+    ActionType.SHOW_CONVERSATION: 3,
+    ActionType.SHOW_CONFIRM_INFO: 4,
+    ActionType.SHOW_NAME: 5,
+    ActionType.INPUT_NAME: 6,
+    ActionType.SHOW_PHONE: 7,
+    ActionType.INPUT_PHONE: 8,
+    ActionType.SHOW_KEYBOARD: 9,
+    ActionType.SHOW_NUM_KEYBOARD: 10,
+    ActionType.SHOW_CONFRIM_YESNO: 11,
+    ActionType.SHOW_TRAIN: 12,
+    ActionType.SHOW_WEATHER: 13,
+    ActionType.SHOW_TOP: 14,
+    ActionType.SHOW_SORRY: 15,
+    ActionType.SHOW_WAIT: 16,
+    ActionType.TOUCH_ACTION: 17,
+    ActionType.PHONECALL_ACTION: 18,
+    ActionType.PHONEEND_ACTION: 19,
+    ActionType.CHOOSE_CONTACT: 20,
+    ActionType.SHOW_BOCHI: 21,
+    ActionType.SHOW_PET: 22,
+    ActionType.SHOW_CONFIRM_FOR_DENGON: 23,
+    ActionType.CHECK_CURRENT_MODE: 24,
+    ActionType.SHOW_PHONE_PAGE: 25,
+    ActionType.END_OF_TTS: 26,
+    ActionType.SHOW_POINT_OUT: 27,
+    ActionType.SET_LANGUAGE: 28,
+    ActionType.HIDE_WEBVIEW: 29,
+    ActionType.SHOW_MAP: 30,
+    ActionType.SET_LOCATION: 31,
+    ActionType.SESSION_TOKEN: 32,
+}
+
 
+class WaitOutcome(Enum):
+    RESPONSE = "response"
+    TIMEOUT = "timeout"
+    SESSION_ENDED = "session_ended"
@@ -5,7 +5,17 @@ load_dotenv(".env")
 
 CHANNEL_ACCESS_TOKEN = os.getenv("CHANNEL_ACCESS_TOKEN")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# ベンチマークや負荷試験ではローカルのスタブサーバーに向ける
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")
+LLM_TRANSPORT = os.getenv("LLM_TRANSPORT")
+WEATHER_API_URL = os.getenv("WEATHER_API_URL", "https://api.open-meteo.com/v1/forecast")
+LINE_API_URL = os.getenv("LINE_API_URL", "https://api.line.me")
 SERP_API_KEY = os.getenv("SERP_API_KEY")
+# 複数ワーカー構成では runner.py が各ワーカーに設定する
+STATE_STORE = os.getenv("STATE_STORE")
+WORKER_ID = os.getenv("WORKER_ID", "0")
+# カメラの代わりに画像ファイルを使う（例: file:benchmarks/data/camera）
+CAMERA_SOURCE = os.getenv("CAMERA_SOURCE")
 
 TWILIO_CALLER_ID = os.getenv("TWILIO_CALLER_ID")
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
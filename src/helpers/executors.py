@@ -0,0 +1,144 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from src.helpers.conf_loader import EXECUTOR_CONF
+from src.helpers.logger import logger
+
+# イベントループを止めないための名前付きプール
+#   io        : ファイル書き込み、翻訳、画像の保存など待ち時間の長い処理（スレッド）
+#               通話中のブラウザ監視のように終わりの決まらない処理はここに入れない（終了時に待たされる）
+#   retrieval : FAISS の検索（GIL を解放するのでスレッドで十分）
+#   cpu       : xlsx の読み込みやチャンク分割など Python の CPU 処理（プロセス）
+
+DEFAULT_POOLS = {
+    "io": {"kind": "thread", "workers": 8},
+    "retrieval": {"kind": "thread", "workers": 4},
+    "cpu": {"kind": "process", "workers": 2},
+}
+
+
+def _timed_call(fn: Callable, args: tuple, kwargs: dict, submitted: float):
+    """Runs in the worker; returns (queue wait seconds, result). Module-level so it pickles."""
+    started = time.time()
+    return started - submitted, fn(*args, **kwargs)
+
+
+class ExecutorPool:
+    """A lazily created thread or process pool with saturation counters."""
+
+    def __init__(self, name: str, kind: str = "thread", workers: int = 4, warn_wait_ms: float = 200.0):
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.warn_wait_ms = warn_wait_ms
+        self._executor: Executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.submitted = 0
+        self.saturated = 0      # 空きワーカーがなく待たされた投入の数
+        self.max_wait_ms = 0.0
+        self.total_wait_ms = 0.0
+        self._started = False
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # サーバーはスレッドを持っているので fork ではなく spawn で起動する
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix=f"pool-{self.name}")
+        return self._executor
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Schedule fn(*args, **kwargs); works from sync code and from the event loop."""
+        outer: Future = Future()
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if self.in_flight > self.workers:
+                self.saturated += 1
+        inner = self._get_executor().submit(_timed_call, fn, args, kwargs, time.time())
+        inner.add_done_callback(lambda f: self._done(f, outer, fn))
+        return outer
+
+    def _done(self, inner: Future, outer: Future, fn: Callable):
+        with self._lock:
+            self.in_flight -= 1
+        try:
+            wait, result = inner.result()
+        except BaseException as e:
+            outer.set_exception(e)
+            return
+        wait_ms = wait * 1000
+        with self._lock:
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        # 最初の 1 件はプロセス起動の時間を含むので警告しない
+        if wait_ms > self.warn_wait_ms and (self._started or self.kind != "process"):
+            logger.warning(f"実行プール {self.name} が混雑しています: {getattr(fn, '__name__', fn)} が {wait_ms:.0f}ms 待ちました")
+        self._started = True
+        outer.set_result(result)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "submitted": self.submitted,
+            "saturated": self.saturated,
+            "avg_wait_ms": round(self.total_wait_ms / max(self.submitted - self.in_flight, 1), 2),
+            "max_wait_ms": round(self.max_wait_ms, 2),
+        }
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+            self._started = False
+
+
+class Executors:
+    """Named pools sized from the `executors` section of AI_conf.yaml."""
+
+    def __init__(self, conf: Dict[str, Any]):
+        conf = conf or {}
+        warn_wait_ms = conf.get("warn_wait_ms", 200)
+        pools = {**DEFAULT_POOLS, **(conf.get("pools") or {})}
+        self.pools = {
+            name: ExecutorPool(name, p.get("kind", "thread"), p.get("workers", 4), warn_wait_ms)
+            for name, p in pools.items()
+        }
+
+    def pool(self, name: str) -> ExecutorPool:
+        if name not in self.pools:
+            logger.warning(f"未定義の実行プール: {name}。io を使用します。")
+            name = "io"
+        return self.pools[name]
+
+    def submit(self, pool: str, fn: Callable, *args, **kwargs) -> Future:
+        return self.pool(pool).submit(fn, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    def shutdown(self, wait: bool = True):
+        for pool in self.pools.values():
+            pool.shutdown(wait)
+
+
+executors = Executors(EXECUTOR_CONF)
+
+
+async def run_blocking(pool: str, fn: Callable, *args, **kwargs) -> Any:
+    """Await fn(*args, **kwargs) on the named pool instead of the event loop thread."""
+    return await executors.pool(pool).run(fn, *args, **kwargs)
@@ -39,6 +39,7 @@ class Logger:
         self.logger.addHandler(rich_handler)
         self.logger.addHandler(dev_handler)
 
+    def isEnabledFor(self, level: int) -> bool: return self.logger.isEnabledFor(level)
     def debug(self, msg: str): self.logger.debug(msg)
     def info(self, msg: str): self.logger.info(msg)
     def warning(self, msg: str): self.logger.warning(msg)
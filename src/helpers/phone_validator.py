@@ -0,0 +1,199 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from src.helpers.enums import PhoneType
+
+# 日本の電話番号（総務省 電気通信番号計画）のテーブル駆動バリデーター
+
+# NFKC で吸収できないダッシュ類（音声入力でよく混ざる）
+_DASH_TABLE = str.maketrans({c: "-" for c in "‐‑‒–—―−ーｰ"})
+_KANJI_DIGIT_TABLE = str.maketrans("〇零一二三四五六七八九", "00123456789")
+_KANJI_DIGIT_RUN_RE = re.compile(r"[〇零一二三四五六七八九]{2,}")
+_SEPARATOR_RE = re.compile(r"[\s\-()]")
+
+# 固定電話以外の番号種別: プレフィックス -> (種別, 桁数, 表示の区切り)
+SPECIAL_PREFIXES: Dict[str, Tuple[PhoneType, int, Tuple[int, ...]]] = {
+    "070": (PhoneType.MOBILE, 11, (3, 4, 4)),
+    "080": (PhoneType.MOBILE, 11, (3, 4, 4)),
+    "090": (PhoneType.MOBILE, 11, (3, 4, 4)),
+    "050": (PhoneType.IP, 11, (3, 4, 4)),
+    "0120": (PhoneType.FREE_DIAL, 10, (4, 3, 3)),
+    "0800": (PhoneType.FREE_DIAL, 11, (4, 3, 4)),
+    "0570": (PhoneType.NAVI_DIAL, 10, (4, 3, 3)),
+}
+
+# 固定電話で使われない 0AB0 のプレフィックス（020 M2M, 060 FMC, 0990 など）
+_NON_GEOGRAPHIC_PREFIXES = ("020", "060", "0990")
+
+# 固定電話の市外局番テーブル: プレフィックス -> 市外局番の桁数（先頭 0 を含む）。
+# 市外局番 + 市内局番は常に 6 桁なので、桁数が決まれば区切り位置も決まる。
+# 最長一致で引き、どこにも該当しないプレフィックスは 4 桁の市外局番として扱う。
+# 同じ上位桁で 2 桁/3 桁/4 桁が混在する地域（04 と 042/047 など）は
+# 市内局番の先頭まで含めたキーで区別する。
+AREA_CODE_LENGTHS: Dict[str, int] = {
+    # 2 桁
+    "03": 2, "06": 2,
+    "042": 3, "0429": 2, "0428": 4,
+    "047": 3, "0470": 4, "0471": 2, "0479": 4, "04992": 5,
+    "04994": 5, "04996": 5, "04998": 5,
+    # 3 桁（同じ上位桁の 4 桁市外局番を併記）
+    "011": 3,
+    "017": 3, "0172": 4, "0173": 4, "0174": 4, "0175": 4, "0176": 4, "0178": 4, "0179": 4,
+    "018": 3, "0182": 4, "0183": 4, "0184": 4, "0185": 4, "0186": 4, "0187": 4,
+    "019": 3, "0191": 4, "0192": 4, "0193": 4, "0194": 4, "0195": 4, "0197": 4, "0198": 4,
+    "022": 3, "0220": 4, "0223": 4, "0224": 4, "0225": 4, "0226": 4, "0228": 4, "0229": 4,
+    "023": 3, "0233": 4, "0234": 4, "0235": 4, "0237": 4, "0238": 4,
+    "024": 3, "0240": 4, "0241": 4, "0242": 4, "0243": 4, "0244": 4, "0246": 4, "0247": 4, "0248": 4,
+    "025": 3, "0250": 4, "0254": 4, "0255": 4, "0256": 4, "0257": 4, "0258": 4, "0259": 4,
+    "026": 3, "0260": 4, "0261": 4, "0263": 4, "0264": 4, "0265": 4, "0266": 4, "0267": 4,
+    "0268": 4, "0269": 4,
+    "027": 3, "0270": 4, "0274": 4, "0276": 4, "0277": 4, "0278": 4, "0279": 4,
+    "028": 3, "0280": 4, "0282": 4, "0283": 4, "0284": 4, "0285": 4, "0287": 4, "0288": 4, "0289": 4,
+    "029": 3, "0291": 4, "0293": 4, "0294": 4, "0295": 4, "0296": 4, "0297": 4, "0299": 4,
+    "043": 3, "044": 3, "045": 3, "046": 3, "0460": 4, "0465": 4, "0467": 4,
+    "048": 3, "0480": 4, "049": 3, "0493": 4, "0494": 4, "0495": 4,
+    "052": 3, "053": 3, "0531": 4, "0532": 4, "0533": 4, "0536": 4, "0537": 4, "0538": 4, "0539": 4,
+    "054": 3, "0544": 4, "0545": 4, "0547": 4, "0548": 4,
+    "055": 3, "0550": 4, "0551": 4, "0553": 4, "0554": 4, "0555": 4, "0556": 4, "0557": 4,
+    "0558": 4,
+    "058": 3, "0581": 4, "0584": 4, "0585": 4, "0586": 4, "0587": 4,
+    "059": 3, "0594": 4, "0595": 4, "0596": 4, "0597": 4, "0598": 4, "0599": 4,
+    "072": 3, "0721": 4, "0725": 4, "073": 3, "0735": 4, "0736": 4, "0737": 4, "0738": 4, "0739": 4,
+    "075": 3, "076": 3, "0761": 4, "0763": 4, "0765": 4, "0766": 4, "0767": 4, "0768": 4,
+    "077": 3, "0770": 4, "0771": 4, "0772": 4, "0773": 4, "0774": 4, "0776": 4, "0778": 4,
+    "0779": 4,
+    "078": 3, "079": 3, "0790": 4, "0791": 4, "0794": 4, "0795": 4, "0796": 4, "0797": 4,
+    "0798": 4, "0799": 4,
+    "082": 3, "0820": 4, "0823": 4, "0824": 4, "0826": 4, "0827": 4, "0829": 4,
+    "083": 3, "0833": 4, "0834": 4, "0835": 4, "0836": 4, "0837": 4, "0838": 4,
+    "084": 3, "0845": 4, "0846": 4, "0847": 4, "0848": 4,
+    "086": 3, "0863": 4, "0865": 4, "0866": 4, "0867": 4, "0868": 4, "0869": 4,
+    "087": 3, "0875": 4, "0877": 4, "0879": 4,
+    "088": 3, "0880": 4, "0883": 4, "0884": 4, "0885": 4, "0887": 4, "0889": 4,
+    "089": 3, "0892": 4, "0893": 4, "0894": 4, "0895": 4, "0896": 4, "0897": 4, "0898": 4,
+    "092": 3, "0920": 4, "093": 3, "0930": 4,
+    "095": 3, "0950": 4, "0955": 4, "0956": 4, "0957": 4, "0959": 4,
+    "096": 3, "0964": 4, "0965": 4, "0966": 4, "0967": 4, "0968": 4, "0969": 4,
+    "097": 3, "0972": 4, "0973": 4, "0974": 4, "0977": 4, "0978": 4, "0979": 4,
+    "098": 3, "0980": 4, "09802": 5,
+    "099": 3, "0993": 4, "0994": 4, "0995": 4, "0996": 4, "0997": 4, "09912": 5, "09913": 5,
+    "09969": 5,
+    # 5 桁
+    "01267": 5, "01372": 5, "01374": 5, "01377": 5, "01392": 5, "01397": 5, "01398": 5,
+    "01456": 5, "01457": 5, "01466": 5, "01547": 5, "01558": 5, "01564": 5, "01586": 5,
+    "01587": 5, "01632": 5, "01634": 5, "01635": 5, "01648": 5, "01654": 5, "01655": 5,
+    "01656": 5, "01658": 5, "05769": 5, "05979": 5, "07468": 5, "08387": 5, "08388": 5,
+    "08396": 5, "08477": 5, "08512": 5, "08514": 5, "09496": 5,
+}
+_MAX_AREA_KEY = max(len(key) for key in AREA_CODE_LENGTHS)
+
+# 折り返し電話をかけられる種別。フリーダイヤル・ナビダイヤルは着信専用や有料案内のことがあるので来訪者の連絡先にしない
+CALLBACK_TYPES = frozenset({PhoneType.MOBILE, PhoneType.IP, PhoneType.FIXED})
+
+
+class PhoneValidationResult(NamedTuple):
+    """Structured result of validating one Japanese phone number."""
+
+    raw: str
+    digits: str
+    valid: bool
+    phone_type: Optional[PhoneType] = None
+    formatted: Optional[str] = None
+    e164: Optional[str] = None
+    reason: Optional[str] = None
+
+
+def normalize_phone_text(text: str) -> str:
+    """Normalize full-width characters, dash variants and kanji digit runs."""
+    if text.isascii():
+        return text.strip()
+    text = unicodedata.normalize("NFKC", text or "").translate(_DASH_TABLE)
+    return _KANJI_DIGIT_RUN_RE.sub(lambda m: m.group().translate(_KANJI_DIGIT_TABLE), text).strip()
+
+
+def _to_national_digits(text: str) -> Optional[str]:
+    """Strip separators and the +81 prefix; None if anything else remains."""
+    compact = text.replace("-", "")
+    if not compact.isdigit():
+        compact = _SEPARATOR_RE.sub("", compact)
+    if compact.startswith("+81"):
+        compact = "0" + compact[3:].removeprefix("0")
+    elif compact.startswith("81") and len(compact) in (11, 12):
+        compact = "0" + compact[2:]
+    return compact if compact.isdigit() and compact.isascii() else None
+
+
+def _longest_match(prefix: str) -> int:
+    for size in range(len(prefix), 1, -1):
+        length = AREA_CODE_LENGTHS.get(prefix[:size])
+        if length:
+            return length
+    return 4
+
+
+# 先頭 5 桁ごとに最長一致の結果を前もって引いておき、検証時は 1 回の辞書引きで済ませる（1 万件）
+_AREA_LENGTH_BY_PREFIX = {
+    prefix: _longest_match(prefix) for prefix in (f"0{n:0{_MAX_AREA_KEY - 1}d}" for n in range(10 ** (_MAX_AREA_KEY - 1)))
+}
+
+
+def _area_code_length(digits: str) -> int:
+    return _AREA_LENGTH_BY_PREFIX[digits[:_MAX_AREA_KEY]]
+
+
+# NamedTuple の生成は引数の処理が重いので、検証の途中では tuple.__new__ で直接作る
+_new_result = tuple.__new__
+
+
+def _invalid(raw: str, digits: str, reason: str) -> PhoneValidationResult:
+    return _new_result(PhoneValidationResult, (raw, digits, False, None, None, None, reason))
+
+
+def _valid(raw: str, digits: str, phone_type: PhoneType, groups: Tuple[int, int, int]) -> PhoneValidationResult:
+    first, second, _ = groups
+    formatted = f"{digits[:first]}-{digits[first:first + second]}-{digits[first + second:]}"
+    return _new_result(PhoneValidationResult, (raw, digits, True, phone_type, formatted, f"+81{digits[1:]}", None))
+
+
+@lru_cache(maxsize=1024)
+def validate_phone_number(phone: str) -> PhoneValidationResult:
+    """Validate a Japanese phone number against the numbering plan."""
+    digits = phone.replace("-", "")
+    # 半角数字とハイフンだけで 0 から始まる入力（ほとんどの場合）は正規化を省く
+    if not (digits.isdigit() and digits.isascii() and digits[0] == "0"):
+        digits = _to_national_digits(normalize_phone_text(phone))
+        if digits is None:
+            return _invalid(phone, "", "数字とハイフン以外の文字が含まれている")
+    if not digits.startswith("0") or digits.startswith("00"):
+        return _invalid(phone, digits, "先頭が 0 ではない")
+
+    special = SPECIAL_PREFIXES.get(digits[:4]) or SPECIAL_PREFIXES.get(digits[:3])
+    if special:
+        phone_type, length, groups = special
+        if len(digits) != length:
+            return _invalid(phone, digits, f"{phone_type.value}は{length}桁")
+        return _valid(phone, digits, phone_type, groups)
+
+    if digits.startswith(_NON_GEOGRAPHIC_PREFIXES):
+        return _invalid(phone, digits, "受付対象外の番号種別")
+    if len(digits) != 10:
+        return _invalid(phone, digits, "固定電話は10桁")
+
+    area_length = _area_code_length(digits)
+    # 市内局番の先頭は 2〜9
+    if digits[area_length] in "01":
+        return _invalid(phone, digits, "市内局番が不正")
+    return _valid(phone, digits, PhoneType.FIXED, (area_length, 6 - area_length, 4))
+
+
+def validate_phone_numbers(phones: Iterable[str]) -> List[PhoneValidationResult]:
+    """Validate a contact list; duplicates are served from the cache."""
+    return [validate_phone_number(str(phone)) for phone in phones]
+
+
+def is_valid_japanese_phone_number(phone: str) -> bool:
+    """Return True if the number is valid and can be called back (not free-dial / navi-dial)."""
+    result = validate_phone_number(phone)
+    return result.valid and result.phone_type in CALLBACK_TYPES
@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from src.helpers.conf_loader import JOURNAL_CONF
+from src.helpers.env_loader import WORKER_ID
+from src.helpers.logger import logger
+
+# 進行中のセッションを SQLite（WAL）に書き残し、プロセスが落ちても次の起動でログを出せるようにする。
+# チャットのターンではメモリ上の辞書に最新のスナップショットを置くだけで、
+# 書き込みは専用スレッドがまとめて行う（fsync は flush_interval ごとに最大 1 回）。
+
+
+class SessionJournal:
+    """Write-behind store of ContextMemory snapshots for sessions that have not ended yet."""
+
+    enabled = True
+
+    def __init__(self, path: str, flush_interval: float = 1.0, max_batch: int = 64, worker: str = WORKER_ID):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.worker = worker
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # コミットごとに fsync する。回数はバッチ化で抑える
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " session_id TEXT PRIMARY KEY, worker TEXT NOT NULL, updated REAL NOT NULL,"
+            " snapshot BLOB NOT NULL, extra BLOB)"
+        )
+        self._db_lock = threading.Lock()
+        self._pending: Dict[str, Optional[tuple]] = {}   # None は削除（セッション終了）
+        self._cond = threading.Condition()
+        self._closed = False
+        self.flushes = 0
+        self.rows_written = 0
+        self._thread = threading.Thread(target=self._run, name="session-journal", daemon=True)
+        self._thread.start()
+
+    def checkpoint(self, context, extra: Optional[Dict[str, Any]] = None):
+        """Queue the latest state of context; earlier queued states of the same session are replaced."""
+        if not context.session_id:
+            return
+        row = (self.worker, time.time(), orjson.dumps(context.snapshot()), orjson.dumps(extra) if extra else None)
+        with self._cond:
+            self._pending[context.session_id] = row
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify()
+
+    def finish(self, session_id: str):
+        """The session's log is written; forget it."""
+        if not session_id:
+            return
+        with self._cond:
+            self._pending[session_id] = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.max_batch:
+                    self._cond.wait(self.flush_interval)
+                batch, self._pending = self._pending, {}
+                closed = self._closed
+            if batch:
+                self._write(batch)
+            if closed:
+                return
+
+    def _write(self, batch: Dict[str, Optional[tuple]]):
+        upserts = [(sid, *row) for sid, row in batch.items() if row is not None]
+        deletes = [(sid,) for sid, row in batch.items() if row is None]
+        with self._db_lock:
+            self._write_locked(upserts, deletes)
+        self.flushes += 1
+        self.rows_written += len(batch)
+
+    def _write_locked(self, upserts: list, deletes: list):
+        try:
+            self._conn.execute("BEGIN")
+            if upserts:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO sessions (session_id, worker, updated, snapshot, extra) VALUES (?, ?, ?, ?, ?)",
+                    upserts,
+                )
+            if deletes:
+                self._conn.executemany("DELETE FROM sessions WHERE session_id = ?", deletes)
+            self._conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if self._conn.in_transaction:
+                self._conn.execute("ROLLBACK")
+            logger.error(f"セッションジャーナルの書き込みに失敗しました: {e}")
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Sessions this worker left open, oldest first (call before starting new ones)."""
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT session_id, updated, snapshot, extra FROM sessions WHERE worker = ? ORDER BY updated",
+                (self.worker,),
+            ).fetchall()
+        return [
+            {"session_id": sid, "updated": updated, "snapshot": orjson.loads(snapshot),
+             "extra": orjson.loads(extra) if extra else {}}
+            for sid, updated, snapshot, extra in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pending": len(self._pending), "flushes": self.flushes, "rows_written": self.rows_written}
+
+    def close(self):
+        """Flush what is queued and stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=10)
+        with self._db_lock:
+            self._conn.close()
+
+
+class NullSessionJournal:
+    """Used when session_journal.enabled is False."""
+
+    enabled = False
+
+    def checkpoint(self, context, extra=None):
+        pass
+
+    def finish(self, session_id):
+        pass
+
+    def unfinished(self) -> list:
+        return []
+
+    def stats(self) -> dict:
+        return {"enabled": False}
+
+    def close(self):
+        pass
+
+
+def create_session_journal(conf: Optional[Dict[str, Any]] = None):
+    conf = JOURNAL_CONF if conf is None else conf
+    if not conf.get("enabled", False):
+        return NullSessionJournal()
+    path = conf.get("path", "data/sessions.db")
+    logger.info(f"セッションジャーナル: {path}")
+    return SessionJournal(path, conf.get("flush_interval", 1.0), conf.get("max_batch", 64))
+
+
+session_journal = create_session_journal()
@@ -4,7 +4,7 @@ from pathlib import Path
 # from src.helpers.maps import BUTTON_TITLE_MAP
 from src.helpers.logger import logger
 
-def write_user_session_log(ctx):
+def write_user_session_log(ctx, note: str = None):
     """
     Write a clean log file with session info and chat memory.
     """
@@ -27,27 +27,12 @@ def write_user_session_log(ctx):
         f.write(f"来訪者氏名    : {ctx.name or '未入力'}\n")
         f.write(f"来訪目的  : {ctx.purpose or '未入力'}\n")
         f.write(f"連絡先    : {ctx.phone or '未入力'}\n")
+        if note:
+            f.write(f"備考  : {note}\n")
         f.write("\n会話ログ :\n")
 
-        previous_line = ""
-
-        for line in ctx.get_memory():
-            if "来訪者:" in line and "アバター:" in line:
-                parts = line.split("アバター:")
-                user = parts[0].replace("来訪者:", "").strip().rstrip(",")
-                avatar = parts[1].strip()
-
-                if user:
-                    user_line = f"来訪者: {user}"
-                    if user_line != previous_line:
-                        f.write(user_line + "\n")
-                        previous_line = user_line
-
-                if avatar:
-                    avatar_line = f"アバター: {avatar}"
-                    if avatar_line != previous_line:
-                        f.write(avatar_line + "\n")
-                        previous_line = avatar_line
+        for line in ctx.turns.lines():
+            f.write(line + "\n")
 
 
 def copy_image_to_log_folder(ctx):
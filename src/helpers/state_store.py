@@ -0,0 +1,173 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import orjson
+
+from src.helpers.conf_loader import DEPLOY_CONF
+from src.helpers.env_loader import STATE_STORE
+from src.helpers.logger import logger
+
+# ワーカー間で共有する状態（応対可否の返信、モード、フラグ、セッション、接続先）
+# 1 プロセスなら memory、複数ワーカーなら sqlite（WAL）を使う
+
+
+class StateStore:
+    """Namespaced key/value store for state that must be visible to every worker."""
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def pop(self, namespace: str, key: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    def incr(self, namespace: str, key: str, amount: int = 1) -> int:
+        raise NotImplementedError
+
+    def items(self, namespace: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def clear(self, namespace: Optional[str] = None):
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str):
+        self.pop(namespace, key)
+
+    def close(self):
+        pass
+
+
+class MemoryStateStore(StateStore):
+    """Single-process store backed by dicts (the previous module globals)."""
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, tuple]] = {}
+
+    def _live(self, namespace: str, key: str):
+        entry = self._data.get(namespace, {}).get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.time():
+            del self._data[namespace][key]
+            return None
+        return entry
+
+    def get(self, namespace, key, default=None):
+        entry = self._live(namespace, key)
+        return default if entry is None else entry[0]
+
+    def set(self, namespace, key, value, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        self._data.setdefault(namespace, {})[key] = (value, expires)
+
+    def pop(self, namespace, key, default=None):
+        entry = self._live(namespace, key)
+        if entry is None:
+            return default
+        del self._data[namespace][key]
+        return entry[0]
+
+    def incr(self, namespace, key, amount=1):
+        value = self.get(namespace, key, 0) + amount
+        self.set(namespace, key, value)
+        return value
+
+    def items(self, namespace):
+        return {key: self._live(namespace, key)[0] for key in list(self._data.get(namespace, {}))
+                if self._live(namespace, key) is not None}
+
+    def clear(self, namespace=None):
+        if namespace is None:
+            self._data.clear()
+        else:
+            self._data.pop(namespace, None)
+
+
+class SQLiteStateStore(StateStore):
+    """Store shared by worker processes through one SQLite file in WAL mode."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, expires REAL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+
+    def _execute(self, sql: str, params: tuple = ()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def get(self, namespace, key, default=None):
+        rows = self._execute(
+            "SELECT value FROM state WHERE namespace = ? AND key = ? AND (expires IS NULL OR expires > ?)",
+            (namespace, key, time.time()),
+        )
+        return orjson.loads(rows[0][0]) if rows else default
+
+    def set(self, namespace, key, value, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        self._execute(
+            "INSERT OR REPLACE INTO state (namespace, key, value, expires) VALUES (?, ?, ?, ?)",
+            (namespace, key, orjson.dumps(value), expires),
+        )
+
+    def pop(self, namespace, key, default=None):
+        rows = self._execute(
+            "DELETE FROM state WHERE namespace = ? AND key = ? RETURNING value, expires",
+            (namespace, key),
+        )
+        if not rows or (rows[0][1] is not None and rows[0][1] <= time.time()):
+            return default
+        return orjson.loads(rows[0][0])
+
+    def incr(self, namespace, key, amount=1):
+        # 値は JSON の数値なので、そのまま SQL で足し込める
+        rows = self._execute(
+            "INSERT INTO state (namespace, key, value, expires) VALUES (?, ?, ?, NULL)"
+            " ON CONFLICT (namespace, key) DO UPDATE SET value = CAST(CAST(value AS INTEGER) + ? AS TEXT)"
+            " RETURNING value",
+            (namespace, key, str(amount), amount),
+        )
+        return int(rows[0][0])
+
+    def items(self, namespace):
+        rows = self._execute(
+            "SELECT key, value FROM state WHERE namespace = ? AND (expires IS NULL OR expires > ?)",
+            (namespace, time.time()),
+        )
+        return {key: orjson.loads(value) for key, value in rows}
+
+    def clear(self, namespace=None):
+        if namespace is None:
+            self._execute("DELETE FROM state")
+        else:
+            self._execute("DELETE FROM state WHERE namespace = ?", (namespace,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_state_store(kind: Optional[str] = None, path: Optional[str] = None) -> StateStore:
+    kind = (kind or STATE_STORE or DEPLOY_CONF.get("state_store") or "memory").lower()
+    if kind == "sqlite":
+        path = path or DEPLOY_CONF.get("state_db", "data/state.db")
+        logger.info(f"状態ストア: sqlite ({path})")
+        return SQLiteStateStore(path)
+    if kind != "memory":
+        logger.warning(f"未定義の状態ストア: {kind}。memory を使用します。")
+    return MemoryStateStore()
+
+
+state_store = create_state_store()
@@ -1,8 +1,12 @@
-phone_call_active = False
+from src.helpers.env_loader import WORKER_ID
+from src.helpers.state_store import state_store
+
+# 電話中フラグはキオスク（= ワーカー）ごと。他のキオスクの通話で無操作タイムアウトが止まらないよう WORKER_ID で分ける
+FLAGS = "flags"
+PHONE_CALL_ACTIVE = f"phone_call_active/{WORKER_ID}"
 
 def set_phone_call_active(value: bool):
-    global phone_call_active
-    phone_call_active = value
+    state_store.set(FLAGS, PHONE_CALL_ACTIVE, bool(value))
 
 def get_phone_call_active() -> bool:
-    return phone_call_active
\ No newline at end of file
+    return state_store.get(FLAGS, PHONE_CALL_ACTIVE, False)
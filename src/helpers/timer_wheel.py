@@ -0,0 +1,102 @@
+import asyncio
+from typing import Callable, List, Optional, Set
+
+from src.helpers.logger import logger
+
+# 接続ごとの wait_for の代わりに、1 本のティックで多数のタイマーをまとめて管理するタイマーホイール
+
+
+class TimerHandle:
+    """A timer scheduled on a TimerWheel; cancel() and reset() are O(1)."""
+
+    __slots__ = ("_wheel", "callback", "delay", "rounds", "slot", "cancelled")
+
+    def __init__(self, wheel: "TimerWheel", callback: Callable[[], None], delay: float):
+        self._wheel = wheel
+        self.callback = callback
+        self.delay = delay
+        self.rounds = 0
+        self.slot: Optional[int] = None
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        self._wheel._remove(self)
+
+    def reset(self, delay: Optional[float] = None):
+        """Restart the countdown (e.g. on activity) without allocating a new timer."""
+        if delay is not None:
+            self.delay = delay
+        self.cancelled = False
+        self._wheel._remove(self)
+        self._wheel._insert(self)
+
+
+class TimerWheel:
+    """Hashed timer wheel with a fixed tick; resolution is one tick."""
+
+    def __init__(self, tick: float = 1.0, slots: int = 512):
+        self.tick = tick
+        self._slots: List[Set[TimerHandle]] = [set() for _ in range(slots)]
+        self._cursor = 0
+        self._count = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> TimerHandle:
+        """Run callback (a plain function) after about `delay` seconds."""
+        handle = TimerHandle(self, callback, delay)
+        self._insert(handle)
+        return handle
+
+    def _insert(self, handle: TimerHandle):
+        ticks = max(1, round(handle.delay / self.tick))
+        handle.rounds, offset = divmod(ticks, len(self._slots))
+        if offset == 0:
+            handle.rounds -= 1
+            offset = len(self._slots)
+        handle.slot = (self._cursor + offset) % len(self._slots)
+        self._slots[handle.slot].add(handle)
+        self._count += 1
+        self._ensure_running()
+
+    def _remove(self, handle: TimerHandle):
+        if handle.slot is not None:
+            self._slots[handle.slot].discard(handle)
+            handle.slot = None
+            self._count -= 1
+
+    def _ensure_running(self):
+        if self._timer is None:
+            self._loop = asyncio.get_running_loop()
+            self._timer = self._loop.call_later(self.tick, self._advance)
+
+    def _advance(self):
+        self._timer = None
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        bucket = self._slots[self._cursor]
+        expired = [h for h in bucket if h.rounds == 0]
+        for handle in bucket:
+            handle.rounds -= 1
+        for handle in expired:
+            self._remove(handle)
+            try:
+                handle.callback()
+            except Exception as e:
+                logger.error(f"タイマー処理でエラー: {e}")
+        if self._count:
+            self._timer = self._loop.call_later(self.tick, self._advance)
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for bucket in self._slots:
+            bucket.clear()
+        self._count = 0
+
+
+timer_wheel = TimerWheel()
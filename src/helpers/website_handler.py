@@ -1,5 +1,7 @@
 import time
 import asyncio
+import threading
+from concurrent.futures import Future
 from selenium import webdriver
 from selenium.webdriver.edge.options import Options
 from selenium.webdriver.edge.service import Service as EdgeService
@@ -17,7 +19,18 @@ edge_driver_path = "msedgedriver.exe"
 
 async def handle_phonecall_action():
     loop = asyncio.get_running_loop()
-    await asyncio.to_thread(open_selenium_browser, loop)
+    # 通話中ずっとブラウザを見張るので、プールではなく専用スレッドで動かす
+    # （io プールのスレッドを握ったままだと、終了時の executors.shutdown(wait=True) が通話終了まで戻らない）
+    done: Future = Future()
+
+    def run():
+        try:
+            done.set_result(open_selenium_browser(loop))
+        except BaseException as e:
+            done.set_exception(e)
+
+    threading.Thread(target=run, name="phonecall", daemon=True).start()
+    await asyncio.wrap_future(done)
 
 def open_selenium_browser(loop):
     logger.info("Handling phone call action...")
@@ -1,73 +1,81 @@
 import json
-import re
 from typing import Optional, Tuple
 
 from src.helpers.logger import logger
-from src.llm.info_extractor import (
-    gyosha_name_purpose_chain,
-    name_chain,
-    name_purpose_chain,
-    phone_chain,
+from src.helpers.phone_validator import is_valid_japanese_phone_number
+from src.agent.conversation_state import ConversationState
+from src.llm.info_extractor import get_gyosha_name_purpose_chain
+from src.llm.rule_extractor import (
+    has_self_introduction,
+    parse_name,
+    parse_phone,
+    parse_purpose,
+    record_path,
 )
-from src.llm.summarizer import search_query_chain
+from src.llm.structured_extractor import extract_visitor_utterance
+from src.llm.summarizer import get_search_query_chain
 
 
-async def extract_name_purpose(user_input: str) -> Tuple[Optional[str], Optional[str]]:
-    response = await name_purpose_chain.ainvoke({"response": user_input})
+# state は来訪者に今たずねている段階（ContextMemory.conversation_state）。同じ段階の同じ発話なら
+# 名前・目的・電話番号のどれを読んでも LLM 呼び出しは 1 回で済む
 
-    raw_content = response.content.strip()
-    logger.debug(f"抽出されたLLM出力: {raw_content}")
-
-    try:
-        extracted = json.loads(raw_content)
-
-        if isinstance(extracted, list) and len(extracted) == 2:
-            name = extracted[0] if extracted[0] not in [None, "null", ""] else None
-            purpose = extracted[1] if extracted[1] not in [None, "null", ""] else None
-            return name, purpose
-        else:
-            raise ValueError("Unexpected list structure")
+async def extract_name_purpose(
+    user_input: str, state: str = ConversationState.GATHER_USER_INFO
+) -> Tuple[Optional[str], Optional[str]]:
+    name_rule, purpose_rule = parse_name(user_input), parse_purpose(user_input)
+    # 自己紹介だけの発話、または名乗りのない特例キーワードの発話は LLM を呼ばない
+    if name_rule.confident or (purpose_rule.confident and not has_self_introduction(user_input)):
+        record_path("name_purpose", "rule")
+        logger.debug(f"ルール抽出: {name_rule.value}, {purpose_rule.value}")
+        return name_rule.value, purpose_rule.value
 
-    except Exception as e:
-        logger.error(f"LLM Name & Purpose Extraction error: {e}")
-        return None, None
+    record_path("name_purpose", "llm")
+    extracted = await extract_visitor_utterance(user_input, state)
+    # 特例（睡蓮墓地・樹木葬）は LLM の要約より優先し、一般ルールは LLM が目的を返さなかったときだけ使う
+    purpose = purpose_rule.value if purpose_rule.confident else (_clean(extracted.purpose) or purpose_rule.value)
+    return _clean(extracted.name), purpose
 
 
-async def extract_name(user_input: str) -> Optional[str]:
+async def extract_name(user_input: str, state: str = ConversationState.GATHER_USER_INFO) -> Optional[str]:
     """Extract only the name from user input."""
-    try:
-        result = await name_chain.ainvoke({"response": user_input})
-        name = result.content.strip().strip('"').strip("'")
-        return None if name.lower() == "null" else name
-    except Exception as e:
-        logger.error(f"LLM Name Extraction error: {e}")
-        return None
+    rule = parse_name(user_input)
+    if rule.confident:
+        record_path("name", "rule")
+        return rule.value
 
+    record_path("name", "llm")
+    extracted = await extract_visitor_utterance(user_input, state)
+    return _clean(extracted.name)
 
-async def extract_phone(user_input: str) -> Optional[str]:
+
+async def extract_phone(user_input: str, state: str = ConversationState.GATHER_USER_INFO) -> Optional[str]:
     """Extract only the phone number from user input."""
-    try:
-        result = await phone_chain.ainvoke({"response": user_input})
-        phone = result.content.strip().strip('"').strip("'")
+    rule = parse_phone(user_input)
+    if rule.confident:
+        record_path("phone", "rule")
+        phone = rule.value
+    else:
+        record_path("phone", "llm")
+        extracted = await extract_visitor_utterance(user_input, state)
+        phone = _clean(extracted.phone)
         logger.debug(f"抽出されたLLM出力: {phone}")
-        if phone.lower() == "null":
+        if phone is None:
             return None
-        else:
-            is_valid = await is_valid_japanese_phone_number(phone)
-            if not is_valid:
-                logger.error(f"Invalid phone number format: {phone}")
-                return "wrongformat"
-            else:
-                return phone
-    except Exception as e:
-        logger.error(f"LLM Phone Extraction error: {e}")
-        return None
+
+    if not is_valid_japanese_phone_number(phone):
+        logger.error(f"Invalid phone number format: {phone}")
+        return "wrongformat"
+    return phone
+
+
+def _clean(value: Optional[str]) -> Optional[str]:
+    return None if value in (None, "", "null") else value
 
 
 async def extract_gyosha_name_purpose(
     user_input: str,
 ) -> Tuple[Optional[str], Optional[str]]:
-    response = await gyosha_name_purpose_chain.ainvoke({"response": user_input})
+    response = await get_gyosha_name_purpose_chain().ainvoke({"response": user_input})
 
     raw_content = response.content.strip()
     logger.debug(f"抽出されたLLM出力: {raw_content}")
@@ -87,63 +95,10 @@ async def extract_gyosha_name_purpose(
         return None, None
 
 
-async def is_valid_japanese_phone_number(phone: str) -> bool:
-
-    # 数字とハイフン以外の文字が含まれていないかチェック
-    if not re.fullmatch(r"[0-9\-]+", phone):
-        logger.debug(f"数字とハイフン以外の文字が含まれている: {phone}")
-        return False
-
-    # ハイフンを除去して、10桁または11桁の数字かチェック
-    raw = phone.replace("-", "")
-    if not re.fullmatch(r"\d{10,11}", raw):
-        logger.debug(f"10桁または11桁ではない: {raw}")  # Debugging output
-        return False
-
-    # 日本の携帯・固定電話番号を想定（例：090-1234-5678, 03-1234-5678, 08012345678）
-    # 電話番号パターンをまとめて定義
-    # 携帯電話（070, 080, 090）: 11桁
-    if re.fullmatch(r"0[789]0\d{8}", raw):
-        logger.debug(f"携帯電話（070, 080, 090）: 11桁: {raw}")
-        return True
-
-    # IP電話（050）: 11桁
-    if re.fullmatch(r"050\d{8}", raw):
-        logger.debug(f"IP電話（050）: 11桁: {raw}")
-        return True
-
-    # 固定電話（03, 06: 2桁市外局番+8桁, 他: 3-5桁市外局番+残り）
-    # ただし、070/080/090で始まる10桁は携帯番号なので除外、0120はフリーダイヤルなので除く
-    if len(raw) == 10 and not raw.startswith(("070", "080", "090", "0120")):
-        # 03, 06: 2桁市外局番＋8桁
-        if re.fullmatch(r"0[36]\d{8}", raw):
-            logger.debug(f"03, 06: 2桁市外局番＋8桁: {raw}")
-            return True
-
-        # 3桁市外局番（例：011, 045, 052, 075, 092, 095, 098）+7桁
-        if re.fullmatch(r"0\d{2}\d{7}", raw):
-            logger.debug(
-                f"3桁市外局番（例：011, 045, 052, 075, 092, 095, 098）+7桁: {raw}"
-            )
-            return True
-
-        # 4桁市外局番（例：0123, 0994など）+6桁
-        if re.fullmatch(r"0\d{3}\d{6}", raw):
-            logger.debug(f"4桁市外局番（例：0123, 0994など）+6桁: {raw}")
-            return True
-
-        # 5桁市外局番（例：09969など）+5桁
-        if re.fullmatch(r"0\d{4}\d{5}", raw):
-            logger.debug(f"5桁市外局番（例：09969など）+5桁: {raw}")
-            return True
-
-    return False
-
-
 async def generate_search_query(user_input: str):
     """Generate a concise search query from user input."""
     try:
-        result = await search_query_chain.ainvoke({"question": user_input})
+        result = await get_search_query_chain().ainvoke({"question": user_input})
         query = result.content.strip().strip('"').strip("'")
         return query
     except Exception as e:
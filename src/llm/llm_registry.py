@@ -0,0 +1,231 @@
+import asyncio
+import json
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+from src.helpers.conf_loader import MODELS_CONF
+from src.helpers.env_loader import LLM_TRANSPORT, OPENAI_API_KEY, OPENAI_BASE_URL
+from src.helpers.logger import logger
+from src.llm.offline_openai import OfflineOpenAITransport, RecordingTransport
+
+# ChatOpenAI インスタンスと HTTP 接続をプロセス全体で共有するレジストリ
+
+
+@dataclass(frozen=True)
+class LLMTier:
+    """Model and call policy for one class of task (classification, agent, ...)."""
+
+    name: str
+    model: str
+    max_concurrency: int = 8
+    max_retries: int = 2
+    timeout: float = 30.0
+
+
+def _load_tiers() -> Dict[str, LLMTier]:
+    default_model = MODELS_CONF["llm"]["version"]
+    tiers = {}
+    for name, conf in (MODELS_CONF.get("tiers") or {}).items():
+        conf = conf or {}
+        tiers[name] = LLMTier(
+            name=name,
+            model=conf.get("version", default_model),
+            max_concurrency=conf.get("max_concurrency", 8),
+            max_retries=conf.get("max_retries", 2),
+            timeout=conf.get("timeout", 30.0),
+        )
+    tiers.setdefault("fast", LLMTier(name="fast", model=default_model))
+    tiers.setdefault("agent", LLMTier(name="agent", model=default_model))
+    return tiers
+
+
+def _transport_mode() -> str:
+    """openai / offline / record (LLM_TRANSPORT overrides model.transport)."""
+    mode = (LLM_TRANSPORT or MODELS_CONF.get("transport") or "openai").lower()
+    if mode not in ("openai", "offline", "record"):
+        logger.warning(f"未定義の LLM transport: {mode}。openai を使用します。")
+        mode = "openai"
+    return mode
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body wrapper that frees the tier slot once the body is consumed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, semaphore: asyncio.Semaphore):
+        self._stream = stream
+        self._semaphore = semaphore
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._semaphore.release()
+
+
+class _TierTransport(httpx.AsyncBaseTransport):
+    """Limits in-flight requests per tier on top of the shared connection pool."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_concurrency: int):
+        self._transport = transport
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self._semaphore.acquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        response.stream = _ReleasingStream(response.stream, self._semaphore)
+        return response
+
+    async def aclose(self):
+        # 共有トランスポートは LLMRegistry.aclose() で閉じる（ティアごとのクライアントからは閉じない）
+        pass
+
+
+class TokenUsage(BaseCallbackHandler):
+    """Running total of tokens reported by every chat call; take differences to attribute them."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.total = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def on_llm_end(self, response, **kwargs):
+        tokens = ((response.llm_output or {}).get("token_usage") or {}).get("total_tokens")
+        if tokens is None:
+            # ストリーミングなどで llm_output に入らない場合はメッセージ側を見る
+            tokens = sum(
+                (getattr(getattr(g, "message", None), "usage_metadata", None) or {}).get("total_tokens", 0)
+                for generations in response.generations for g in generations
+            )
+        with self._lock:
+            self.total += tokens or 0
+            self.calls += 1
+
+
+token_usage = TokenUsage()
+
+
+class LLMRegistry:
+    """Caches ChatOpenAI instances by (tier, temperature, streaming, functions)."""
+
+    def __init__(self, tiers: Dict[str, LLMTier], mode: str = "openai"):
+        self.tiers = tiers
+        self.mode = mode
+        offline_conf = MODELS_CONF.get("offline") or {}
+        if mode == "offline":
+            self._transport = OfflineOpenAITransport(**offline_conf)
+            self._sync_client = httpx.Client(transport=self._transport)
+            logger.info("LLM transport: offline（OpenAI API は呼びません）")
+        else:
+            self._transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60)
+            )
+            if mode == "record":
+                self._transport = RecordingTransport(self._transport, offline_conf.get("recordings"))
+            self._sync_client = httpx.Client(
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=4, keepalive_expiry=60)
+            )
+        self._api_key = OPENAI_API_KEY or ("sk-offline" if mode == "offline" else None)
+        self._async_clients: Dict[str, httpx.AsyncClient] = {}
+        self._models: Dict[Tuple, Any] = {}
+
+    def tier(self, name: str) -> LLMTier:
+        if name not in self.tiers:
+            logger.warning(f"未定義の LLM tier: {name}。fast を使用します。")
+            name = "fast"
+        return self.tiers[name]
+
+    def _async_client(self, tier: LLMTier) -> httpx.AsyncClient:
+        client = self._async_clients.get(tier.name)
+        if client is None:
+            client = httpx.AsyncClient(
+                transport=_TierTransport(self._transport, tier.max_concurrency),
+                timeout=tier.timeout,
+            )
+            self._async_clients[tier.name] = client
+        return client
+
+    def get(
+        self,
+        tier_name: str = "fast",
+        *,
+        temperature: float = 0,
+        streaming: bool = False,
+        functions: Optional[List[dict]] = None,
+    ):
+        """Return a shared chat model for the tier, optionally bound to functions."""
+        tier = self.tier(tier_name)
+        key = (tier.name, temperature, streaming)
+        llm = self._models.get(key)
+        if llm is None:
+            llm = ChatOpenAI(
+                api_key=self._api_key,
+                base_url=OPENAI_BASE_URL,
+                model=tier.model,
+                temperature=temperature,
+                streaming=streaming,
+                max_retries=tier.max_retries,
+                timeout=tier.timeout,
+                http_client=self._sync_client,
+                http_async_client=self._async_client(tier),
+                callbacks=[token_usage],
+            )
+            self._models[key] = llm
+            logger.debug(f"LLM 生成: tier={tier.name}, model={tier.model}, streaming={streaming}")
+        if not functions:
+            return llm
+
+        bound_key = key + (json.dumps(functions, sort_keys=True, ensure_ascii=False),)
+        bound = self._models.get(bound_key)
+        if bound is None:
+            bound = llm.bind(functions=functions)
+            self._models[bound_key] = bound
+        return bound
+
+    def embeddings(self, model: str) -> OpenAIEmbeddings:
+        """Shared embeddings client on the same transport as the chat models."""
+        key = ("embedding", model)
+        embedding = self._models.get(key)
+        if embedding is None:
+            embedding = OpenAIEmbeddings(
+                api_key=self._api_key,
+                base_url=OPENAI_BASE_URL,
+                model=model,
+                http_client=self._sync_client,
+                http_async_client=self._async_client(self.tier("fast")),
+                # オフラインでは tiktoken の辞書をダウンロードしないよう、文字列のまま送る
+                check_embedding_ctx_length=self.mode != "offline",
+            )
+            self._models[key] = embedding
+        return embedding
+
+    async def aclose(self):
+        for client in self._async_clients.values():
+            await client.aclose()
+        await self._transport.aclose()
+        self._sync_client.close()
+
+
+llm_registry = LLMRegistry(_load_tiers(), _transport_mode())
+
+
+def get_llm(tier: str = "fast", **kwargs):
+    """Shortcut for llm_registry.get()."""
+    return llm_registry.get(tier, **kwargs)
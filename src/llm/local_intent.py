@@ -0,0 +1,136 @@
+import json
+import math
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+from src.helpers.conf_loader import MODELS_CONF
+from src.resource_path import src_path
+
+# 「はい」「いいえ」「違います」などの短い返答を LLM を使わずに分類するローカル分類器
+
+LABELS = ("confirmation", "decline", "correction", "unknown")
+TRAINING_DATA = src_path("llm/data/intent_train.jsonl")
+CONFIDENCE_THRESHOLD = MODELS_CONF.get("local_intent", {}).get("threshold", 0.8)
+
+_STRIP_RE = re.compile(r"[\s、。,.!！?？〜~ー…]+")
+
+# 完全一致で確定する頻出の返答
+LEXICON: Dict[str, str] = {
+    "はい": "confirmation", "ええ": "confirmation", "うん": "confirmation",
+    "そうです": "confirmation", "大丈夫です": "confirmation", "お願いします": "confirmation",
+    "ok": "confirmation", "okです": "confirmation", "yes": "confirmation",
+    "いいえ": "decline", "いえ": "decline", "いや": "decline", "結構です": "decline",
+    "いらない": "decline", "いりません": "decline", "不要です": "decline", "no": "decline",
+    "違います": "correction", "ちがいます": "correction", "間違っています": "correction",
+    "修正します": "correction", "訂正します": "correction",
+}
+
+
+class IntentPrediction(NamedTuple):
+    """Predicted label, its probability and whether the LLM can be skipped."""
+
+    label: str
+    confidence: float
+    confident: bool
+
+
+def normalize_reply(text: str) -> str:
+    """NFKC, lower-case and strip punctuation/fillers from a short reply."""
+    return _STRIP_RE.sub("", unicodedata.normalize("NFKC", text or "").lower())
+
+
+def char_ngrams(text: str, sizes: Iterable[int] = (1, 2, 3)) -> List[str]:
+    padded = f"^{text}$"
+    return [padded[i:i + n] for n in sizes for i in range(len(padded) - n + 1)]
+
+
+class LocalIntentClassifier:
+    """Lexicon lookup backed by a character n-gram logistic regression."""
+
+    def __init__(self, threshold: float = CONFIDENCE_THRESHOLD):
+        self.threshold = threshold
+        self.vocabulary: Dict[str, int] = {}
+        self.weights = np.zeros((0, len(LABELS)))
+        self.bias = np.zeros(len(LABELS))
+
+    def fit(self, samples: List[Tuple[str, str]], epochs: int = 300, learning_rate: float = 10.0, l2: float = 1e-4):
+        """Train a softmax regression on (text, label) pairs with full-batch gradient descent."""
+        rows = [char_ngrams(normalize_reply(text)) for text, _ in samples]
+        for features in rows:
+            for feature in features:
+                self.vocabulary.setdefault(feature, len(self.vocabulary))
+
+        rows = [set(features) for features in rows]
+        x = np.zeros((len(rows), len(self.vocabulary)))
+        for i, features in enumerate(rows):
+            for feature in features:
+                x[i, self.vocabulary[feature]] = 1.0
+        x /= np.maximum(x.sum(axis=1, keepdims=True), 1.0) ** 0.5
+        y = np.zeros((len(samples), len(LABELS)))
+        for i, (_, label) in enumerate(samples):
+            y[i, LABELS.index(label)] = 1.0
+
+        self.weights = np.zeros((len(self.vocabulary), len(LABELS)))
+        self.bias = np.zeros(len(LABELS))
+        for _ in range(epochs):
+            logits = x @ self.weights + self.bias
+            logits -= logits.max(axis=1, keepdims=True)
+            probs = np.exp(logits)
+            probs /= probs.sum(axis=1, keepdims=True)
+            error = (probs - y) / len(samples)
+            self.weights -= learning_rate * (x.T @ error + l2 * self.weights)
+            self.bias -= learning_rate * error.sum(axis=0)
+        return self
+
+    def predict(self, text: str) -> IntentPrediction:
+        normalized = normalize_reply(text)
+        label = LEXICON.get(normalized)
+        if label:
+            return IntentPrediction(label, 1.0, True)
+        if not normalized:
+            return IntentPrediction("unknown", 1.0, False)
+
+        features = set(char_ngrams(normalized))
+        indices = [self.vocabulary[f] for f in features if f in self.vocabulary]
+        if not indices:
+            return IntentPrediction("unknown", 0.0, False)
+        logits = self.weights[indices].sum(axis=0) / math.sqrt(len(features)) + self.bias
+        probs = np.exp(logits - logits.max())
+        probs /= probs.sum()
+        best = int(probs.argmax())
+        confidence = float(probs[best])
+        # unknown は LLM に判断を任せる
+        confident = confidence >= self.threshold and LABELS[best] != "unknown"
+        return IntentPrediction(LABELS[best], confidence, confident)
+
+
+def load_samples(path) -> List[Tuple[str, str]]:
+    with open(path, "r", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["text"], row["label"]) for row in rows]
+
+
+@lru_cache(maxsize=1)
+def get_intent_classifier() -> LocalIntentClassifier:
+    """Train the classifier once from the bundled labeled replies."""
+    return LocalIntentClassifier().fit(load_samples(TRAINING_DATA))
+
+
+def classify_yesno(text: str) -> IntentPrediction:
+    """confirmation / decline view (a correction counts as a decline)."""
+    prediction = get_intent_classifier().predict(text)
+    if prediction.label == "correction":
+        return prediction._replace(label="decline")
+    return prediction
+
+
+def classify_correction(text: str) -> IntentPrediction:
+    """confirmation / correction view (a decline counts as a correction)."""
+    prediction = get_intent_classifier().predict(text)
+    if prediction.label == "decline":
+        return prediction._replace(label="correction")
+    return prediction
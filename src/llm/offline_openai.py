@@ -0,0 +1,306 @@
+import asyncio
+import hashlib
+import math
+import os
+import time
+import uuid
+from typing import Dict, Optional
+
+import httpx
+import orjson
+
+from src.helpers.conf_loader import PREFETCH_CONF
+from src.helpers.logger import logger
+
+# OpenAI API を呼ばずに応答する httpx トランスポート（ベンチマーク・CI 用）
+# model.transport: "offline" で llm_registry と RAGBuilder がこれを使う
+
+EMBEDDING_DIM = 256
+# エージェントの関数呼び出しを決めるキーワード（先行実行のルートに地図と担当者を足したもの）
+TOOL_ROUTES = {
+    **(PREFETCH_CONF.get("routes") or {}),
+    "show_map": ["地図", "マップ", "アクセス", "行き方", "map", "場所"],
+    "contact_person": ["担当者に繋", "呼んで", "取り次"],
+}
+TOOL_ARGUMENTS = {"faq_tool": "question", "support_tool": "question", "websearch": "query"}
+
+
+def hash_embedding(text: str, dim: int = EMBEDDING_DIM) -> list:
+    """Deterministic bag-of-char-bigrams vector, L2-normalized."""
+    vector = [0.0] * dim
+    padded = f"^{text}$"
+    for i in range(len(padded) - 1):
+        digest = hashlib.blake2b(padded[i:i + 2].encode("utf-8"), digest_size=4).digest()
+        vector[int.from_bytes(digest, "little") % dim] += 1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def request_key(body: dict) -> str:
+    """Stable key of a chat request (model, messages and functions) for replay."""
+    functions = body.get("functions") or [t["function"] for t in body.get("tools") or []]
+    canonical = {
+        "model": body.get("model"),
+        "messages": body.get("messages") or [],
+        "functions": sorted(f["name"] for f in functions),
+        "response_format": body.get("response_format"),
+    }
+    return hashlib.sha1(orjson.dumps(canonical, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def _message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+def _choose_tool(text: str, functions: list):
+    available = {f["name"] for f in functions}
+    lowered = text.lower()
+    for name, keywords in TOOL_ROUTES.items():
+        if name in available and any(k.lower() in lowered for k in keywords):
+            return name
+    for name in ("support_tool", "faq_tool"):
+        if name in available:
+            return name
+    return None
+
+
+def _schema_default(schema: dict):
+    """Smallest valid object for a strict json_schema response_format."""
+    result = {}
+    for name, prop in (schema.get("properties") or {}).items():
+        if "enum" in prop:
+            result[name] = "unknown" if "unknown" in prop["enum"] else prop["enum"][0]
+        else:
+            result[name] = None
+    return result
+
+
+def chat_reply(body: dict) -> dict:
+    """Rule-based assistant message for a chat completion request."""
+    messages = body.get("messages") or []
+    last = messages[-1] if messages else {}
+    content = _message_text(last)
+
+    functions = body.get("functions") or [t["function"] for t in body.get("tools") or []]
+    if functions and last.get("role") == "user":
+        tool = _choose_tool(content, functions)
+        if tool:
+            key = TOOL_ARGUMENTS.get(tool)
+            arguments = orjson.dumps({key: content} if key else {}).decode()
+            return {"role": "assistant", "content": None, "function_call": {"name": tool, "arguments": arguments}}
+
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        schema = response_format["json_schema"].get("schema") or {}
+        return {"role": "assistant", "content": orjson.dumps(_schema_default(schema)).decode()}
+
+    if last.get("role") == "function":
+        return {"role": "assistant", "content": content[:120]}
+    return {"role": "assistant", "content": "かしこまりました。"}
+
+
+def completion(body: dict, message: dict) -> dict:
+    finish = "function_call" if message.get("function_call") else "stop"
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "offline"),
+        "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def stream_chunks(body: dict, message: dict, chunk_chars: int = 8):
+    """SSE events for a streamed completion of `message`."""
+    base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion.chunk",
+            "created": int(time.time()), "model": body.get("model", "offline")}
+
+    def chunk(delta, finish=None):
+        payload = {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+        return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+    if message.get("function_call"):
+        call = message["function_call"]
+        yield chunk({"role": "assistant", "content": None, "function_call": {"name": call["name"], "arguments": ""}})
+        yield chunk({"function_call": {"arguments": call["arguments"]}})
+        yield chunk({}, "function_call")
+    else:
+        yield chunk({"role": "assistant", "content": ""})
+        text = message.get("content") or ""
+        for i in range(0, len(text), chunk_chars):
+            yield chunk({"content": text[i:i + chunk_chars]})
+        yield chunk({}, "stop")
+    yield b"data: [DONE]\n\n"
+
+
+def embeddings_response(body: dict, dim: int = EMBEDDING_DIM) -> dict:
+    inputs = body.get("input")
+    if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+        inputs = [inputs]
+    data = [
+        {"object": "embedding", "index": i,
+         "embedding": hash_embedding(item if isinstance(item, str) else " ".join(map(str, item)), dim)}
+        for i, item in enumerate(inputs or [])
+    ]
+    return {"object": "list", "data": data, "model": body.get("model", "offline"),
+            "usage": {"prompt_tokens": 0, "total_tokens": 0}}
+
+
+class Recordings:
+    """Recorded chat responses (JSONL: {"key", "match", "message"}) used before the rules."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.by_key: Dict[str, dict] = {}
+        self.by_match: Dict[str, dict] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = orjson.loads(line)
+                    if entry.get("key"):
+                        self.by_key[entry["key"]] = entry["message"]
+                    elif entry.get("match"):
+                        self.by_match[entry["match"]] = entry["message"]
+            logger.info(f"オフライン応答の録画を読み込みました: {len(self.by_key) + len(self.by_match)} 件 ({path})")
+
+    def lookup(self, body: dict) -> Optional[dict]:
+        message = self.by_key.get(request_key(body))
+        if message is not None:
+            return message
+        messages = body.get("messages") or []
+        if not self.by_match or not messages or messages[-1].get("role") != "user":
+            return None
+        text = _message_text(messages[-1])
+        for match, message in self.by_match.items():
+            if match in text:
+                return message
+        return None
+
+    def append(self, body: dict, message: dict):
+        if not self.path:
+            return
+        self.by_key[request_key(body)] = message
+        entry = {"key": request_key(body), "match": _message_text((body.get("messages") or [{}])[-1]), "message": message}
+        with open(self.path, "ab") as f:
+            f.write(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE))
+
+
+class OfflineOpenAITransport(httpx.AsyncBaseTransport, httpx.BaseTransport):
+    """Answers /chat/completions and /embeddings in-process, sync or async."""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        stream_chunk_ms: float = 0.0,
+        recordings: Optional[str] = None,
+        embedding_dim: int = EMBEDDING_DIM,
+    ):
+        self.latency_ms = latency_ms
+        self.stream_chunk_ms = stream_chunk_ms
+        self.recordings = Recordings(recordings)
+        self.embedding_dim = embedding_dim
+        self.calls = {"chat": 0, "embeddings": 0, "replayed": 0}
+
+    def reply(self, body: dict) -> dict:
+        message = self.recordings.lookup(body)
+        if message is not None:
+            self.calls["replayed"] += 1
+            return message
+        return chat_reply(body)
+
+    def _route(self, request: httpx.Request):
+        body = orjson.loads(request.content or b"{}")
+        path = request.url.path
+        if path.endswith("/chat/completions"):
+            self.calls["chat"] += 1
+            message = self.reply(body)
+            if body.get("stream"):
+                return "stream", list(stream_chunks(body, message))
+            return "json", completion(body, message)
+        if path.endswith("/embeddings"):
+            self.calls["embeddings"] += 1
+            return "json", embeddings_response(body, self.embedding_dim)
+        return "missing", {"error": {"message": f"offline transport: unsupported path {path}"}}
+
+    @staticmethod
+    def _response(request: httpx.Request, kind: str, payload, stream=None) -> httpx.Response:
+        if kind == "stream":
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=stream, request=request)
+        status = 404 if kind == "missing" else 200
+        return httpx.Response(status, headers={"content-type": "application/json"},
+                              content=orjson.dumps(payload), request=request)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        kind, payload = self._route(request)
+        stream = _AsyncChunks(payload, self.stream_chunk_ms) if kind == "stream" else None
+        return self._response(request, kind, payload, stream)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        kind, payload = self._route(request)
+        stream = _SyncChunks(payload, self.stream_chunk_ms) if kind == "stream" else None
+        return self._response(request, kind, payload, stream)
+
+
+class _AsyncChunks(httpx.AsyncByteStream):
+    def __init__(self, chunks: list, delay_ms: float):
+        self._chunks = chunks
+        self._delay = delay_ms / 1000
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            if self._delay:
+                await asyncio.sleep(self._delay)
+            yield chunk
+
+
+class _SyncChunks(httpx.SyncByteStream):
+    def __init__(self, chunks: list, delay_ms: float):
+        self._chunks = chunks
+        self._delay = delay_ms / 1000
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            if self._delay:
+                time.sleep(self._delay)
+            yield chunk
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests to OpenAI and appends non-streamed chat replies to a recordings file."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, path: str):
+        self._transport = transport
+        self._recordings = Recordings(path)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        response = await self._transport.handle_async_request(request)
+        if not request.url.path.endswith("/chat/completions"):
+            return response
+        body = orjson.loads(request.content or b"{}")
+        if body.get("stream") or response.status_code != 200:
+            return response
+        raw = b"".join([chunk async for chunk in response.stream])
+        await response.stream.aclose()
+        replay = httpx.Response(response.status_code, headers=response.headers, content=raw, request=request)
+        try:
+            # content-encoding の展開は httpx.Response に任せる
+            self._recordings.append(body, orjson.loads(replay.read())["choices"][0]["message"])
+        except (KeyError, IndexError, orjson.JSONDecodeError) as e:
+            logger.warning(f"応答を録画できませんでした: {e}")
+        return httpx.Response(response.status_code, headers=response.headers, content=raw, request=request)
+
+    async def aclose(self):
+        await self._transport.aclose()
@@ -0,0 +1,61 @@
+import re
+from typing import Optional
+
+from langchain.prompts import PromptTemplate
+
+from src.helpers.conf_loader import RAG_CONF
+from src.llm.llm_registry import get_llm
+
+# FAQ 検索結果からエージェントを介さずに最終回答を作る（LLM 往復を 1 回に減らす）
+
+
+def direct_answer_conf() -> dict:
+    """rag.direct_answer, read on each call so /config/reload takes effect."""
+    return RAG_CONF.get("direct_answer") or {}
+
+
+_SENTENCE_END_RE = re.compile(r"(?<=[。！？!?])")
+
+rag_answer_prompt = PromptTemplate(
+    input_variables=["question", "context", "language", "max_chars"],
+    template="""
+あなたは受付の案内係です。以下の参考情報だけを使って、質問に答えてください。
+- 回答言語: {language}
+- {max_chars}文字程度以内で、丁寧に簡潔に答える。
+- 参考情報に答えがない場合は、推測せず「申し訳ありませんが、その情報はお答えできません。」という意味の文を回答言語で返す。
+- 回答文だけを出力する。
+
+参考情報:
+{context}
+
+質問: {question}
+"""
+)
+
+
+def condense_answer(text: str, max_chars: Optional[int] = None) -> str:
+    """Trim an FAQ answer to whole sentences within max_chars (first sentence at least)."""
+    if max_chars is None:
+        max_chars = direct_answer_conf().get("max_chars", 100)
+    text = text.strip()
+    if len(text) <= max_chars:
+        return text
+    condensed = ""
+    for sentence in _SENTENCE_END_RE.split(text):
+        if not sentence:
+            continue
+        if condensed and len(condensed) + len(sentence) > max_chars:
+            break
+        condensed += sentence
+    return condensed
+
+
+async def answer_from_passages(question: str, passages: str, language: str) -> str:
+    """One constrained LLM call that turns retrieved passages into the final answer."""
+    conf = direct_answer_conf()
+    # 上限は呼び出しごとに読む（/config/reload で変えられるように）。モデル自体は共有のものを使う
+    chain = rag_answer_prompt | get_llm("fast").bind(max_tokens=conf.get("max_tokens", 200))
+    result = await chain.ainvoke(
+        {"question": question, "context": passages, "language": language, "max_chars": conf.get("max_chars", 100)}
+    )
+    return result.content.strip()
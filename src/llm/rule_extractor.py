@@ -0,0 +1,170 @@
+import re
+import unicodedata
+from collections import Counter
+from typing import NamedTuple, Optional, Tuple
+
+from src.helpers.phone_validator import normalize_phone_text
+
+# ルールベース抽出: LLM を呼ぶ前に決定的なパーサーで抽出を試みる
+
+_PHONE_CANDIDATE_RE = re.compile(r"(?<!\d)(?:\+81|0)[\d\-\s()]{3,16}\d")
+_DIGIT_RE = re.compile(r"\d")
+_NON_DIGIT_RE = re.compile(r"\D")
+# 電話番号以外に残っていても確信度を下げない語
+_PHONE_FILLER_RE = re.compile(
+    r"^[\s、。,.!！\-はいえっとあの]*(?:電話番号|連絡先|番号|携帯)?(?:は|が)?[\s、。,.]*$"
+)
+_PHONE_TRAILER_RE = re.compile(r"^[\s、。,.]*(?:です|になります|でお願いします|へお願いします)?[\s、。,.!！]*$")
+
+_NAME_PATTERN_RE = re.compile(
+    r"^(?:はい[、,\s]*)?(?:えっと[、,\s]*|あの[、,\s]*)?(?:私は|わたしは|僕は|こちらは)?"
+    r"(?P<name>[^\s、。,.!?！？「」]{1,20}?)"
+    r"(?P<suffix>と申します|と申す者です|といいます|と言います|になります|です)"
+    r"[\s、。,.!！]*$"
+)
+_SELF_INTRO_RE = re.compile(r"申します|申す者|といいます|と言います|です|でございます|の者")
+# 名乗りとしか読めない言い回し。「です」「になります」は名前以外にも付くので姓の確認が要る
+_INTRO_SUFFIXES = ("と申します", "と申す者です", "といいます", "と言います")
+# 名前（又は「会社名の名前」）に使える文字: 漢字・カタカナと、会社名との区切りの「の」
+_NAME_CHARS_RE = re.compile(r"^[\u4e00-\u9fff々〆ヶァ-ヺー・]+(?:の[\u4e00-\u9fff々〆ヶァ-ヺー・]+)?$")
+_GIVEN_NAME_RE = re.compile(r"^[\u4e00-\u9fff々ァ-ヺー]{0,3}$")
+# 「です」だけの名乗りを LLM なしで受け入れる姓（多い順の上位）
+_COMMON_SURNAMES = frozenset((
+    "佐藤", "鈴木", "高橋", "田中", "伊藤", "渡辺", "山本", "中村", "小林", "加藤", "吉田", "山田",
+    "佐々木", "山口", "松本", "井上", "木村", "林", "斎藤", "清水", "山崎", "森", "池田", "橋本",
+    "阿部", "石川", "山下", "中島", "石井", "小川", "前田", "岡田", "長谷川", "藤田", "後藤", "近藤",
+    "村上", "遠藤", "青木", "坂本", "斉藤", "福田", "太田", "西村", "藤井", "金子", "岡本", "藤原",
+    "中野", "三浦", "原田", "中川", "松田", "竹内", "小野", "田村", "中山", "和田", "石田", "森田",
+    "上田", "原", "柴田", "酒井", "工藤", "横山", "宮崎", "宮本", "内田", "高木", "安藤", "島田",
+    "谷口", "大野", "高田", "丸山", "今井", "河野", "藤本", "村田", "武田", "上野", "杉山", "増田",
+    "小山", "大塚", "平野", "菅原", "久保", "松井", "千葉", "岩崎", "桜井", "木下", "野口", "松尾",
+    "菊地", "野村", "新井", "渡部", "佐野", "大西", "杉本", "吉川", "山内", "西田", "菊池",
+))
+# 名前として扱わない語（name_prompt の禁止語 + よくある応答）
+_NAME_STOPWORDS = (
+    "法事", "法要", "相談", "住職", "面会", "お参り", "用事", "話", "配達", "宅配",
+    "点検", "修理", "工事", "作業", "予約", "大丈夫", "結構", "以上", "不要", "必要",
+    "本人", "電話", "番号", "連絡", "お墓", "墓地", "供養", "樹木葬", "ペット",
+)
+
+# name_purpose_prompt の特例ルール。LLM の要約より優先する（上から優先）
+PURPOSE_OVERRIDE_RULES: Tuple[Tuple[Tuple[str, ...], str], ...] = (
+    (("睡蓮墓地",), "睡蓮墓地のご相談"),
+    (("樹木葬",), "樹木葬墓地のご相談"),
+)
+# 一般ルール。「お墓参り」のように別の用件もあるので、LLM が目的を返さなかったときだけ使う
+PURPOSE_FALLBACK_RULES: Tuple[Tuple[Tuple[str, ...], str], ...] = (
+    (("ペット",), "ペット供養"),
+    (("お焚き上げ", "お焚上げ"), "お焚き上げ"),
+    (("墓地", "お墓"), "墓地のご相談"),
+)
+PURPOSE_KEYWORD_RULES = PURPOSE_OVERRIDE_RULES + PURPOSE_FALLBACK_RULES
+# キーワードを含むが別の意味になる語。照合の前に取り除く（「ペットボトル」は「ペット」ではない）
+_PURPOSE_EXCLUDE_RE = re.compile(r"ペットボトル|ペットショップ")
+
+extraction_stats: Counter = Counter()
+
+
+class RuleResult(NamedTuple):
+    """Result of a deterministic parser and whether it is safe to skip the LLM."""
+
+    value: Optional[str]
+    confident: bool
+
+
+def normalize_text(text: str) -> str:
+    """Normalize full-width digits and letters to their ASCII forms."""
+    return unicodedata.normalize("NFKC", text or "").strip()
+
+
+def parse_phone(user_input: str) -> RuleResult:
+    """Find a phone number candidate and return its digits.
+
+    Confident only when the utterance is essentially just the number, so that
+    sentences with several numbers or spoken digits go to the LLM.
+    """
+    text = normalize_phone_text(user_input)
+    if not _DIGIT_RE.search(text):
+        return RuleResult(None, False)
+
+    matches = list(_PHONE_CANDIDATE_RE.finditer(text))
+    if len(matches) != 1:
+        return RuleResult(None, False)
+
+    match = matches[0]
+    digits = _NON_DIGIT_RE.sub("", match.group())
+    if match.group().startswith("+81"):
+        digits = "0" + digits[2:]
+
+    head, tail = text[: match.start()], text[match.end():]
+    confident = bool(_PHONE_FILLER_RE.match(head) and _PHONE_TRAILER_RE.match(tail))
+    return RuleResult(digits, confident)
+
+
+def _is_common_surname(name: str) -> bool:
+    # 会社名が付いていれば「の」の後ろの人名だけを見る。1 文字の姓（林・森・原）は完全一致のみ
+    person = name.rsplit("の", 1)[-1]
+    return any(
+        person == surname or (len(surname) > 1 and person.startswith(surname)
+                              and _GIVEN_NAME_RE.match(person[len(surname):]))
+        for surname in _COMMON_SURNAMES
+    )
+
+
+def parse_name(user_input: str) -> RuleResult:
+    """Extract a name from 「〜です」「〜と申します」 style self introductions.
+
+    Confident only for 「と申します」-style suffixes or a common surname; other
+    candidates are returned unconfirmed so the caller asks the LLM.
+    """
+    text = normalize_text(user_input)
+    match = _NAME_PATTERN_RE.match(text)
+    if not match:
+        return RuleResult(None, False)
+
+    name = match.group("name").removesuffix("様").removesuffix("さん")
+    if not name or any(word in name for word in _NAME_STOPWORDS):
+        return RuleResult(None, False)
+
+    # 数字・英字・記号・ひらがな（会社名の「の」は除く）を含む「了解です」「OKです」「3人です」などは名前ではない
+    if not _NAME_CHARS_RE.match(name):
+        return RuleResult(None, False)
+    if match.group("suffix") in _INTRO_SUFFIXES or _is_common_surname(name):
+        return RuleResult(name, True)
+    return RuleResult(name, False)
+
+
+def has_self_introduction(user_input: str) -> bool:
+    """Return True when the utterance may contain a name the rules did not catch."""
+    return bool(_SELF_INTRO_RE.search(normalize_text(user_input)))
+
+
+def parse_purpose(user_input: str) -> RuleResult:
+    """Apply the purpose keyword rules from name_purpose_prompt.
+
+    Confident only for the overriding special cases; a general-rule match is
+    returned unconfirmed, as a fallback for when the LLM gives no purpose.
+    """
+    text = _PURPOSE_EXCLUDE_RE.sub("", normalize_text(user_input))
+    for rules, confident in ((PURPOSE_OVERRIDE_RULES, True), (PURPOSE_FALLBACK_RULES, False)):
+        for keywords, purpose in rules:
+            if any(keyword in text for keyword in keywords):
+                return RuleResult(purpose, confident)
+    return RuleResult(None, False)
+
+
+def record_path(field: str, path: str):
+    """Count which path (rule / llm) produced an extraction."""
+    extraction_stats[f"{field}.{path}"] += 1
+
+
+def get_extraction_stats() -> dict:
+    """Return per-field counts and the share handled without an LLM call."""
+    report = {}
+    for key, count in extraction_stats.items():
+        field, path = key.split(".", 1)
+        report.setdefault(field, {"rule": 0, "llm": 0})[path] = count
+    for counts in report.values():
+        total = counts["rule"] + counts["llm"]
+        counts["rule_ratio"] = round(counts["rule"] / total, 3) if total else 0.0
+    return report
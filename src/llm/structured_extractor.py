@@ -0,0 +1,127 @@
+import asyncio
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Literal, Optional, Tuple
+
+from langchain.prompts import PromptTemplate
+from pydantic import BaseModel, Field
+
+from src.agent.conversation_state import ConversationState
+from src.helpers.logger import logger
+from src.llm.llm_registry import get_llm
+
+
+class VisitorUtterance(BaseModel):
+    """Everything the contact workflows need from one visitor utterance."""
+
+    name: Optional[str] = Field(description="名前 又は「会社名 + 名前」。含まれていなければ null")
+    purpose: Optional[str] = Field(description="訪問目的の短い要約。含まれていなければ null")
+    phone: Optional[str] = Field(description="電話番号（数字とハイフンのみ）。含まれていなければ null")
+    intent: Literal["confirmation", "decline", "correction", "unknown"] = Field(
+        description="直前の確認に対する意図"
+    )
+
+
+EMPTY_UTTERANCE = VisitorUtterance(name=None, purpose=None, phone=None, intent="unknown")
+
+# セッションの段階（ContextMemory.conversation_state）ごとに来訪者へたずねている内容。
+# 同じ発話でも聞いている内容で答えが変わるのでプロンプトに入れ、キャッシュも段階ごとに分ける。
+# 読む項目（名前・目的・電話番号・意図）はキーに含めないので、1 ターンで何を読んでも LLM 呼び出しは 1 回
+ASKING = {
+    ConversationState.GATHER_USER_INFO: "お名前とご用件（電話番号を添えることもある）",
+    ConversationState.CONFIRM_USER_INFO: "表示した内容でよいか（はい／いいえ／修正したい）",
+    ConversationState.CHECK_LINE_AVAILABILITY: "担当者の返事を待つかどうか（はい／いいえ）",
+    ConversationState.DECIDE_CONTACT_WAY: "担当者への連絡方法（はい／いいえ）",
+    ConversationState.SEND_DENGON: "担当者への伝言",
+    ConversationState.GATHER_CONTACT_INFO: "折り返しの電話番号",
+}
+
+# 名前・目的・電話番号・意図をまとめて抽出するプロンプト（旧 name_purpose / name / phone / intent / correction の規則をまとめたもの）
+visitor_utterance_prompt = PromptTemplate(
+    input_variables=["response", "asking"],
+    template="""
+あなたは寺の受付で、来訪者の発言から情報を抽出するアシスタントです。該当しない項目は null にしてください。
+今、来訪者には「{asking}」をたずねています。名前と目的を混同しないでください。
+
+### name（名前）
+- 日本人の人名（姓・名）又は「会社名 + 名前」。カタカナ・ひらがな・漢字に対応。
+  例:「ミヤット」「田中」「山田太郎」「ステラリンクの山田」「石材店の松本」
+- 「〜です」「〜と申します」「〜といいます」「〜になります」などの言い回しは除き、名前の部分だけを取り出す。
+- 「法事」「相談」「住職」「面会」「お参り」「用事」「話」など、目的・職業・行為・宗教に関する語は絶対に名前にしない。
+- 「誰かいますか」と聞かれたときの「住職」は名前ではない。
+
+### purpose（訪問目的）
+- できる限り原文の意味を保った短いフレーズにする（例:「法事の相談したいです」→「法事の相談」）。
+  「相談」「話」のような抽象的すぎる語に縮めない。
+- 目的が省略されていても意図がある発話は要約する。「住職いますか？」「誰かいますか？」「どなたかいらっしゃいますか？」→「住職への面会」
+- 「法事」「法要」「三回忌の法要」など法要に関する語は明確に目的として抽出する。
+- ペットの葬儀や供養に関する発言 →「ペット供養」。お墓・墓地に関する発言 →「墓地のご相談」。
+- 特例（一般ルールより優先）:「睡蓮墓地」→「睡蓮墓地のご相談」、「樹木葬」「樹木葬墓地」→「樹木葬墓地のご相談」
+- 例:
+  - 「お供え物を持ってきました」→「お供え物の渡し」
+  - 「お付け届け物を持ってきました。住職いらっしゃいますか？」→「お付け届け物の渡しと面会」
+  - 「三回忌の法要について相談したいのですが」→「三回忌の法要の相談」
+  - 「ペットの火葬をお願いしたい」→「ペット供養」
+  - 「墓地の購入について相談があります」→「墓地のご相談」
+  - 「睡蓮墓地の購入について相談があります」→「睡蓮墓地のご相談」
+  - 「樹木葬について教えてください」→「樹木葬墓地のご相談」
+  - 「お焚き上げをしたいです」→「お焚き上げ」
+
+### phone（電話番号）
+- 数字だけで返す（例: "09012345678"）。電話番号が無ければ null。
+
+### intent（たずねた内容への答え）
+- confirmation: 同意・確認・進めてよい。例:「はい」「大丈夫です」「承認します」「OKです」「いいですよ」「その通りです」「はい、正しいです」「はい、間違いありません」
+- decline: 断る・不要。例:「いいえ」「違います」「やめます」「だめです」「いらない」「ふようです」
+- correction: 修正・変更したい。例:「修正したいです」「訂正します」「変更します」「いいえ、間違っています」
+- unknown: 判断できない。
+- 名前や電話番号を答えているだけの発言は unknown にする。
+
+ユーザーの発言: "{response}"
+"""
+)
+
+
+@lru_cache(maxsize=1)
+def get_visitor_utterance_chain():
+    """Build the chain on first use, so importing this module does not need an API key."""
+    return visitor_utterance_prompt | get_llm("fast").with_structured_output(
+        VisitorUtterance, method="json_schema", strict=True
+    )
+
+
+_CACHE_SIZE = 64
+# 同じ段階の同じ発話は 1 回の LLM 往復を共有する（実行中のものも含む）
+_results: "OrderedDict[Tuple[str, str], asyncio.Future]" = OrderedDict()
+
+
+async def _invoke(key: Tuple[str, str]) -> VisitorUtterance:
+    state, user_input = key
+    try:
+        return await get_visitor_utterance_chain().ainvoke({"response": user_input, "asking": ASKING[state]})
+    except Exception as e:
+        logger.error(f"LLM Structured Extraction error: {e}")
+        _results.pop(key, None)
+        return EMPTY_UTTERANCE
+
+
+async def extract_visitor_utterance(user_input: str, state: str) -> VisitorUtterance:
+    """Extract name, purpose, phone and intent from one utterance in a single call.
+
+    state is the session's conversation_state (what the visitor was asked); results are
+    cached per (state, utterance), so every field read in that turn shares the call.
+    """
+    if state not in ASKING:
+        raise ValueError(f"unknown conversation state: {state}")
+    key = (state, user_input)
+    future = _results.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_invoke(key))
+        _results[key] = future
+        while len(_results) > _CACHE_SIZE:
+            _results.popitem(last=False)
+    else:
+        _results.move_to_end(key)
+    result = await asyncio.shield(future)
+    logger.debug(f"構造化抽出結果: {result}")
+    return result
@@ -1,8 +1,8 @@
+from functools import lru_cache
+
 from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
 
-from src.helpers.conf_loader import MODELS_CONF
-from src.helpers.env_loader import OPENAI_API_KEY
+from src.llm.llm_registry import get_llm
 
 summarizer_prompt = PromptTemplate(
     template=(
@@ -14,7 +14,8 @@ summarizer_prompt = PromptTemplate(
 )
 
 
-llm = ChatOpenAI(
-    api_key=OPENAI_API_KEY, temperature=0, model=MODELS_CONF["llm"]["version"]
-)
-search_query_chain = summarizer_prompt | llm
+@lru_cache(maxsize=1)
+def get_search_query_chain():
+    """Build the chain on first use, so importing this module does not need an API key."""
+    return summarizer_prompt | get_llm("fast")
+
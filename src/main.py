@@ -2,16 +2,24 @@ from src.agent.agent_manager import AgentManager
 from src.agent.prompt_manager import PromptManager
 from src.agent.session_manager import ChatSessionManager
 from src.api.websocket_manager import WebSocketManager
+from src.helpers.conf_loader import server_config_loader
+from src.helpers.state_store import state_store
+from src.llm.local_intent import get_intent_classifier
 from src.message_templates.websocket_message_template import WebsocketMessageTemplate
 
+# モードは LINE 側の変更がどのワーカーにも届くよう状態ストアで共有する（言語はキオスクごと）
+server_config_loader.use_state_store(state_store)
+
 # Initialize managers
 session_manager = ChatSessionManager()
 ws_manager = WebSocketManager()
 message_manager = WebsocketMessageTemplate()
-user_profile = message_manager.contact_param()
 location_data = message_manager.location_param()
 
 prompt_manager = PromptManager()
 agent_executor = AgentManager(
-    ws_manager, message_manager, session_manager, user_profile, prompt_manager
+    ws_manager, message_manager, session_manager, prompt_manager=prompt_manager
 )
+
+# 返答分類器は初回の返答を待たせないよう起動時に学習しておく
+get_intent_classifier()
@@ -6,12 +6,12 @@ import requests
 from src.helpers import logger
 from src.helpers.conf_loader import NGROK_URL, OPEN_LINE_MESSAGES
 from src.helpers.env_loader import *
-from src.helpers.env_loader import CHANNEL_ACCESS_TOKEN
+from src.helpers.env_loader import CHANNEL_ACCESS_TOKEN, LINE_API_URL
 
 
 class PushMessageTemplate(ABC):
     def __init__(self, user_id):
-        self.url = "https://api.line.me/v2/bot/message/push"
+        self.url = f"{LINE_API_URL}/v2/bot/message/push"
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {CHANNEL_ACCESS_TOKEN}",
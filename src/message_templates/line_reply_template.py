@@ -1,12 +1,12 @@
 import requests
 
-from src.helpers.env_loader import CHANNEL_ACCESS_TOKEN
+from src.helpers.env_loader import CHANNEL_ACCESS_TOKEN, LINE_API_URL
 from src.helpers import logger
 
 
 def reply_to_user(reply_token: str, message: str):
     """Send a reply message to the user via LINE API."""
-    url = "https://api.line.me/v2/bot/message/reply"
+    url = f"{LINE_API_URL}/v2/bot/message/reply"
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {CHANNEL_ACCESS_TOKEN}",
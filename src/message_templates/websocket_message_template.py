@@ -1,28 +1,18 @@
-import json
+from dataclasses import dataclass, field, fields
+from typing import ClassVar, Dict, Optional, Union, get_args, get_type_hints
+
+from src.helpers.conf_loader import ai_config_loader
 from src.helpers.logger import logger
 from src.helpers.enums import MessageType, ActionType
+from src.message_templates import ws_codec
+from src.message_templates.ws_codec import ProtocolError
 
 
-class ChatMessage:
-    def __init__(self, message: str):
-        self.type = MessageType.CHAT.value
-        self.message = message
-
-    def to_json(self) -> str:
-        return json.dumps(self.__dict__)
-    
-    def __str__(self):
-        return f"ChatMessage(type='{self.type}', message='{self.message}')"
-
-    def __repr__(self):
-        return self.__str__()
-
-
+@dataclass(slots=True)
 class UserProfile:
-    def __init__(self, name: str = None, contact: str = None, purpose: str = None):
-        self.name = name
-        self.contact = contact
-        self.purpose = purpose
+    name: Optional[str] = None
+    contact: Optional[str] = None
+    purpose: Optional[str] = None
 
     def to_dict(self) -> dict:
         """Convert UserProfile to a dictionary, replacing None with empty strings."""
@@ -34,19 +24,12 @@ class UserProfile:
 
     def to_json(self) -> str:
         """Convert UserProfile to JSON."""
-        return json.dumps(self.to_dict())
-    
-    def __str__(self):
-        """Return a human-readable string when printing the object."""
-        return f"UserProfile(name='{self.name}', contact='{self.contact}', purpose='{self.purpose}')"
+        return ws_codec.dumps(self.to_dict())
 
-    def __repr__(self):
-        """Return the official string representation."""
-        return self.__str__()
 
+@dataclass(slots=True)
 class LanguageData:
-    def __init__(self, language: str = None):
-        self.language = language
+    language: Optional[str] = None
 
     def to_dict(self) -> dict:
         """Convert LanguageData to a dictionary, replacing None with empty strings."""
@@ -56,23 +39,16 @@ class LanguageData:
 
     def to_json(self) -> str:
         """Convert LanguageData to JSON."""
-        return json.dumps(self.to_dict())
-    
-    def __str__(self):
-        """Return a human-readable string when printing the object."""
-        return f"LanguageData(language='{self.language}')"
+        return ws_codec.dumps(self.to_dict())
 
-    def __repr__(self):
-        """Return the official string representation."""
-        return self.__str__()
 
+@dataclass(slots=True)
 class LocationData:
-    def __init__(self, city: str = None, region: str = None, lat: float = None, lon: float = None, prefecture: str = None):
-        self.city = city
-        self.region = region
-        self.lat = lat
-        self.lon = lon
-        self.prefecture = prefecture
+    city: Optional[str] = None
+    region: Optional[str] = None
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    prefecture: Optional[str] = None
 
     def to_dict(self) -> dict:
         """Convert LocationData to a dictionary, replacing None with empty strings."""
@@ -86,145 +62,198 @@ class LocationData:
 
     def to_json(self) -> str:
         """Convert LocationData to JSON."""
-        return json.dumps(self.to_dict())
-    
-    def __str__(self):
-        """Return a human-readable string when printing the object."""
-        return f"LocationData(city='{self.city}', region='{self.region}', lat={self.lat}, lon={self.lon}, prefecture='{self.prefecture}')"
+        return ws_codec.dumps(self.to_dict())
 
-    def __repr__(self):
-        """Return the official string representation."""
-        return self.__str__()
 
+@dataclass(slots=True)
+class ResumeData:
+    """Resume token sent with SESSION_TOKEN; reconnect with /ws?resume=<token>."""
 
-class ActionMessage:
-    def __init__(self, action_type: str, params: UserProfile):
-        self.type = MessageType.ACTION.value
-        self.action_type = action_type
-        self.params = params or UserProfile()
+    token: str = ""
+
+    def to_dict(self) -> dict:
+        return {"token": self.token}
+
+
+ActionParams = Union[UserProfile, LanguageData, LocationData, ResumeData]
+
+
+def _param_types(cls, rename: Optional[Dict[str, str]] = None) -> Dict[str, tuple]:
+    """Accepted JSON value types of each field of a params dataclass, keyed by wire name."""
+    hints = get_type_hints(cls)
+    types = {}
+    for f in fields(cls):
+        accepted = tuple(t for t in get_args(hints[f.name]) if t is not type(None)) or (hints[f.name],)
+        if float in accepted:
+            accepted += (int,)    # JSON の 35 も緯度として受け付ける
+        types[(rename or {}).get(f.name, f.name)] = accepted
+    return types
+
+
+# validate_frame は parse_action_params が作るデータクラスの型で params を検査する
+ws_codec.register_param_types(None, _param_types(UserProfile))
+ws_codec.register_param_types(ActionType.SET_LOCATION.value, _param_types(LocationData))
+ws_codec.register_param_types(ActionType.SET_LANGUAGE.value, _param_types(LanguageData, {"language": "name"}))
+
+
+@dataclass(slots=True)
+class ChatMessage:
+    type: ClassVar[str] = MessageType.CHAT.value
+    message: str
+
+    def to_dict(self) -> dict:
+        return {"type": self.type, "message": self.message}
 
     def to_json(self) -> str:
-        return json.dumps(
-            {
-                "type": self.type,
-                "action_type": self.action_type,
-                "params": self.params.to_dict(),
-            }
-        )
-    
-    def __str__(self):
-        return f"ActionMessage(type='{self.type}', action_type='{self.action_type}', params={self.params})"
+        return ws_codec.dumps(self.to_dict())
 
-    def __repr__(self):
-        return self.__str__()
 
+@dataclass(slots=True)
+class ActionMessage:
+    type: ClassVar[str] = MessageType.ACTION.value
+    action_type: str
+    params: ActionParams = field(default_factory=UserProfile)
 
-class ChatActionMessage:
-    def __init__(self, message: str, action_type: str, params: UserProfile):
-        self.type = MessageType.CHAT_ACTION.value
-        self.message = message
-        self.action = ActionMessage(action_type, params)
+    def __post_init__(self):
+        if self.params is None:
+            self.params = UserProfile()
+
+    def to_dict(self) -> dict:
+        return {
+            "type": self.type,
+            "action_type": self.action_type,
+            "params": self.params.to_dict(),
+        }
 
     def to_json(self) -> str:
-        # print(self.action.params.to_dict())
-        return json.dumps(
-            {
-                "type": self.type,
-                "message": self.message,
-                "action": {
-                    "action_type": self.action.action_type,
-                    "params": self.action.params.to_dict(),
-                },
-            }
-        )
-
-    def __str__(self):
-        return f"ChatActionMessage(type='{self.type}', message='{self.message}', action={self.action})"
+        return ws_codec.dumps(self.to_dict())
 
-    def __repr__(self):
-        return self.__str__()
-    
-class URLActionMessage:
-    def __init__(self, url: str, action_type: str, params: UserProfile):
-        self.type = MessageType.URL_ACTION.value
-        self.url = url
-        self.action = ActionMessage(action_type, params)
+
+@dataclass(slots=True)
+class _ActionFrame:
+    """Base for frames that carry a text (or URL) and a nested action."""
+
+    type: ClassVar[str]
+    message: str
+    action: ActionMessage
+
+    def to_dict(self) -> dict:
+        return {
+            "type": self.type,
+            "message": self.message,
+            "action": {
+                "action_type": self.action.action_type,
+                "params": self.action.params.to_dict(),
+            },
+        }
 
     def to_json(self) -> str:
-        # print(self.action.params.to_dict())
-        return json.dumps(
-            {
-                "type": self.type,
-                "message": self.url,
-                "action": {
-                    "action_type": self.action.action_type,
-                    "params": self.action.params.to_dict(),
-                },
-            }
-        )
-
-    def __str__(self):
-        return f"URLActionMessage(type='{self.type}', url='{self.url}', action={self.action})"
+        return ws_codec.dumps(self.to_dict())
 
-    def __repr__(self):
-        return self.__str__()
-    
-class ConfirmActionMessage:
-    def __init__(self, message: str, action_type: str, params: UserProfile):
-        self.type = MessageType.CONFIRM_ACTION.value
+
+@dataclass(slots=True)
+class ChatActionMessage(_ActionFrame):
+    type: ClassVar[str] = MessageType.CHAT_ACTION.value
+
+
+@dataclass(slots=True)
+class URLActionMessage(_ActionFrame):
+    type: ClassVar[str] = MessageType.URL_ACTION.value
+
+    @property
+    def url(self) -> str:
+        return self.message
+
+
+@dataclass(slots=True)
+class ConfirmActionMessage(_ActionFrame):
+    type: ClassVar[str] = MessageType.CONFIRM_ACTION.value
+
+
+class StaticFrame:
+    """A shared, never-mutated message with its encoded bytes per codec."""
+
+    __slots__ = ("message", "encoded")
+
+    def __init__(self, message, codecs=()):
         self.message = message
-        self.action = ActionMessage(action_type, params)
+        self.encoded: Dict[str, Union[str, bytes]] = {}
+        payload = message.to_dict()
+        for codec in codecs:
+            self.encoded[codec.name] = codec.encode(payload)
+
+    def encode(self, codec) -> Union[str, bytes]:
+        frame = self.encoded.get(codec.name)
+        if frame is None:
+            frame = self.encoded[codec.name] = codec.encode(self.message.to_dict())
+        return frame
+
+    def to_dict(self) -> dict:
+        return self.message.to_dict()
 
     def to_json(self) -> str:
-        return json.dumps(
-            {
-                "type": self.type,
-                "message": self.message,
-                "action": {
-                    "action_type": self.action.action_type,
-                    "params": self.action.params.to_dict(),
-                },
-            }
-        )
-
-    def __str__(self):
-        return f"ConfirmActionMessage(type='{self.type}', message='{self.message}', action={self.action})"
+        return self.encode(ws_codec.JSON_CODEC)
 
     def __repr__(self):
-        return self.__str__()
+        return repr(self.message)
 
 
 class WebsocketMessageTemplate:
     def __init__(self):
-        pass
+        self._action_frames: Dict[str, StaticFrame] = {}
+        self._chat_frames: Dict[str, StaticFrame] = {}
+        self._greetings: Dict[str, str] = {}
+        self.build_frame_cache(ai_config_loader.config)
+        # 設定が再読み込みされたら作り直す
+        ai_config_loader.add_reload_hook(self.build_frame_cache)
+
+    def build_frame_cache(self, config: dict):
+        """Pre-encode parameterless action frames and the greeting/ending texts."""
+        codecs = ws_codec.available_codecs()
+        self._action_frames = {
+            action.value: StaticFrame(ActionMessage(action.value), codecs) for action in ActionType
+        }
+        self._chat_frames = {
+            text: StaticFrame(ChatMessage(text), codecs) for text in (config.get("greeting") or {}).values()
+        }
+        self._greetings = dict(config.get("greeting") or {})
+        logger.debug(f"静的フレームを準備: action={len(self._action_frames)}, chat={len(self._chat_frames)}")
 
-    def chat_message(self, message: str) -> ChatMessage:
-        """Create a chat message."""
-        return ChatMessage(message)
+    def greeting_text(self, kind: str, language: str) -> str:
+        """Greeting (kind="greet") or ending (kind="end") text for a language."""
+        return self._greetings[f"{kind}_{language}"]
+
+    def chat_message(self, message: str) -> Union[ChatMessage, StaticFrame]:
+        """Create a chat message (a pre-encoded frame for greeting texts)."""
+        return self._chat_frames.get(message) or ChatMessage(message)
 
     def action_message(
         self, action_type: str, params: UserProfile = None
-    ) -> ActionMessage:
-        """Create an action message."""
+    ) -> Union[ActionMessage, StaticFrame]:
+        """Create an action message (a pre-encoded frame when there are no params)."""
+        if params is None:
+            frame = self._action_frames.get(action_type)
+            if frame is not None:
+                return frame
         return ActionMessage(action_type, params)
 
     def chat_action_message(
         self, message: str, action_type: str, params: UserProfile = None
     ) -> ChatActionMessage:
         """Create a chat action message."""
-        return ChatActionMessage(message, action_type, params)
+        return ChatActionMessage(message, ActionMessage(action_type, params))
 
     def url_action_message(
         self, url: str, action_type: str, params: UserProfile = None
     ) -> URLActionMessage:
         """Create a URL action message."""
-        return URLActionMessage(url, action_type, params)
+        return URLActionMessage(url, ActionMessage(action_type, params))
     
     def confirm_action_message(
         self, message: str, action_type: str, params: UserProfile = None
     ) -> ConfirmActionMessage:
         """Create a chat action message."""
-        return ConfirmActionMessage(message, action_type, params)
+        return ConfirmActionMessage(message, ActionMessage(action_type, params))
 
     def contact_param(
         self, name: str = None, contact: str = None, purpose: str = None
@@ -260,34 +289,33 @@ class WebsocketMessageTemplate:
             )
 
     def parse_message(self, message: dict):
-        """Parse incoming message and return the appropriate object."""
-        message_type = message.get("type")
+        """Parse an incoming frame dict and return the appropriate object.
+
+        Raises ProtocolError for frames that do not follow the schema.
+        """
+        ws_codec.validate_frame(message)
+        message_type = message["type"]
 
         if message_type == MessageType.CHAT.value:
-            return ChatMessage(message.get("message"))
+            return ChatMessage(message.get("message") or "")
 
         elif message_type == MessageType.ACTION.value:
-            action_type = message.get("action_type")
-            params_data = message.get("params", {})
-            params = self.parse_action_params(params_data, action_type)
+            action_type = message["action_type"]
+            params = self.parse_action_params(message.get("params") or {}, action_type)
             return ActionMessage(action_type, params)
 
-        elif message_type == MessageType.CHAT_ACTION.value:
-            chat_text = message.get("message")
-            action_data = message.get("action", {})
-            action_type = action_data.get("action_type")
-            params_data = action_data.get("params", {})
-
-            if isinstance(params_data, UserProfile):
-                params_data = params_data.to_dict()
-
+        else:
+            action_data = message["action"]
+            params_data = action_data.get("params") or {}
             params = UserProfile(
                 params_data.get("name"),
                 params_data.get("contact"),
                 params_data.get("purpose"),
             )
+            return ChatActionMessage(
+                message.get("message") or "", ActionMessage(action_data["action_type"], params)
+            )
 
-            return ChatActionMessage(chat_text, action_type, params)
-
-        else:
-            raise ValueError(f"Unknown message type: {message_type}")
+    def decode(self, raw: Union[str, bytes], codec=ws_codec.JSON_CODEC):
+        """Decode and validate a raw /ws frame with the connection's codec."""
+        return self.parse_message(codec.decode(raw))
@@ -0,0 +1,261 @@
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import orjson
+
+from src.helpers.enums import ACTION_TYPE_CODES, MESSAGE_TYPE_CODES, ActionType, MessageType
+
+# /ws のフレームのエンコード・デコードと、プロトコルの JSON Schema
+
+MAX_FRAME_BYTES = 64 * 1024
+MAX_TEXT_LENGTH = 2000
+
+MESSAGE_TYPES = frozenset(t.value for t in MessageType)
+ACTION_TYPES = frozenset(a.value for a in ActionType)
+# クライアントから送られてくるのはこの 3 種類だけ
+INBOUND_TYPES = frozenset((MessageType.CHAT.value, MessageType.ACTION.value, MessageType.CHAT_ACTION.value))
+# action_type ごとの params の値の型（websocket_message_template が params のデータクラスから登録する）。
+# キー None はそれ以外の action_type と chat_action の params
+PARAM_TYPES: Dict[Optional[str], Dict[str, tuple]] = {}
+
+
+class ProtocolError(Exception):
+    """A frame that does not follow the /ws protocol."""
+
+
+def dumps(payload: Dict[str, Any]) -> str:
+    """Serialize a frame to JSON text."""
+    return orjson.dumps(payload).decode("utf-8")
+
+
+def loads(raw: Union[str, bytes]) -> Dict[str, Any]:
+    """Parse a JSON frame, rejecting oversized or non-object payloads."""
+    if len(raw) > MAX_FRAME_BYTES:
+        raise ProtocolError(f"frame too large: {len(raw)} bytes")
+    try:
+        data = orjson.loads(raw)
+    except orjson.JSONDecodeError as e:
+        raise ProtocolError(f"invalid JSON: {e}") from None
+    if not isinstance(data, dict):
+        raise ProtocolError("frame must be a JSON object")
+    return data
+
+
+JSON_SUBPROTOCOL = "kiosk.json.v1"
+MSGPACK_SUBPROTOCOL = "kiosk.msgpack.v1"
+
+_TYPE_TO_CODE = {t.value: code for t, code in MESSAGE_TYPE_CODES.items()}
+_CODE_TO_TYPE = {code: value for value, code in _TYPE_TO_CODE.items()}
+_ACTION_TO_CODE = {a.value: code for a, code in ACTION_TYPE_CODES.items()}
+_CODE_TO_ACTION = {code: value for value, code in _ACTION_TO_CODE.items()}
+
+
+class JsonCodec:
+    """Default text transport: JSON frames sent with send_text."""
+
+    name = "json"
+    subprotocol: Optional[str] = JSON_SUBPROTOCOL
+    binary = False
+
+    def encode(self, payload: Dict[str, Any]) -> str:
+        return dumps(payload)
+
+    def decode(self, raw: Union[str, bytes]) -> Dict[str, Any]:
+        return loads(raw)
+
+
+class MsgpackCodec:
+    """Binary transport: MessagePack frames with integer type/action codes."""
+
+    name = "msgpack"
+    subprotocol: Optional[str] = MSGPACK_SUBPROTOCOL
+    binary = True
+
+    def __init__(self):
+        import msgpack  # 使うクライアントがいる場合だけ読み込む
+
+        self._packb = msgpack.packb
+        self._unpackb = msgpack.unpackb
+
+    def encode(self, payload: Dict[str, Any]) -> bytes:
+        return self._packb(_compact(payload), use_bin_type=True)
+
+    def decode(self, raw: Union[str, bytes]) -> Dict[str, Any]:
+        if isinstance(raw, str):
+            raise ProtocolError("binary frame expected")
+        if len(raw) > MAX_FRAME_BYTES:
+            raise ProtocolError(f"frame too large: {len(raw)} bytes")
+        try:
+            data = self._unpackb(raw, raw=False, strict_map_key=True)
+        except Exception as e:
+            raise ProtocolError(f"invalid MessagePack: {e}") from None
+        if not isinstance(data, dict):
+            raise ProtocolError("frame must be a map")
+        return _expand(data)
+
+
+def _compact(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace type / action_type strings with their integer codes."""
+    frame = dict(payload)
+    frame["type"] = _TYPE_TO_CODE.get(frame.get("type"), frame.get("type"))
+    if "action_type" in frame:
+        frame["action_type"] = _ACTION_TO_CODE.get(frame["action_type"], frame["action_type"])
+    action = frame.get("action")
+    if isinstance(action, dict):
+        frame["action"] = {**action, "action_type": _ACTION_TO_CODE.get(action.get("action_type"), action.get("action_type"))}
+    return frame
+
+
+def _expand(frame: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of _compact; unknown codes are left for validate_frame to reject."""
+    frame["type"] = _CODE_TO_TYPE.get(frame.get("type"), frame.get("type"))
+    if "action_type" in frame:
+        frame["action_type"] = _CODE_TO_ACTION.get(frame["action_type"], frame["action_type"])
+    action = frame.get("action")
+    if isinstance(action, dict) and "action_type" in action:
+        action["action_type"] = _CODE_TO_ACTION.get(action["action_type"], action["action_type"])
+    return frame
+
+
+class _LegacyJsonCodec(JsonCodec):
+    """JSON for clients that did not offer a subprotocol (accept without one)."""
+
+    subprotocol = None
+
+
+JSON_CODEC = JsonCodec()
+
+
+def available_codecs() -> List[Any]:
+    """Codecs usable in this process (MessagePack only if installed)."""
+    codecs = [JSON_CODEC]
+    try:
+        codecs.append(MsgpackCodec())
+    except ImportError:
+        pass
+    return codecs
+
+
+def negotiate(offered: Iterable[str], allowed: Iterable[str] = (MSGPACK_SUBPROTOCOL, JSON_SUBPROTOCOL)):
+    """Pick a codec from the client's Sec-WebSocket-Protocol offer (JSON if none match)."""
+    allowed = list(allowed)
+    for name in offered:
+        if name not in allowed:
+            continue
+        if name == MSGPACK_SUBPROTOCOL:
+            try:
+                return MsgpackCodec()
+            except ImportError:
+                continue
+        if name == JSON_SUBPROTOCOL:
+            return JSON_CODEC
+    # サブプロトコルを指定しない既存クライアントは JSON テキストのまま
+    return _LegacyJsonCodec()
+
+
+def _check_text(value: Any, field: str) -> str:
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ProtocolError(f"{field} must be a string")
+    if len(value) > MAX_TEXT_LENGTH:
+        raise ProtocolError(f"{field} too long: {len(value)}")
+    return value
+
+
+def register_param_types(action_type: Optional[str], types: Dict[str, tuple]):
+    """Declare the accepted value types of params for action_type (None: the default)."""
+    PARAM_TYPES[action_type] = types
+
+
+def _check_params(params: Dict[str, Any], types: Dict[str, tuple]):
+    for key, accepted in types.items():
+        value = params.get(key)
+        if value is None:
+            continue
+        # bool は int のサブクラスなので数値としては受け付けない
+        if isinstance(value, bool) or not isinstance(value, accepted):
+            raise ProtocolError(f"params.{key} must be {' or '.join(t.__name__ for t in accepted)}")
+        if isinstance(value, str) and len(value) > MAX_TEXT_LENGTH:
+            raise ProtocolError(f"params.{key} too long: {len(value)}")
+
+
+def _check_action(action_type: Any, params: Any, by_action: bool = True) -> Dict[str, Any]:
+    if action_type not in ACTION_TYPES:
+        raise ProtocolError(f"unknown action_type: {action_type!r}")
+    if params is None:
+        return {}
+    if not isinstance(params, dict):
+        raise ProtocolError("params must be an object")
+    types = PARAM_TYPES.get(action_type) if by_action else None
+    _check_params(params, types if types is not None else PARAM_TYPES.get(None, {}))
+    return params
+
+
+def validate_frame(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Cheap structural validation of an inbound frame; returns it unchanged."""
+    message_type = data.get("type")
+    if message_type not in INBOUND_TYPES:
+        raise ProtocolError(f"unknown message type: {message_type!r}")
+
+    if message_type == MessageType.CHAT.value:
+        _check_text(data.get("message"), "message")
+    elif message_type == MessageType.ACTION.value:
+        _check_action(data.get("action_type"), data.get("params"))
+    else:
+        _check_text(data.get("message"), "message")
+        action = data.get("action")
+        if not isinstance(action, dict):
+            raise ProtocolError("action must be an object")
+        # chat_action の params は action_type に関係なく UserProfile として読む
+        _check_action(action.get("action_type"), action.get("params"), by_action=False)
+    return data
+
+
+def _action_schema() -> Dict[str, Any]:
+    return {
+        "type": "object",
+        "properties": {
+            "action_type": {"enum": sorted(ACTION_TYPES)},
+            "params": {"type": "object"},
+        },
+        "required": ["action_type"],
+    }
+
+
+def protocol_schema() -> Dict[str, Any]:
+    """JSON Schema of every frame exchanged on /ws (both directions)."""
+    text = {"type": "string", "maxLength": MAX_TEXT_LENGTH}
+    action = _action_schema()
+    return {
+        "$schema": "https://json-schema.org/draft/2020-12/schema",
+        "title": "Reception kiosk WebSocket frame",
+        # kiosk.msgpack.v1 では type / action_type をこの整数コードで送る
+        "x-binary-codes": {"type": _TYPE_TO_CODE, "action_type": _ACTION_TO_CODE},
+        "oneOf": [
+            {
+                "type": "object",
+                "properties": {"type": {"const": MessageType.CHAT.value}, "message": text},
+                "required": ["type", "message"],
+            },
+            {
+                "type": "object",
+                "properties": {
+                    "type": {"const": MessageType.ACTION.value},
+                    **action["properties"],
+                },
+                "required": ["type", "action_type"],
+            },
+            *(
+                {
+                    "type": "object",
+                    "properties": {"type": {"const": message_type}, "message": text, "action": action},
+                    "required": ["type", "message", "action"],
+                }
+                for message_type in (
+                    MessageType.CHAT_ACTION.value,
+                    MessageType.CONFIRM_ACTION.value,
+                    MessageType.URL_ACTION.value,
+                )
+            ),
+        ],
+    }
@@ -2,10 +2,13 @@ from langchain.tools import BaseTool
 from typing import Optional, Type
 from pydantic.v1 import BaseModel
 from src.api.websocket_manager import WebSocketManager
-from src.message_templates.websocket_message_template import WebsocketMessageTemplate, UserProfile
+from src.message_templates.websocket_message_template import WebsocketMessageTemplate
 from src.agent.session_manager import ChatSessionManager
 from src.agent.context_variables import ContextMemory
-from src.llm.intent_classifier import intent_chain, correction_chain
+from src.agent.conversation_state import ConversationState
+from src.llm.local_intent import classify_correction, classify_yesno
+from src.llm.rule_extractor import record_path
+from src.llm.structured_extractor import extract_visitor_utterance
 from src.helpers.logger import logger
 from src.helpers.enums import ActionType, Mode
 from src.helpers.maps import BUTTON_TITLE_MAP
@@ -19,16 +22,24 @@ class BaseContactTool(BaseTool):
     ws_manager: Optional[WebSocketManager] = None
     message_manager: Optional[WebsocketMessageTemplate] = None
     session_manager: Optional[ChatSessionManager] = None
-    user_profile: Optional[UserProfile] = None
     context_memory: Optional[ContextMemory] = None
     return_direct: bool = True
 
-    async def handle_timeout(self, *, end_message: str = DAILOGUE["timeout_message"]) -> str:
+    async def arun(self, *args, **kwargs):
+        # LINE 送信や返事待ちの途中で新しい発話に取り消されないよう、実行中であることを残す
+        context = self.session_manager.get_context_memory()
+        context.side_effect_tool = self.name
+        try:
+            return await super().arun(*args, **kwargs)
+        finally:
+            context.side_effect_tool = None
+
+    async def handle_timeout(self, *, end_message: Optional[str] = None) -> str:
         await self.send_action_msg(ActionType.SHOW_TOP.value)
         await self.send_action_msg(ActionType.END_SESSION.value)
-        self.session_manager.end_session()
+        self.session_manager.end_session("timeout")
         self.context_memory.workflow_active = False
-        return end_message
+        return end_message if end_message is not None else DAILOGUE["timeout_message"]
 
     async def send_chat_action_msg(self, message: str, action: ActionType, param: object = None):
         self.session_manager.update_chat_history("", message)
@@ -47,33 +58,45 @@ class BaseContactTool(BaseTool):
         await self.ws_manager.send_to_client(self.message_manager.chat_message(message))
 
     async def send_confirm_action_msg(self, message: str, action: ActionType, param: object = None):
+        # 次の返答は「表示した内容でよいか」への答えとして抽出する
+        self.session_manager.get_context_memory().conversation_state = ConversationState.CONFIRM_USER_INFO
         await self.ws_manager.send_to_client(
             self.message_manager.confirm_action_message(message, action, param)
         )
 
-    async def is_confirmed_yesno(self, response: str) -> bool:
-        result = await intent_chain.ainvoke({"response": response})
-        if result.content.strip().lower() == "confirmation":
+    async def is_confirmed_yesno(self, response: str) -> str:
+        local = classify_yesno(response)
+        if local.confident:
+            record_path("intent", "rule")
+            return local.label
+
+        record_path("intent", "llm")
+        result = await extract_visitor_utterance(response, self.session_manager.get_context_memory().conversation_state)
+        if result.intent == "confirmation":
             return "confirmation"
-        elif result.content.strip().lower() == "decline":
+        elif result.intent in ("decline", "correction"):
             return "decline"
         else:
             return "unknown"
-        
-    async def is_confirmed_correction(self, response: str) -> bool:
-        result = await correction_chain.ainvoke({"response": response})
-        if result.content.strip().lower() == "confirmation":
+
+    async def is_confirmed_correction(self, response: str) -> str:
+        local = classify_correction(response)
+        if local.confident:
+            record_path("intent", "rule")
+            return local.label
+
+        record_path("intent", "llm")
+        result = await extract_visitor_utterance(response, self.session_manager.get_context_memory().conversation_state)
+        if result.intent == "confirmation":
             return "confirmation"
-        elif result.content.strip().lower() == "correction":
+        elif result.intent in ("correction", "decline"):
             return "correction"
         else:
             return "unknown"
 
     def reload_memory(self):
+        # プロフィールは ContextMemory.profile から作るので、参照を取り直すだけでよい
         self.context_memory = self.session_manager.get_context_memory()
-        self.user_profile.name = self.context_memory.name
-        self.user_profile.purpose = self.context_memory.purpose
-        self.user_profile.contact = self.context_memory.phone
         logger.info(f"ユーザープロフィール再読み込み: {self.context_memory.name}, {self.context_memory.phone}, {self.context_memory.purpose}")
 
     def get_title_text(self):
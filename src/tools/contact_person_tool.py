@@ -46,4 +46,8 @@ class ContactPersonTool(BaseTool):
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
     ) -> str:
         self.session_manager.context.last_tool_name = self.name
-        return await self.contact_person()
+        self.session_manager.context.side_effect_tool = self.name
+        try:
+            return await self.contact_person()
+        finally:
+            self.session_manager.context.side_effect_tool = None
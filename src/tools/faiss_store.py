@@ -0,0 +1,142 @@
+import json
+import mmap
+import os
+import shutil
+import time
+import uuid
+from typing import List, Union
+
+import faiss
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_community.docstore.base import Docstore
+from langchain_community.vectorstores import FAISS
+
+# 索引の保存形式（pickle を使わない）
+#   {vector_db}/CURRENT                   … 使用中の世代名
+#   {vector_db}/{世代}/index.faiss        … ベクトル。読み込み時は mmap するので各ワーカーでページを共有する
+#   {vector_db}/{世代}/docs.jsonl         … 1 行 1 文書（page_content, metadata）
+#   {vector_db}/{世代}/docs_offsets.npy   … 各行の開始位置（n + 1 個）。検索で当たった行だけ読む
+# 保存は新しい世代フォルダに書いてから CURRENT を差し替える。
+# 別のワーカーがまだ読み込み途中のことがあり、また戻す（rollback_index）ために直前の世代は残しておく。
+
+CURRENT_FILE = "CURRENT"
+INDEX_FILE = "index.faiss"
+DOCS_FILE = "docs.jsonl"
+OFFSETS_FILE = "docs_offsets.npy"
+KEEP_GENERATIONS = 2
+
+# IO_FLAG_MMAP_IFC はフラットなベクトルをコピーせずにファイルから直接使う（faiss 1.8 以降）
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+class MappedDocstore(Docstore):
+    """Read-only docstore over docs.jsonl; a row is parsed only when a search returns it."""
+
+    def __init__(self, folder: str):
+        self._offsets = np.load(os.path.join(folder, OFFSETS_FILE), mmap_mode="r")
+        with open(os.path.join(folder, DOCS_FILE), "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def search(self, search: str) -> Union[str, Document]:
+        try:
+            row = int(search)
+            if not 0 <= row < len(self):
+                raise IndexError(row)
+        except (TypeError, ValueError, IndexError):
+            return f"ID {search} not found."
+        record = json.loads(self._data[self._offsets[row]:self._offsets[row + 1]])
+        return Document(page_content=record["page_content"], metadata=record["metadata"])
+
+    def delete(self, ids: List) -> None:
+        raise NotImplementedError("MappedDocstore is read-only; rebuild the index instead.")
+
+
+def _current_folder(path: str) -> str:
+    with open(os.path.join(path, CURRENT_FILE), encoding="utf-8") as f:
+        return os.path.join(path, f.read().strip())
+
+
+def _set_current(path: str, generation: str):
+    pointer = os.path.join(path, f"{CURRENT_FILE}.tmp")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(generation)
+    os.replace(pointer, os.path.join(path, CURRENT_FILE))
+
+
+def _generations(path: str) -> List[str]:
+    return sorted(n for n in os.listdir(path) if os.path.exists(os.path.join(path, n, INDEX_FILE)))
+
+
+def is_saved(path: str) -> bool:
+    """True if path holds an index in this format (old pickle folders are rebuilt once)."""
+    try:
+        return os.path.exists(os.path.join(_current_folder(path), INDEX_FILE))
+    except OSError:
+        return False
+
+
+def _prune(path: str, keep: List[str]):
+    for name in os.listdir(path):
+        if name in keep or name == CURRENT_FILE:
+            continue
+        target = os.path.join(path, name)
+        # Windows では mmap 中のファイルは消せないので、次の保存時にまた試す
+        if os.path.isdir(target):
+            shutil.rmtree(target, ignore_errors=True)
+        else:
+            try:
+                os.remove(target)
+            except OSError:
+                pass
+
+
+def save_index(store: FAISS, path: str) -> str:
+    """Write store as a new generation under path and make it current; returns the generation."""
+    # 名前順 = 保存順になるようにする（同じ秒に複数回保存しても並びが崩れない）
+    generation = f"{time.time_ns():020d}-{uuid.uuid4().hex[:6]}"
+    folder = os.path.join(path, generation)
+    os.makedirs(folder)
+    faiss.write_index(store.index, os.path.join(folder, INDEX_FILE))
+
+    offsets = [0]
+    with open(os.path.join(folder, DOCS_FILE), "wb") as f:
+        for i in range(store.index.ntotal):
+            doc = store.docstore.search(store.index_to_docstore_id[i])
+            line = json.dumps({"page_content": doc.page_content, "metadata": doc.metadata},
+                              ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    np.save(os.path.join(folder, OFFSETS_FILE), np.asarray(offsets, dtype=np.int64))
+
+    previous = os.path.basename(_current_folder(path)) if is_saved(path) else None
+    _set_current(path, generation)
+
+    # 新しい世代と、その直前に使っていた世代を残す（rollback 後の保存でも戻し先を消さない）
+    keep = [generation] + ([previous] if previous else [])
+    keep += [n for n in reversed(_generations(path)) if n not in keep][:max(KEEP_GENERATIONS - len(keep), 0)]
+    _prune(path, keep)
+    return generation
+
+
+def rollback_index(path: str) -> Union[str, None]:
+    """Point CURRENT at the newest kept generation older than the current one; returns it, or None."""
+    current = os.path.basename(_current_folder(path))
+    older = [n for n in _generations(path) if n < current]
+    if not older:
+        return None
+    _set_current(path, older[-1])
+    return older[-1]
+
+
+def load_index(path: str, embedding) -> FAISS:
+    """Open the current generation without copying vectors or unpickling anything."""
+    folder = _current_folder(path)
+    index = faiss.read_index(os.path.join(folder, INDEX_FILE), MMAP_FLAGS)
+    docstore = MappedDocstore(folder)
+    if len(docstore) != index.ntotal:
+        raise ValueError(f"{folder}: {index.ntotal} vectors but {len(docstore)} documents")
+    return FAISS(embedding, index, docstore, {i: str(i) for i in range(index.ntotal)})
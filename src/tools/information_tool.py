@@ -1,4 +1,5 @@
-from typing import Optional, Type, Any
+from collections import Counter
+from typing import Optional, Type, Any, List, Tuple
 from pydantic.v1 import BaseModel, Field
 from langchain.callbacks.manager import (
     AsyncCallbackManagerForToolRun,
@@ -7,14 +8,19 @@ from langchain.callbacks.manager import (
 from langchain.tools import BaseTool
 from deep_translator import GoogleTranslator
 
+from src.agent.agent import DirectAnswer
+from src.agent.tool_prefetcher import take_prefetched
 from src.helpers.enums import ActionType
 from src.api.websocket_manager import WebSocketManager
 from src.agent.session_manager import ChatSessionManager
-from src.message_templates.websocket_message_template import (
-    UserProfile,
-    WebsocketMessageTemplate,
-)
+from src.message_templates.websocket_message_template import WebsocketMessageTemplate
 from src.helpers.conf_loader import DAILOGUE, server_config_loader
+from src.helpers.executors import run_blocking
+from src.helpers.logger import logger
+from src.llm.rag_answerer import answer_from_passages, direct_answer_conf, condense_answer
+
+# どの経路で回答したか（direct: FAQ をそのまま / single_llm: 1 回の LLM / agent: 従来通りエージェントが言い換え）
+answer_path_stats: Counter = Counter()
 
 
 class InformationInput(BaseModel):
@@ -32,7 +38,6 @@ class InformationTool(BaseTool):
     ws_manager: Optional[WebSocketManager] = None
     message_manager: Optional[WebsocketMessageTemplate] = None
     session_manager: Optional[ChatSessionManager] = None
-    user_profile: Optional[UserProfile] = None
     current_language: str = server_config_loader.get_language()
     return_direct: bool = False
 
@@ -45,7 +50,7 @@ class InformationTool(BaseTool):
     # ----------- Translation Helper -----------
     def _translate_to_japanese(self, query: str) -> str:
         """Translate query to Japanese if not already in Japanese."""
-        self.current_language = self._get_base_language_code(self.current_language)
+        self.current_language = self._get_base_language_code(server_config_loader.get_language())
         if self.current_language == "ja":
             return query
         
@@ -96,20 +101,79 @@ class InformationTool(BaseTool):
 
         self.session_manager.context.last_tool_name = self.name
 
-        # Translate question to Japanese before retrieval
-        japanese_question = self._translate_to_japanese(question)
+        # Reuse the speculative retrieval started while the agent was deciding (same question only)
+        scored = await take_prefetched(self.name, question)
+        if scored is None:
+            # Translate question to Japanese before retrieval
+            japanese_question = await run_blocking("io", self._translate_to_japanese, question)
 
-        try:
-            results = await self.retriever.ainvoke(japanese_question)
-        except Exception as e:
-            print(f"[RAG Async Error] {e}")
-            return DAILOGUE.get("rag_fallback_message", "情報を取得できませんでした。")
+            try:
+                scored = await self._aretrieve(japanese_question)
+            except Exception as e:
+                print(f"[RAG Async Error] {e}")
+                return DAILOGUE.get("rag_fallback_message", "情報を取得できませんでした。")
 
-        if not results:
+        if not scored:
             return DAILOGUE.get("rag_fallback_message", "関連する情報が見つかりませんでした。")
 
+        results = [doc for doc, _ in scored]
         combined_answer = self._format_results(results)
-        return combined_answer
+        if not direct_answer_conf().get("enabled", False):
+            self._record_answer_path("agent", scored[0][1])
+            return combined_answer
+        return await self._direct_answer(question, scored, combined_answer)
+
+    # ----------- Direct answer (no second agent round trip) -----------
+    async def _direct_answer(self, question: str, scored: list, combined_answer: str) -> str:
+        """Answer without handing the passage back to the agent LLM.
+
+        Answers produced here are wrapped in DirectAnswer so the executor ends the run
+        for this call only; the fallback returns a plain str for the agent to rephrase.
+        """
+        top_doc, top_score = scored[0]
+        language = self._get_base_language_code(server_config_loader.get_language())
+
+        conf = direct_answer_conf()
+        if (language in conf.get("languages", ["ja"]) and top_score is not None
+                and top_score >= conf.get("min_score", 0.75)):
+            self._record_answer_path("direct", top_score)
+            return DirectAnswer(condense_answer(self._format_results([top_doc])))
+
+        try:
+            answer = await answer_from_passages(question, combined_answer, server_config_loader.get_language())
+        except Exception as e:
+            logger.error(f"RAG 回答生成エラー: {e}")
+            # エージェントに言い換えを任せる
+            self._record_answer_path("agent", top_score)
+            return combined_answer
+        self._record_answer_path("single_llm", top_score)
+        return DirectAnswer(answer)
+
+    def _record_answer_path(self, path: str, score: Optional[float]):
+        answer_path_stats[path] += 1
+        self.session_manager.context.answer_path = path
+        score_text = f"{score:.3f}" if score is not None else "-"
+        logger.info(f"RAG 回答経路: {self.name} -> {path} (score={score_text})")
+
+    # ----------- Retrieval -----------
+    async def _aretrieve(self, japanese_question: str) -> List[Tuple[Any, Optional[float]]]:
+        """Retrieve documents with relevance scores when the retriever exposes its vector store."""
+        # 索引の差し替えをまたがないよう、この検索で使う retriever を先に決める
+        retriever = getattr(self.retriever, "current", self.retriever)
+        vectorstore = getattr(retriever, "vectorstore", None)
+        if vectorstore is None:
+            return [(doc, None) for doc in await run_blocking("retrieval", retriever.invoke, japanese_question)]
+        k = getattr(retriever, "search_kwargs", {}).get("k", 4)
+        # クエリの埋め込みと FAISS 検索は retrieval プールで（既定のスレッドプールを他と取り合わない）
+        return await run_blocking(
+            "retrieval", vectorstore.similarity_search_with_relevance_scores, japanese_question, k=k
+        )
+
+    # ----------- Speculative prefetch -----------
+    async def prefetch(self, user_input: str) -> list:
+        """Side-effect-free retrieval run in parallel with the agent's first LLM call."""
+        japanese_question = await run_blocking("io", self._translate_to_japanese, user_input)
+        return await self._aretrieve(japanese_question)
 
     # ----------- Helper -----------
     def _format_results(self, results: list) -> str:
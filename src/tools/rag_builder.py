@@ -2,10 +2,36 @@ import os
 import pandas as pd
 from typing import Any, List
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
 from langchain.text_splitter import CharacterTextSplitter
 from langchain.docstore.document import Document
 from src.helpers.conf_loader import RAG_CONF, MODELS_CONF
+from src.helpers.executors import executors
+from src.llm.llm_registry import llm_registry
+from src.tools.faiss_store import is_saved, load_index, rollback_index, save_index
+from src.tools.rag_watcher import SwappableRetriever
+
+
+def load_documents(source_data: str, name: str) -> List[Document]:
+    df = pd.read_excel(source_data)
+    return [
+        Document(
+            page_content=f"Question: {row['Question']}\nAnswer: {row['Answer']}",
+            metadata={"Category": row.get("Category", ""), "Source": name},
+        )
+        for _, row in df.iterrows()
+    ]
+
+
+def split_documents(docs: List[Document], chunk_size: int, chunk_overlap: int) -> List[Document]:
+    splitter = CharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return [Document(page_content=chunk, metadata=doc.metadata)
+            for doc in docs for chunk in splitter.split_text(doc.page_content)]
+
+
+def load_chunks(source_data: str, name: str, chunk_size: int, chunk_overlap: int) -> List[Document]:
+    """Module-level so the cpu process pool can pickle it."""
+    return split_documents(load_documents(source_data, name), chunk_size, chunk_overlap)
+
 
 class RAGBuilder:
     def __init__(self, name: str, config: dict, embedding_model: str, chunk_size: int, chunk_overlap: int):
@@ -13,26 +39,29 @@ class RAGBuilder:
         self.source_data = config["source_data"]
         self.vector_db = config["vector_db"]
         self.track_file = config["track_file"]
+        if llm_registry.mode == "offline":
+            # オフラインの埋め込みは次元が違うので、本番のインデックスとは別に保存する
+            self.vector_db = f"{self.vector_db}_offline"
+            self.track_file = f"{os.path.splitext(self.track_file)[0]}_offline.txt"
         self.embedding_model = embedding_model
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-        self.embedding = OpenAIEmbeddings(model=embedding_model)
+        self.embedding = llm_registry.embeddings(embedding_model)
 
     def _load_documents(self) -> List[Document]:
-        df = pd.read_excel(self.source_data)
-        docs = [
-            Document(
-                page_content=f"Question: {row['Question']}\nAnswer: {row['Answer']}",
-                metadata={"Category": row.get("Category", ""), "Source": self.name},
-            )
-            for _, row in df.iterrows()
-        ]
-        return docs
+        return load_documents(self.source_data, self.name)
 
     def _split_documents(self, docs: List[Document]) -> List[Document]:
-        splitter = CharacterTextSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
-        return [Document(page_content=chunk, metadata=doc.metadata)
-                for doc in docs for chunk in splitter.split_text(doc.page_content)]
+        return split_documents(docs, self.chunk_size, self.chunk_overlap)
+
+    def _load_chunks(self, offload: bool = False) -> List[Document]:
+        if not offload:
+            # 起動時はイベントループもまだ動いていないので、プロセスを起こさずそのまま読む
+            return load_chunks(self.source_data, self.name, self.chunk_size, self.chunk_overlap)
+        # 稼働中の作り直しでは xlsx の読み込みと分割（CPU 処理）を cpu プール（別プロセス）で行い、GIL を取り合わない
+        return executors.submit(
+            "cpu", load_chunks, self.source_data, self.name, self.chunk_size, self.chunk_overlap
+        ).result()
 
     def _get_file_timestamp(self) -> str:
         return str(os.path.getmtime(self.source_data))
@@ -45,21 +74,45 @@ class RAGBuilder:
             old = f.read().strip()
         return current != old
 
-    def _save_timestamp(self):
+    def _save_timestamp(self, timestamp: str = None):
         with open(self.track_file, "w") as f:
-            f.write(self._get_file_timestamp())
+            f.write(timestamp or self._get_file_timestamp())
+
+    def load_saved(self):
+        """Retriever over the index already on disk (memory-mapped, no pickle)."""
+        return load_index(self.vector_db, self.embedding).as_retriever()
+
+    def rollback_saved(self) -> bool:
+        """Make the previous saved generation current, so followers and the next start use it too."""
+        generation = rollback_index(self.vector_db)
+        if generation is None:
+            return False
+        # 他のワーカーは track_file の更新を見て読み直す（中身の更新時刻は元データのまま）
+        os.utime(self.track_file)
+        return True
+
+    def rebuild(self, offload: bool = False):
+        """Build a fresh index from source_data, save it, and return its retriever.
+
+        offload=True (the watcher, while serving) parses the xlsx on the cpu pool.
+        """
+        timestamp = self._get_file_timestamp()
+        docs = self._load_chunks(offload)
+        if not docs:
+            raise ValueError(f"[{self.name}] no documents in {self.source_data}")
+        faiss_store = FAISS.from_documents(docs, self.embedding)
+        save_index(faiss_store, self.vector_db)
+        # 読み込み開始時点の更新時刻を書く（ビルド中にまた更新されたら次の検知で作り直す）
+        self._save_timestamp(timestamp)
+        # 作ったものをそのまま使わず mmap で開き直し、ヒープ上のコピーを手放す
+        return self.load_saved()
 
     def create_or_load_vectorstore(self):
-        if os.path.exists(self.vector_db) and not self._is_updated():
+        if is_saved(self.vector_db) and not self._is_updated():
             print(f"[{self.name}] Loading existing FAISS index...")
-            faiss_store = FAISS.load_local(self.vector_db, self.embedding, allow_dangerous_deserialization=True)
-        else:
-            print(f"[{self.name}] Creating new FAISS index...")
-            docs = self._split_documents(self._load_documents())
-            faiss_store = FAISS.from_documents(docs, self.embedding)
-            faiss_store.save_local(self.vector_db)
-            self._save_timestamp()
-        return faiss_store.as_retriever()
+            return self.load_saved()
+        print(f"[{self.name}] Creating new FAISS index...")
+        return self.rebuild()
 
 def build_all_retrievers():
     retrievers = {}
@@ -71,5 +124,6 @@ def build_all_retrievers():
             chunk_size=MODELS_CONF["embedding"]["chunk_size"],
             chunk_overlap=MODELS_CONF["embedding"]["chunk_overlap"],
         )
-        retrievers[dataset["name"]] = builder.create_or_load_vectorstore()
+        # ツールは入れ物を持ち、RAGWatcher が作り直した索引に差し替える
+        retrievers[dataset["name"]] = SwappableRetriever(dataset["name"], builder.create_or_load_vectorstore(), builder)
     return retrievers
\ No newline at end of file
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import time
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional
+
+from src.helpers.env_loader import WORKER_ID
+from src.helpers.executors import run_blocking
+from src.helpers.logger import logger
+
+# RAG の元データ（xlsx）の更新を監視し、裏で索引を作り直して稼働中のツールに差し替える
+
+rag_reload_stats: Counter = Counter()
+
+
+class SwappableRetriever:
+    """What InformationTool holds; points at the current retriever and keeps the previous ones."""
+
+    def __init__(self, name: str, retriever: Any, builder: Any = None, keep: int = 2):
+        self.name = name
+        self.builder = builder
+        self.current = retriever
+        self.version = 1
+        self.swapped_at = time.time()
+        self._history = deque([(1, retriever)], maxlen=keep)
+        self._last_version = 1   # rollback 後も番号を使い回さない
+
+    def swap(self, retriever: Any) -> int:
+        """Point at a new retriever; a single attribute store, so readers see old or new."""
+        self._last_version += 1
+        version = self._last_version
+        self._history.append((version, retriever))
+        self.version, self.current = version, retriever
+        self.swapped_at = time.time()
+        return version
+
+    def rollback(self) -> bool:
+        """Go back to the previous retriever if one is kept."""
+        if len(self._history) < 2:
+            return False
+        self._history.pop()
+        self.version, self.current = self._history[-1]
+        self.swapped_at = time.time()
+        return True
+
+    # 差し替え前のコードが retriever として直接使っても動くように委譲する
+    @property
+    def vectorstore(self):
+        return getattr(self.current, "vectorstore", None)
+
+    @property
+    def search_kwargs(self) -> dict:
+        return getattr(self.current, "search_kwargs", {})
+
+    def invoke(self, *args, **kwargs):
+        return self.current.invoke(*args, **kwargs)
+
+    async def ainvoke(self, *args, **kwargs):
+        return await self.current.ainvoke(*args, **kwargs)
+
+    def status(self) -> Dict[str, Any]:
+        vectorstore = self.vectorstore
+        return {
+            "version": self.version,
+            "versions_kept": [v for v, _ in self._history],
+            "documents": vectorstore.index.ntotal if vectorstore is not None else None,
+            "swapped_at": self.swapped_at,
+        }
+
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _validate(retriever: Any, probe: str):
+    """Reject an empty or unusable index before it replaces a working one."""
+    vectorstore = getattr(retriever, "vectorstore", None)
+    if vectorstore is not None and vectorstore.index.ntotal == 0:
+        raise ValueError("index is empty")
+    retriever.invoke(probe)
+    return retriever
+
+
+class RAGWatcher:
+    """Polls source files and hot-swaps rebuilt retrievers.
+
+    Only worker 0 rebuilds (embedding costs API calls); other workers watch the
+    track file it writes last and reload the saved index.
+    """
+
+    def __init__(self, retrievers: Dict[str, SwappableRetriever], interval: float = 2.0,
+                 settle: float = 1.0, probe: str = "受付"):
+        self.retrievers = {name: r for name, r in retrievers.items() if r.builder is not None}
+        self.interval = interval
+        self.settle = settle
+        self.probe = probe
+        self.leader = WORKER_ID == "0"
+        self._locks = {name: asyncio.Lock() for name in self.retrievers}
+        self._task: Optional[asyncio.Task] = None
+
+    def _watched_path(self, retriever: SwappableRetriever) -> str:
+        return retriever.builder.source_data if self.leader else retriever.builder.track_file
+
+    def start(self):
+        if self._task is None and self.retrievers:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"RAG 監視を開始しました: {list(self.retrievers)} ({'rebuild' if self.leader else 'reload'})")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        known = {name: _mtime(self._watched_path(r)) for name, r in self.retrievers.items()}
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.time()
+            for name, retriever in self.retrievers.items():
+                mtime = _mtime(self._watched_path(retriever))
+                if mtime is None or mtime == known[name]:
+                    continue
+                # 保存途中のファイルを読まないよう、更新が落ち着くまで待つ
+                if now - mtime < self.settle:
+                    continue
+                known[name] = mtime
+                await self.reload(name)
+
+    async def reload(self, name: str) -> bool:
+        """Rebuild (leader) or reload (follower) one dataset and swap it in; keeps the old one on failure."""
+        retriever = self.retrievers[name]
+        async with self._locks[name]:
+            started = time.perf_counter()
+            try:
+                if self.leader:
+                    fresh = await run_blocking("io", retriever.builder.rebuild, offload=True)
+                else:
+                    fresh = await run_blocking("io", retriever.builder.load_saved)
+                await run_blocking("retrieval", _validate, fresh, self.probe)
+            except Exception as e:
+                rag_reload_stats["failed"] += 1
+                logger.error(f"[{name}] 索引の作り直しに失敗しました。v{retriever.version} のまま継続します: {e}")
+                return False
+            version = retriever.swap(fresh)
+            rag_reload_stats["swapped"] += 1
+            logger.info(f"[{name}] 索引を v{version} に差し替えました ({(time.perf_counter() - started) * 1000:.0f}ms)")
+            return True
+
+    def rollback(self, name: str) -> bool:
+        """Serve the previous version; the leader also makes it the saved one (followers, next start)."""
+        retriever = self.retrievers[name]
+        if not retriever.rollback():
+            return False
+        if self.leader:
+            try:
+                retriever.builder.rollback_saved()
+            except OSError as e:
+                logger.error(f"[{name}] 保存済み索引を戻せませんでした。次回起動時は新しい索引になります: {e}")
+        rag_reload_stats["rolled_back"] += 1
+        logger.warning(f"[{name}] 索引を v{retriever.version} に戻しました")
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return {name: r.status() for name, r in self.retrievers.items()}
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.retrievers)
@@ -8,9 +8,11 @@ from langchain.callbacks.manager import (
 from langchain.tools import BaseTool
 from pydantic.v1 import BaseModel
 
+from src.agent.tool_prefetcher import take_prefetched
 from src.api.websocket_manager import WebSocketManager
 from src.agent.session_manager import ChatSessionManager
 from src.helpers.enums import ActionType
+from src.helpers.env_loader import WEATHER_API_URL
 from src.message_templates.websocket_message_template import WebsocketMessageTemplate
 
 
@@ -31,7 +33,7 @@ class ShowWeatherTool(BaseTool):
         """Get weather forecast using Open-Meteo API"""
         try:
             url = (
-                f"https://api.open-meteo.com/v1/forecast?"
+                f"{WEATHER_API_URL}?"
                 f"latitude={lat}&longitude={lon}&current=temperature_2m,weather_code,wind_speed_10m"
                 f"&daily=temperature_2m_max,temperature_2m_min,precipitation_sum&timezone=auto"
             )
@@ -43,6 +45,18 @@ class ShowWeatherTool(BaseTool):
             print(f"Weather fetch error: {e}")
         return None
 
+    def _location_key(self, location: dict) -> str:
+        return f"{location['lat']},{location['lon']}"
+
+    def prefetch_key(self, user_input: str) -> str:
+        """The forecast depends only on the kiosk location, not on how the question was worded."""
+        return self._location_key(self.ws_manager.get_location_data().to_dict())
+
+    async def prefetch(self, user_input: str) -> Optional[dict]:
+        """Fetch the forecast in parallel with the agent's first LLM call."""
+        location = self.ws_manager.get_location_data().to_dict()
+        return await self.get_weather_forecast(location["lat"], location["lon"])
+
     def get_weather_website_url(self, location: dict) -> str:
         """Return JMA weather forecast page (prefecture-based if possible)"""
         # Mapping of prefectures to JMA area codes
@@ -163,7 +177,9 @@ class ShowWeatherTool(BaseTool):
         """Main execution: detect location, get weather, format + send"""
         location = self.ws_manager.get_location_data().to_dict()
         print(f"Retrieved location data in ShowWeatherTool: {location}")
-        weather = await self.get_weather_forecast(location["lat"], location['lon'])
+        weather = await take_prefetched(self.name, key=self._location_key(location))
+        if weather is None:
+            weather = await self.get_weather_forecast(location["lat"], location['lon'])
         website_url = self.get_weather_website_url(location)
         response_message = self.format_weather_message(location, weather, website_url)
 
@@ -0,0 +1,58 @@
+import io
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from src.agent.context_variables import ContextMemory
+from src.helpers.analytics_store import AnalyticsStore
+
+
+def _session(session_id: str, started: datetime, question: str) -> ContextMemory:
+    ctx = ContextMemory(session_id=session_id, button_id="button_1", name="山田")
+    ctx.session_start_time = started
+    ctx.session_end_time = started + timedelta(minutes=3)
+    ctx.turns.record(question, "")
+    ctx.turns.record("", "1階です", tool="faq_tool", latency_ms=900.0, tokens=320)
+    ctx.turns.record("", "1階です")
+    return ctx
+
+
+class TestAnalyticsStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = AnalyticsStore(os.path.join(self.tmp.name, "analytics.db"))
+        today = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+        self.store.record_session(_session("s1", today, "受付はどこ？"), "completed", "ja-JP", "zaitaku")
+        self.store.record_session(_session("s2", today, "受付はどこ？"), "timeout", "ja-JP", "zaitaku")
+        self.store.record_session(_session("s3", today.replace(hour=15), "駐車場は？"), "completed", "en-US", "zaitaku")
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_reports(self):
+        summary = self.store.summary(days=7)
+        self.assertEqual((summary["sessions"], summary["turns"], summary["tokens"]), (3, 9, 960))
+        self.assertEqual(self.store.busiest_hours(days=7)[0]["hour"], 10)
+        top = self.store.top_questions(days=7)
+        self.assertEqual((top[0]["question"], top[0]["asked"]), ("受付はどこ？", 2))
+        latency = self.store.tool_latency(days=7)
+        self.assertEqual({row["tool"]: row["replies"] for row in latency}, {"faq_tool": 3})
+
+    def test_render_log_and_rerecord(self):
+        self.store.record_session(_session("s1", datetime.now(), "トイレは？"), "interrupted", note="中断")
+        text = self.store.render_log("s1")
+        self.assertIn("備考  : 中断", text)
+        self.assertTrue(text.endswith("来訪者: トイレは？\nアバター: 1階です\n"))
+        self.assertIsNone(self.store.render_log("missing"))
+        # 記録し直しても日次集計が二重にならない
+        self.assertEqual(self.store.tool_latency(days=7)[0]["replies"], 3)
+
+        out = io.StringIO()
+        self.assertEqual(self.store.export("turns", out, "jsonl"), 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
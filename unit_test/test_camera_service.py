@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from src.capture_image import CameraService, FileCamera
+
+
+class TestCameraService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.frames = os.path.join(self.tmp.name, "frames")
+        os.makedirs(self.frames)
+        for i, shade in enumerate((40, 200)):
+            cv2.imwrite(os.path.join(self.frames, f"{i}.png"), np.full((480, 1280, 3), shade, np.uint8))
+        self.camera = CameraService(f"file:{self.frames}", width=320, ring_size=2,
+                                    folder=os.path.join(self.tmp.name, "out"))
+
+    def tearDown(self):
+        self.camera.close()
+        self.tmp.cleanup()
+
+    def test_capture_writes_resized_jpeg(self):
+        path = self.camera.capture("session_1").result(timeout=5)
+        self.assertEqual(path, os.path.join(self.tmp.name, "out", "session_1.jpg"))
+        self.assertEqual(cv2.imread(path).shape, (120, 320, 3))
+        self.assertEqual(self.camera.backend, "file")
+
+    def test_device_stays_open_and_ring_keeps_latest(self):
+        frames = [self.camera.grab().result(timeout=5) for _ in range(4)]
+        self.assertEqual(self.camera.stats["opens"], 1)
+        self.assertEqual(len(self.camera.frames), 2)
+        self.assertIs(self.camera.latest(), frames[-1])
+        self.assertIsNone(self.camera.latest(max_age=-1))
+
+    def test_buffered_frames_are_drained_before_capture(self):
+        class BufferedCamera:
+            # ドライバのバッファに古いフレームが 3 枚溜まっている状態
+            def __init__(self):
+                self.buffer = [np.full((2, 2, 3), shade, np.uint8) for shade in (1, 2, 3, 4)]
+
+            def grab(self):
+                if len(self.buffer) > 1:
+                    self.buffer.pop(0)
+                return True
+
+            def read(self):
+                return True, self.buffer[0]
+
+            def release(self):
+                pass
+
+        camera = CameraService("unused", drain=4)
+        camera._cap = BufferedCamera()
+        self.assertEqual(int(camera._read()[0, 0, 0]), 4)
+
+    def test_missing_source_fails_the_future(self):
+        camera = CameraService(f"file:{os.path.join(self.tmp.name, 'empty.png')}")
+        with self.assertRaises(RuntimeError):
+            camera.capture("session_2").result(timeout=5)
+        camera.close()
+
+    def test_file_camera_cycles_folder(self):
+        camera = FileCamera(self.frames)
+        shades = [int(camera.read()[1][0, 0, 0]) for _ in range(3)]
+        self.assertEqual(shades, [40, 200, 40])
+
+
+if __name__ == "__main__":
+    unittest.main()
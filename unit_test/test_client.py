@@ -1,39 +1,71 @@
+import argparse
 import asyncio
+import os
+import sys
+
 import websockets
-import json
+
+# python unit_test/test_client.py で直接起動しても src を import できるようにする
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.message_templates import ws_codec  # noqa: E402
 
 # Global variable to store websocket connection
 websocket_connection = None
+# Frame codec negotiated with the server (json / msgpack)
+codec = ws_codec.JSON_CODEC
+# Resume token issued by the server at start_session
+resume_token = None
+closing = False
 
 
-async def websocket_client():
-    """Function to receive messages from the server."""
-    global websocket_connection
+async def websocket_client(encoding: str = "json", deflate: bool = True):
+    """Connect, and reconnect with the resume token after a network drop."""
+    global websocket_connection, codec
     uri = "ws://localhost:8080/ws"  # Your WebSocket server URL
+    subprotocol = ws_codec.MSGPACK_SUBPROTOCOL if encoding == "msgpack" else ws_codec.JSON_SUBPROTOCOL
+    sender = None
 
-    try:
-        async with websockets.connect(uri) as websocket:
-            websocket_connection = websocket  # Store connection
-            print("✅ Connected to WebSocket server.")
-
-            await send_chat_action("button_1","start_session")
-            # Start message listener in background
-            asyncio.create_task(listen_to_server(websocket))
+    while True:
+        url = f"{uri}?resume={resume_token}" if resume_token else uri
+        try:
+            async with websockets.connect(
+                url,
+                subprotocols=[subprotocol],
+                compression="deflate" if deflate else None,
+            ) as websocket:
+                websocket_connection = websocket  # Store connection
+                codec = ws_codec.negotiate([websocket.subprotocol or ws_codec.JSON_SUBPROTOCOL])
+                print(f"✅ Connected to WebSocket server. ({websocket.subprotocol or 'json'})")
+
+                if resume_token is None:
+                    await send_chat_action("button_1","start_session")
+                if sender is None:
+                    # Start sending user input in parallel (kept across reconnects)
+                    sender = asyncio.create_task(send_user_input())
+
+                await listen_to_server(websocket)
 
-            # Start sending user input in parallel
-            await send_user_input(websocket)
+        except Exception as e:
+            print(f"❌ Connection error: {e}")
 
-    except Exception as e:
-        print(f"❌ Connection error: {e}")
+        if closing or not resume_token:
+            break
+        await asyncio.sleep(1)
 
 
 async def listen_to_server(websocket):
     """Continuously listen for messages from the WebSocket server."""
+    global resume_token
     try:
         while True:
             response = await websocket.recv()  # Receive message
-            data = json.loads(response)
-            if "message" in data:
+            data = codec.decode(response)
+            if data.get("action_type") == "session_token":
+                resume_token = data["params"]["token"]
+            elif data.get("action_type") == "end_session":
+                resume_token = None
+            elif "message" in data:
                 print(f"\n💬 Server: {data['message']}\nYou: ", end="")
             else:
                 print(f"\n⚠️ Unknown message: {data}\nYou: ", end="")
@@ -43,14 +75,16 @@ async def listen_to_server(websocket):
         print(f"⚠️ Error receiving message: {e}")
 
 
-async def send_user_input(websocket):
+async def send_user_input():
     """Continuously send user input to the WebSocket server."""
+    global closing
     while True:
         user_input = await asyncio.to_thread(input, "You: ")  # Non-blocking input
         if user_input != "":
             if user_input.lower() == "exit":
                 print("👋 Goodbye! Closing connection.")
-                await websocket.close()
+                closing = True
+                await websocket_connection.close()
                 break
             else:
                 await send_message(user_input)
@@ -65,7 +99,7 @@ async def send_action(action_type: str, params: dict = None):
                 "action_type": action_type,
                 "params": params or {}
             }
-            await websocket_connection.send(json.dumps(payload))
+            await websocket_connection.send(codec.encode(payload))
         except Exception as e:
             print(f"⚠️ Error sending action: {e}")
     else:
@@ -84,7 +118,7 @@ async def send_chat_action(message: str, action_type: str, params: dict = None):
                     "params": params or {}
                 }
             }
-            await websocket_connection.send(json.dumps(payload))
+            await websocket_connection.send(codec.encode(payload))
         except Exception as e:
             print(f"⚠️ Error sending chat action: {e}")
     else:
@@ -95,17 +129,21 @@ async def send_message(message: str):
     global websocket_connection
     if websocket_connection:
         try:
-            await websocket_connection.send(json.dumps({"type": "chat", "message": message}))
+            await websocket_connection.send(codec.encode({"type": "chat", "message": message}))
         except Exception as e:
             print(f"⚠️ Error sending message: {e}")
     else:
         print("⚠️ WebSocket connection is not established. Cannot send message.")
 
 
-async def run_client():
+async def run_client(encoding: str = "json", deflate: bool = True):
     """Run the WebSocket client."""
-    await websocket_client()
+    await websocket_client(encoding, deflate)
 
 
 if __name__ == "__main__":
-    asyncio.run(run_client())
+    parser = argparse.ArgumentParser(description="Kiosk WebSocket test client")
+    parser.add_argument("--encoding", choices=["json", "msgpack"], default="json")
+    parser.add_argument("--no-deflate", action="store_true", help="disable permessage-deflate")
+    args = parser.parse_args()
+    asyncio.run(run_client(args.encoding, not args.no_deflate))
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+import yaml
+
+from src.helpers.conf_loader import ConfigLoader
+
+
+class TestConfigReload(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "conf.yaml")
+        self.write({"dailogue": {"timeout_message": "old", "removed": "x"}})
+        self.loader = ConfigLoader(self.path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, config):
+        with open(self.path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(config, f, allow_unicode=True)
+
+    def test_bound_section_is_refreshed_in_place(self):
+        dailogue = self.loader.section("dailogue")
+        self.write({"dailogue": {"timeout_message": "new"}})
+        self.loader.reload()
+        self.assertIs(self.loader.section("dailogue"), dailogue)
+        self.assertEqual(dailogue, {"timeout_message": "new"})
+
+    def test_missing_section_appears_after_reload(self):
+        camera = self.loader.section("camera")
+        self.assertEqual(camera, {})
+        self.write({"camera": {"drain": 2}})
+        self.loader.reload()
+        self.assertEqual(camera, {"drain": 2})
+        self.assertEqual(self.loader.section("dailogue"), {})
+
+    def test_hooks_see_refreshed_sections(self):
+        dailogue = self.loader.section("dailogue")
+        seen = []
+        self.loader.add_reload_hook(lambda config: seen.append(dailogue.get("timeout_message")))
+        self.write({"dailogue": {"timeout_message": "new"}})
+        self.loader.reload()
+        self.assertEqual(seen, ["new"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+from typing import Any, List, Tuple, Union
+from unittest import mock
+
+from langchain_core.agents import AgentAction, AgentFinish
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from langchain.agents import BaseSingleActionAgent
+
+from src.agent.agent_manager import DirectAnswerExecutor
+from src.agent.session_manager import ChatSessionManager
+from src.llm import rag_answerer
+from src.llm.rag_answerer import condense_answer
+from src.tools.information_tool import InformationTool, answer_path_stats
+
+FAQ = "Answer: 駐車場は本堂の東側にあります。10台まで停められます。満車の場合は近くのコインパーキングをご利用ください。"
+
+
+class ScriptedAgent(BaseSingleActionAgent):
+    """Calls the FAQ tool once, then rephrases whatever the tool returned (the agent round trip)."""
+
+    rounds: int = 0
+
+    @property
+    def input_keys(self) -> List[str]:
+        return ["input"]
+
+    def plan(self, intermediate_steps, **kwargs):
+        raise NotImplementedError
+
+    async def aplan(self, intermediate_steps: List[Tuple[AgentAction, str]], **kwargs: Any) -> Union[AgentAction, AgentFinish]:
+        self.rounds += 1
+        if not intermediate_steps:
+            return AgentAction("information_tool", {"question": kwargs["input"]}, "")
+        return AgentFinish({"output": f"agent: {intermediate_steps[-1][1]}"}, "")
+
+
+class FakeVectorStore:
+
+    def __init__(self, score: float):
+        self.score = score
+
+    def similarity_search_with_relevance_scores(self, query, k=4):
+        return [(Document(page_content=FAQ), self.score)]
+
+
+class FakeRetriever:
+
+    def __init__(self, score: float):
+        self.vectorstore = FakeVectorStore(score)
+        self.search_kwargs = {"k": 1}
+
+
+class FakeLLM:
+    """Stands in for the shared chat model; records the max_tokens bound for each call."""
+
+    def __init__(self, fail: bool = False):
+        self.max_tokens = []
+        self.fail = fail
+
+    def bind(self, max_tokens):
+        self.max_tokens.append(max_tokens)
+
+        def answer(prompt):
+            if self.fail:
+                raise RuntimeError("rate limited")
+            return AIMessage(content=" 駐車場は本堂の東側です。 ")
+
+        return RunnableLambda(answer)
+
+
+class TestDirectAnswer(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.llm = FakeLLM()
+        for patch in (
+            mock.patch.object(rag_answerer, "get_llm", return_value=self.llm),
+            mock.patch.dict(rag_answerer.RAG_CONF, {"direct_answer": {
+                "enabled": True, "min_score": 0.75, "max_chars": 40, "max_tokens": 120, "languages": ["ja"],
+            }}),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+        answer_path_stats.clear()
+
+    async def run_turn(self, score: float) -> Tuple[str, ScriptedAgent]:
+        agent = ScriptedAgent()
+        tool = InformationTool(retriever=FakeRetriever(score), session_manager=ChatSessionManager())
+        executor = DirectAnswerExecutor(agent=agent, tools=[tool])
+        result = await executor.ainvoke({"input": "駐車場はどこですか"})
+        return result["output"], agent
+
+    async def test_confident_hit_ends_the_run_with_the_condensed_faq(self):
+        output, agent = await self.run_turn(0.9)
+        self.assertEqual(output, "駐車場は本堂の東側にあります。10台まで停められます。")
+        self.assertEqual(agent.rounds, 1)
+        self.assertEqual(self.llm.max_tokens, [])
+        self.assertEqual(answer_path_stats["direct"], 1)
+
+    async def test_weak_hit_uses_one_llm_call(self):
+        output, agent = await self.run_turn(0.5)
+        self.assertEqual(output, "駐車場は本堂の東側です。")
+        self.assertEqual(agent.rounds, 1)
+        self.assertEqual(self.llm.max_tokens, [120])
+        self.assertEqual(answer_path_stats["single_llm"], 1)
+
+    async def test_llm_failure_falls_back_to_the_agent_round_trip(self):
+        self.llm.fail = True
+        output, agent = await self.run_turn(0.5)
+        self.assertTrue(output.startswith("agent: 駐車場は本堂の東側にあります。"))
+        self.assertEqual(agent.rounds, 2)
+        self.assertEqual(answer_path_stats["agent"], 1)
+
+    async def test_max_tokens_follows_config_reload(self):
+        rag_answerer.RAG_CONF["direct_answer"]["max_tokens"] = 60
+        await self.run_turn(0.5)
+        self.assertEqual(self.llm.max_tokens, [60])
+
+    def test_condense_keeps_whole_sentences(self):
+        self.assertEqual(condense_answer("一文目です。二文目です。", max_chars=8), "一文目です。")
+        self.assertEqual(condense_answer("とても長い一文だけの回答です", max_chars=5), "とても長い一文だけの回答です")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import asyncio
+import math
+import time
+import unittest
+
+from src.helpers.executors import ExecutorPool, Executors
+
+
+class TestExecutors(unittest.IsolatedAsyncioTestCase):
+
+    async def test_thread_pool_keeps_loop_responsive(self):
+        pool = ExecutorPool("io", workers=2)
+        loop = asyncio.get_running_loop()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await asyncio.gather(*(pool.run(time.sleep, 0.05) for _ in range(2)))
+        task.cancel()
+        self.assertGreater(ticks, 3)
+        pool.shutdown()
+
+    async def test_saturation_is_counted(self):
+        pool = ExecutorPool("io", workers=1, warn_wait_ms=10_000)
+        await asyncio.gather(*(pool.run(time.sleep, 0.02) for _ in range(3)))
+        stats = pool.stats()
+        self.assertEqual(stats["submitted"], 3)
+        self.assertEqual(stats["saturated"], 2)
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertGreaterEqual(stats["max_wait_ms"], 20)
+        pool.shutdown()
+
+    async def test_process_pool_and_errors(self):
+        executors = Executors({"pools": {"cpu": {"kind": "process", "workers": 1}}})
+        self.assertEqual(await executors.pool("cpu").run(math.factorial, 20), math.factorial(20))
+        with self.assertRaises(ValueError):
+            await executors.pool("cpu").run(math.factorial, -1)
+        # 同期コードからも使える
+        self.assertEqual(executors.submit("io", sum, [1, 2, 3]).result(), 6)
+        executors.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from langchain.docstore.document import Document
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from src.llm.offline_openai import hash_embedding
+from src.tools.faiss_store import CURRENT_FILE, is_saved, load_index, rollback_index, save_index
+
+
+class HashEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [hash_embedding(t, 64) for t in texts]
+
+    def embed_query(self, text):
+        return hash_embedding(text, 64)
+
+
+class TestFaissStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "faq_index")
+        self.docs = [
+            Document(page_content="Question: 受付はどこですか\nAnswer: 1階です", metadata={"Category": "案内"}),
+            Document(page_content="Question: 駐車場はありますか\nAnswer: 地下にあります", metadata={"Category": "設備"}),
+        ]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip_without_pickle(self):
+        self.assertFalse(is_saved(self.path))
+        store = FAISS.from_documents(self.docs, HashEmbeddings())
+        save_index(store, self.path)
+
+        self.assertTrue(is_saved(self.path))
+        folder = os.path.join(self.path, open(os.path.join(self.path, CURRENT_FILE)).read())
+        self.assertFalse(any(name.endswith(".pkl") for name in os.listdir(folder)))
+
+        loaded = load_index(self.path, HashEmbeddings())
+        self.assertEqual(loaded.index.ntotal, 2)
+        hit = loaded.similarity_search(self.docs[1].page_content, k=1)[0]
+        self.assertEqual(hit.page_content, self.docs[1].page_content)
+        self.assertEqual(hit.metadata, {"Category": "設備"})
+
+    def test_old_generations_are_pruned(self):
+        store = FAISS.from_documents(self.docs, HashEmbeddings())
+        for _ in range(4):
+            save_index(store, self.path)
+        generations = [n for n in os.listdir(self.path) if os.path.isdir(os.path.join(self.path, n))]
+        self.assertEqual(len(generations), 2)
+
+    def test_rollback_repoints_current_and_survives_next_save(self):
+        store = FAISS.from_documents(self.docs, HashEmbeddings())
+        first = save_index(store, self.path)
+        save_index(FAISS.from_documents(self.docs[:1], HashEmbeddings()), self.path)
+        self.assertEqual(rollback_index(self.path), first)
+        self.assertIsNone(rollback_index(self.path))
+        self.assertEqual(load_index(self.path, HashEmbeddings()).index.ntotal, 2)
+
+        # 戻した世代は次の保存でも直前の世代として残る
+        save_index(store, self.path)
+        self.assertTrue(os.path.isdir(os.path.join(self.path, first)))
+
+
+if __name__ == "__main__":
+    unittest.main()
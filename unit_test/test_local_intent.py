@@ -0,0 +1,76 @@
+import math
+import unittest
+
+import numpy as np
+
+from src.helpers.conf_loader import MODELS_CONF
+from src.llm.local_intent import (
+    CONFIDENCE_THRESHOLD,
+    LABELS,
+    LocalIntentClassifier,
+    classify_correction,
+    classify_yesno,
+    get_intent_classifier,
+)
+
+
+def fixed_classifier(label: str, confidence: float, threshold: float = CONFIDENCE_THRESHOLD) -> LocalIntentClassifier:
+    """A classifier that answers `label` with exactly `confidence` for any reply starting with "x"."""
+    classifier = LocalIntentClassifier(threshold)
+    classifier.vocabulary = {"^x": 0}
+    classifier.weights = np.zeros((1, len(LABELS)))
+    rest = (1.0 - confidence) / (len(LABELS) - 1)
+    classifier.bias = np.array([math.log(confidence if l == label else rest) for l in LABELS])
+    return classifier
+
+
+class TestLocalIntent(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.classifier = get_intent_classifier()
+
+    def test_lexicon_labels(self):
+        for text, label in (("はい。", "confirmation"), ("いいえ", "decline"), ("違います！", "correction")):
+            self.assertEqual(self.classifier.predict(text), (label, 1.0, True), text)
+
+    def test_model_labels(self):
+        # 辞書に無い言い回しはモデルで分類する
+        for text, label in (
+            ("それでいいです", "confirmation"),
+            ("やめておきます", "decline"),
+            ("名前が違います", "correction"),
+        ):
+            prediction = self.classifier.predict(text)
+            self.assertEqual(prediction.label, label, text)
+            self.assertTrue(prediction.confident, prediction)
+
+    def test_unknown_is_left_to_the_llm(self):
+        prediction = self.classifier.predict("えっと")
+        self.assertEqual(prediction.label, "unknown")
+        self.assertFalse(prediction.confident)
+        self.assertFalse(self.classifier.predict("").confident)
+        self.assertFalse(self.classifier.predict("🙂").confident)
+
+    def test_below_threshold_defers(self):
+        prediction = fixed_classifier("decline", 0.6).predict("xyz")
+        self.assertEqual(prediction.label, "decline")
+        self.assertAlmostEqual(prediction.confidence, 0.6)
+        self.assertFalse(prediction.confident)
+
+    def test_threshold_is_point_eight(self):
+        self.assertEqual(MODELS_CONF["local_intent"]["threshold"], 0.8)
+        self.assertEqual(CONFIDENCE_THRESHOLD, 0.8)
+        self.assertEqual(self.classifier.threshold, 0.8)
+        self.assertFalse(fixed_classifier("confirmation", 0.79).predict("xyz").confident)
+        self.assertTrue(fixed_classifier("confirmation", 0.81).predict("xyz").confident)
+        self.assertFalse(fixed_classifier("confirmation", 0.81, threshold=0.9).predict("xyz").confident)
+
+    def test_yesno_and_correction_views(self):
+        self.assertEqual(classify_yesno("名前が違います").label, "decline")
+        self.assertEqual(classify_correction("やめておきます").label, "correction")
+        self.assertEqual(classify_yesno("はい").label, "confirmation")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+
+import httpx
+from langchain_core.messages import HumanMessage
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+
+from src.llm.offline_openai import OfflineOpenAITransport, hash_embedding
+
+FUNCTIONS = [
+    {"name": "weather_info", "description": "天気", "parameters": {"type": "object", "properties": {}}},
+    {"name": "faq_tool", "description": "FAQ", "parameters": {"type": "object", "properties": {"question": {"type": "string"}}}},
+]
+
+
+class TestOfflineOpenAI(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.transport = OfflineOpenAITransport()
+
+    def _llm(self, transport=None, **kwargs):
+        transport = transport or self.transport
+        return ChatOpenAI(
+            api_key="sk-offline",
+            model="gpt-4o-mini",
+            http_client=httpx.Client(transport=transport),
+            http_async_client=httpx.AsyncClient(transport=transport),
+            **kwargs,
+        )
+
+    async def test_function_call(self):
+        reply = await self._llm().bind(functions=FUNCTIONS).ainvoke([HumanMessage("今日の天気は？")])
+        self.assertEqual(reply.additional_kwargs["function_call"]["name"], "weather_info")
+
+        reply = await self._llm().bind(functions=FUNCTIONS).ainvoke([HumanMessage("会社の電話番号は？")])
+        call = reply.additional_kwargs["function_call"]
+        self.assertEqual(call["name"], "faq_tool")
+        self.assertEqual(json.loads(call["arguments"]), {"question": "会社の電話番号は？"})
+
+    async def test_streaming(self):
+        chunks = [c.content async for c in self._llm(streaming=True).astream([HumanMessage("案内して")])]
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), "かしこまりました。")
+
+    def test_replay(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "recordings.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"match": "こんにちは", "message": {"role": "assistant", "content": "ようこそ"}}) + "\n")
+            transport = OfflineOpenAITransport(recordings=path)
+            self.assertEqual(self._llm(transport).invoke([HumanMessage("こんにちは！")]).content, "ようこそ")
+            self.assertEqual(transport.calls["replayed"], 1)
+
+    def test_embeddings_are_deterministic(self):
+        embeddings = OpenAIEmbeddings(
+            api_key="sk-offline",
+            http_client=httpx.Client(transport=self.transport),
+            check_embedding_ctx_length=False,
+        )
+        vectors = embeddings.embed_documents(["トイレはどこですか", "駐車場"])
+        self.assertEqual(vectors[0], hash_embedding("トイレはどこですか"))
+        self.assertEqual(embeddings.embed_query("駐車場"), vectors[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+from src.helpers.enums import PhoneType
+from src.helpers.phone_validator import (
+    is_valid_japanese_phone_number,
+    validate_phone_number,
+    validate_phone_numbers,
+)
+
+
+class TestPhoneValidator(unittest.TestCase):
+
+    def test_mobile(self):
+        result = validate_phone_number("09012345678")
+        self.assertTrue(result.valid)
+        self.assertEqual(result.phone_type, PhoneType.MOBILE)
+        self.assertEqual(result.formatted, "090-1234-5678")
+        self.assertEqual(result.e164, "+819012345678")
+
+    def test_area_code_lengths(self):
+        self.assertEqual(validate_phone_number("0334567890").formatted, "03-3456-7890")
+        self.assertEqual(validate_phone_number("0452234567").formatted, "045-223-4567")
+        self.assertEqual(validate_phone_number("0172223456").formatted, "0172-22-3456")
+        self.assertEqual(validate_phone_number("0126723456").formatted, "01267-2-3456")
+
+    def test_free_dial_and_ip(self):
+        self.assertEqual(validate_phone_number("0120-123-456").phone_type, PhoneType.FREE_DIAL)
+        self.assertEqual(validate_phone_number("0800-123-4567").phone_type, PhoneType.FREE_DIAL)
+        self.assertEqual(validate_phone_number("050-1234-5678").phone_type, PhoneType.IP)
+        self.assertFalse(validate_phone_number("0120-123-4567").valid)
+
+    def test_free_and_navi_dial_are_not_callback_numbers(self):
+        # 番号としては正しいが、来訪者の連絡先としては受け付けない
+        self.assertTrue(validate_phone_number("0570-123-456").valid)
+        self.assertFalse(is_valid_japanese_phone_number("0120-123-456"))
+        self.assertFalse(is_valid_japanese_phone_number("0800-123-4567"))
+        self.assertFalse(is_valid_japanese_phone_number("0570-123-456"))
+        self.assertTrue(is_valid_japanese_phone_number("050-1234-5678"))
+
+    def test_normalization(self):
+        self.assertEqual(validate_phone_number("０９０－１２３４－５６７８").digits, "09012345678")
+        self.assertEqual(validate_phone_number("〇九〇一二三四五六七八").digits, "09012345678")
+        self.assertEqual(validate_phone_number("+81 3 3456 7890").formatted, "03-3456-7890")
+
+    def test_invalid(self):
+        self.assertFalse(is_valid_japanese_phone_number("090-1234"))
+        self.assertFalse(is_valid_japanese_phone_number("abc-1234-5678"))
+        self.assertFalse(is_valid_japanese_phone_number("0310345678"))
+        self.assertFalse(is_valid_japanese_phone_number("0201234567"))
+
+    def test_batch(self):
+        results = validate_phone_numbers(["090-1234-5678", "123", "090-1234-5678"])
+        self.assertEqual([r.valid for r in results], [True, False, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+from src.tools.rag_watcher import RAGWatcher, SwappableRetriever
+
+
+class FakeRetriever:
+    def __init__(self, answer: str):
+        self.answer = answer
+
+    def invoke(self, query):
+        return [self.answer]
+
+
+class FakeBuilder:
+    source_data = "missing.xlsx"
+    track_file = "missing.txt"
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.rolled_back = 0
+
+    def rebuild(self, offload=False):
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    load_saved = rebuild
+
+    def rollback_saved(self):
+        self.rolled_back += 1
+        return True
+
+
+class TestRAGWatcher(unittest.IsolatedAsyncioTestCase):
+
+    def test_swap_and_rollback(self):
+        holder = SwappableRetriever("faq", FakeRetriever("v1"))
+        self.assertFalse(holder.rollback())
+        self.assertEqual(holder.swap(FakeRetriever("v2")), 2)
+        self.assertEqual(holder.invoke("q"), ["v2"])
+        self.assertTrue(holder.rollback())
+        self.assertEqual(holder.version, 1)
+        self.assertEqual(holder.invoke("q"), ["v1"])
+        # 戻した後の差し替えでも番号は使い回さない
+        self.assertEqual(holder.swap(FakeRetriever("v3")), 3)
+
+    async def test_rollback_is_persisted_by_the_leader(self):
+        builder = FakeBuilder([FakeRetriever("v2")])
+        holder = SwappableRetriever("faq", FakeRetriever("v1"), builder)
+        watcher = RAGWatcher({"faq": holder})
+        watcher.leader = True
+        self.assertTrue(await watcher.reload("faq"))
+        self.assertTrue(watcher.rollback("faq"))
+        self.assertEqual((holder.invoke("q"), builder.rolled_back), (["v1"], 1))
+
+    async def test_failed_rebuild_keeps_serving_old_index(self):
+        builder = FakeBuilder([RuntimeError("broken xlsx"), FakeRetriever("v2")])
+        holder = SwappableRetriever("faq", FakeRetriever("v1"), builder)
+        watcher = RAGWatcher({"faq": holder})
+
+        self.assertFalse(await watcher.reload("faq"))
+        self.assertEqual(holder.invoke("q"), ["v1"])
+
+        self.assertTrue(await watcher.reload("faq"))
+        self.assertEqual(watcher.status()["faq"]["version"], 2)
+        self.assertEqual(holder.invoke("q"), ["v2"])
+
+    def test_datasets_without_builder_are_not_watched(self):
+        watcher = RAGWatcher({"faq": SwappableRetriever("faq", FakeRetriever("v1"))})
+        self.assertEqual(watcher.names, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import asyncio
+import unittest
+
+from src.api.response_waiter import ResponseWaiter, WaitResult
+from src.helpers.enums import WaitOutcome
+
+
+class TestResponseWaiter(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.waiter = ResponseWaiter()
+
+    async def test_reply(self):
+        task = asyncio.create_task(self.waiter.wait(1.0))
+        await asyncio.sleep(0)
+        self.assertTrue(self.waiter.waiting)
+        self.assertTrue(self.waiter.submit(" 田中です "))
+        self.assertEqual(await task, WaitResult(WaitOutcome.RESPONSE, "田中です"))
+        self.assertFalse(self.waiter.waiting)
+        self.assertFalse(self.waiter.submit("late"))
+
+    async def test_timeout(self):
+        result = await self.waiter.wait(0.02)
+        self.assertIs(result.outcome, WaitOutcome.TIMEOUT)
+        self.assertFalse(result.responded)
+
+    async def test_session_end(self):
+        task = asyncio.create_task(self.waiter.wait(1.0))
+        await asyncio.sleep(0)
+        self.waiter.end_session()
+        self.assertIs((await task).outcome, WaitOutcome.SESSION_ENDED)
+
+    async def test_touch_storm_extends_deadline(self):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        task = asyncio.create_task(self.waiter.wait(0.05))
+        # 0.2 秒間、1ms ごとにタッチし続ける
+        while loop.time() - start < 0.2:
+            self.waiter.touch()
+            await asyncio.sleep(0.001)
+        self.assertFalse(task.done())
+        result = await task
+        self.assertIs(result.outcome, WaitOutcome.TIMEOUT)
+        self.assertGreaterEqual(loop.time() - start, 0.25)
+        self.assertGreater(self.waiter.touches, 50)
+        # タッチの回数ではなく、締め切りを過ぎた回数だけ張り直す
+        self.assertLessEqual(self.waiter.rearms, 6)
+
+    async def test_touch_storm_then_reply(self):
+        task = asyncio.create_task(self.waiter.wait(0.05))
+        for _ in range(1000):
+            self.waiter.touch()
+        await asyncio.sleep(0)
+        self.waiter.submit("はい")
+        self.assertEqual((await task).text, "はい")
+
+    async def test_single_waiter(self):
+        task = asyncio.create_task(self.waiter.wait(1.0))
+        await asyncio.sleep(0)
+        with self.assertRaises(RuntimeError):
+            await self.waiter.wait(1.0)
+        self.waiter.end_session()
+        await task
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from unittest import mock
+
+from src.llm import llm_manager
+from src.llm.rule_extractor import parse_name, parse_phone, parse_purpose
+from src.llm.structured_extractor import VisitorUtterance
+
+
+class TestRuleExtractor(unittest.TestCase):
+
+    def test_phone_full_width_digits(self):
+        self.assertEqual(parse_phone("０９０－１２３４－５６７８"), ("09012345678", True))
+
+    def test_phone_with_filler(self):
+        self.assertEqual(parse_phone("電話番号は090ー1234ー5678です"), ("09012345678", True))
+
+    def test_phone_country_code(self):
+        self.assertEqual(parse_phone("+81 90 1234 5678"), ("09012345678", True))
+
+    def test_phone_multiple_numbers_defers_to_llm(self):
+        self.assertFalse(parse_phone("携帯は090-1234-5678、会社は03-1234-5678").confident)
+
+    def test_phone_without_digits_defers_to_llm(self):
+        self.assertEqual(parse_phone("ぜろきゅうぜろ"), (None, False))
+
+    def test_name_patterns(self):
+        self.assertEqual(parse_name("田中です"), ("田中", True))
+        self.assertEqual(parse_name("はい、ステラリンクの山田と申します"), ("ステラリンクの山田", True))
+
+    def test_name_rejects_stopwords(self):
+        self.assertFalse(parse_name("法事の相談です").confident)
+        self.assertFalse(parse_name("大丈夫です").confident)
+
+    def test_name_rejects_hiragana_for_every_suffix(self):
+        self.assertEqual(parse_name("お届け物になります"), (None, False))
+        self.assertEqual(parse_name("鈴木になります"), ("鈴木", True))
+
+    def test_name_rejects_non_name_tokens(self):
+        for text in ("了解です", "OKです", "090-1234-5678です", "3人です", "ミヤットです", "原因です"):
+            self.assertFalse(parse_name(text).confident, text)
+        self.assertEqual(parse_name("ミヤットと申します"), ("ミヤット", True))
+        self.assertEqual(parse_name("石材店の松本です"), ("石材店の松本", True))
+        self.assertEqual(parse_name("田中太郎です"), ("田中太郎", True))
+
+    def test_purpose_keyword_priority(self):
+        self.assertEqual(parse_purpose("睡蓮墓地の購入について"), ("睡蓮墓地のご相談", True))
+        self.assertEqual(parse_purpose("樹木葬について教えてください"), ("樹木葬墓地のご相談", True))
+        # 一般ルールは LLM が目的を返さないときの予備
+        self.assertEqual(parse_purpose("お墓のことで相談があります"), ("墓地のご相談", False))
+        self.assertFalse(parse_purpose("三回忌の法要について").confident)
+
+    def test_purpose_pet_is_not_pet_bottle(self):
+        self.assertEqual(parse_purpose("ペットの供養をお願いしたい").value, "ペット供養")
+        self.assertEqual(parse_purpose("ペットボトルを捨てたい"), (None, False))
+
+
+class TestExtractNamePurpose(unittest.IsolatedAsyncioTestCase):
+
+    async def extract(self, text, name=None, purpose=None):
+        utterance = VisitorUtterance(name=name, purpose=purpose, phone=None, intent="unknown")
+        with mock.patch.object(llm_manager, "extract_visitor_utterance", return_value=utterance) as llm:
+            return await llm_manager.extract_name_purpose(text), llm.await_count
+
+    async def test_general_rule_does_not_override_llm(self):
+        result, calls = await self.extract("お墓参りに来ました", purpose="お墓参り")
+        self.assertEqual((result, calls), ((None, "お墓参り"), 1))
+
+    async def test_general_rule_fills_missing_purpose(self):
+        result, _ = await self.extract("田中と申しますが、お墓のことで", name="田中")
+        self.assertEqual(result, ("田中", "墓地のご相談"))
+
+    async def test_special_case_overrides_llm(self):
+        result, _ = await self.extract("山田です。樹木葬の件で", name="山田", purpose="樹木葬の相談")
+        self.assertEqual(result, ("山田", "樹木葬墓地のご相談"))
+        result, calls = await self.extract("睡蓮墓地について")
+        self.assertEqual((result, calls), ((None, "睡蓮墓地のご相談"), 0))
+
+    async def test_non_name_goes_to_llm(self):
+        result, calls = await self.extract("了解です")
+        self.assertEqual((result, calls), ((None, None), 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
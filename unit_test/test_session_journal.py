@@ -0,0 +1,73 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from src.agent import session_manager
+from src.agent.context_variables import ContextMemory
+from src.helpers.session_journal import NullSessionJournal, SessionJournal
+
+
+class TestSessionJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "sessions.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _context(self, session_id: str) -> ContextMemory:
+        ctx = ContextMemory(session_id=session_id, name="山田")
+        ctx.turns.record("こんにちは", "いらっしゃいませ")
+        return ctx
+
+    def test_unfinished_sessions_survive_restart(self):
+        journal = SessionJournal(self.path, flush_interval=0.05, worker="0")
+        ctx = self._context("session_1")
+        journal.checkpoint(ctx)
+        ctx.turns.record("天気は？", "")
+        journal.checkpoint(ctx, {"availability": {"waiting": ["U1"], "responses": {}}})
+        journal.checkpoint(self._context("session_2"))
+        journal.finish("session_2")
+        time.sleep(0.2)
+        self.assertEqual(journal.stats()["flushes"], 1)
+        journal.close()
+
+        restarted = SessionJournal(self.path, worker="0")
+        entries = restarted.unfinished()
+        self.assertEqual([e["session_id"] for e in entries], ["session_1"])
+        self.assertEqual(entries[0]["extra"]["availability"]["waiting"], ["U1"])
+        recovered = ContextMemory()
+        recovered.restore(entries[0]["snapshot"])
+        self.assertEqual(recovered.turns.pairs()[-1], ("天気は？", ""))
+        self.assertEqual(SessionJournal(self.path, worker="1").unfinished(), [])
+
+        restarted.finish("session_1")
+        restarted.close()
+        self.assertEqual(SessionJournal(self.path, worker="0").unfinished(), [])
+
+
+class TestChatHistoryCheckpoint(unittest.TestCase):
+
+    def test_disabled_journal_skips_availability_lookup(self):
+        manager = session_manager.ChatSessionManager()
+        with mock.patch.object(session_manager, "session_journal", NullSessionJournal()), \
+                mock.patch.object(session_manager, "pending_requests") as pending:
+            manager.update_chat_history("こんにちは", "いらっしゃいませ")
+        pending.assert_not_called()
+        self.assertEqual(manager.chat_history, [("こんにちは", "いらっしゃいませ")])
+
+    def test_enabled_journal_gets_availability(self):
+        manager = session_manager.ChatSessionManager()
+        journal = mock.Mock(enabled=True)
+        availability = {"waiting": ["U1"], "responses": {}}
+        with mock.patch.object(session_manager, "session_journal", journal), \
+                mock.patch.object(session_manager, "pending_requests", return_value=availability):
+            manager.update_chat_history("こんにちは", "いらっしゃいませ")
+        journal.checkpoint.assert_called_once_with(manager.context, {"availability": availability})
+
+
+if __name__ == "__main__":
+    unittest.main()
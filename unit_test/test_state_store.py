@@ -0,0 +1,202 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import uvicorn
+import websockets
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+
+from src.api.sticky_router import WorkerPool, create_router
+from src.helpers import availability_storage, system_flags
+from src.helpers.conf_loader import ConfigLoader
+from src.helpers.state_store import MemoryStateStore, SQLiteStateStore
+
+
+class StoreContract:
+    """Behaviour shared by every StateStore implementation."""
+
+    def test_get_set_pop(self):
+        self.store.set("ns", "a", {"x": 1})
+        self.assertEqual(self.store.get("ns", "a"), {"x": 1})
+        self.assertEqual(self.store.pop("ns", "a"), {"x": 1})
+        self.assertIsNone(self.store.get("ns", "a"))
+        self.assertEqual(self.store.pop("ns", "a", "gone"), "gone")
+
+    def test_ttl(self):
+        self.store.set("ns", "short", True, ttl=0.02)
+        self.store.set("ns", "long", True)
+        time.sleep(0.05)
+        self.assertIsNone(self.store.get("ns", "short"))
+        self.assertEqual(self.store.items("ns"), {"long": True})
+
+    def test_incr_and_clear(self):
+        self.assertEqual(self.store.incr("counter", "20250101"), 1)
+        self.assertEqual(self.store.incr("counter", "20250101"), 2)
+        self.assertEqual(self.store.get("counter", "20250101"), 2)
+        self.store.clear("counter")
+        self.assertEqual(self.store.items("counter"), {})
+
+
+class TestMemoryStateStore(StoreContract, unittest.TestCase):
+
+    def setUp(self):
+        self.store = MemoryStateStore()
+
+
+class TestSQLiteStateStore(StoreContract, unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "state.db")
+        self.store = SQLiteStateStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_shared_between_connections(self):
+        # 別ワーカー（別接続）から書いた値が見える
+        other = SQLiteStateStore(self.path)
+        other.set("settings", "mode", "在宅モード")
+        other.incr("session_counter", "d")
+        self.assertEqual(self.store.get("settings", "mode"), "在宅モード")
+        self.assertEqual(self.store.incr("session_counter", "d"), 2)
+        other.close()
+
+
+def _worker_app(worker_id: int) -> FastAPI:
+    app = FastAPI()
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket):
+        await websocket.accept()
+        try:
+            while True:
+                text = await websocket.receive_text()
+                await websocket.send_text(f"{worker_id}:{text}")
+        except WebSocketDisconnect:
+            pass
+
+    @app.get("/whoami")
+    def whoami():
+        return {"worker": worker_id}
+
+    return app
+
+
+async def _serve(app, port):
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task
+
+
+class TestPerKioskState(unittest.TestCase):
+    """State that belongs to one kiosk must not leak to the other workers through the shared store."""
+
+    def setUp(self):
+        self.store = MemoryStateStore()
+
+    def test_availability_is_scoped_per_worker(self):
+        with mock.patch.object(availability_storage, "state_store", self.store):
+            for worker in ("0", "1"):
+                with mock.patch.object(availability_storage, "WORKER_ID", worker):
+                    availability_storage.mark_message_sent("U1")
+            # webhook はどのワーカーで受けてもよい
+            availability_storage.set_response("U1", "今すぐ対応する")
+            with mock.patch.object(availability_storage, "WORKER_ID", "0"):
+                self.assertEqual(availability_storage.get_responses(), {"U1": "今すぐ対応する"})
+                availability_storage.clear_all_responses()
+                self.assertEqual(availability_storage.pending_requests(), {})
+            with mock.patch.object(availability_storage, "WORKER_ID", "1"):
+                self.assertEqual(availability_storage.pending_requests(),
+                                 {"waiting": ["U1"], "responses": {"U1": "今すぐ対応する"}})
+                self.assertEqual(availability_storage.pop_response("U1"), "今すぐ対応する")
+
+    def test_phone_call_flag_is_per_worker(self):
+        with mock.patch.object(system_flags, "state_store", self.store):
+            with mock.patch.object(system_flags, "PHONE_CALL_ACTIVE", "phone_call_active/0"):
+                system_flags.set_phone_call_active(True)
+                self.assertTrue(system_flags.get_phone_call_active())
+            with mock.patch.object(system_flags, "PHONE_CALL_ACTIVE", "phone_call_active/1"):
+                self.assertFalse(system_flags.get_phone_call_active())
+
+    def test_only_mode_is_shared(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "server_conf.yaml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("mode: 在宅モード\nlanguage: ja-JP\n")
+            first, second = ConfigLoader(path), ConfigLoader(path)
+            first.use_state_store(self.store)
+            second.use_state_store(self.store)
+            first.update_language("en-US")
+            first.update_mode("不在モード")
+            self.assertEqual(second.get_language(), "ja-JP")
+            self.assertEqual(second.get_mode(), "不在モード")
+
+
+class TestWorkerPool(unittest.TestCase):
+
+    def test_route_is_released_after_the_grace_period(self):
+        pool = WorkerPool([1, 2], MemoryStateStore(), release_after=0.05)
+        for kiosk in ("10.0.0.1", "10.0.0.2"):
+            pool.connected(kiosk, pool.pick(kiosk))
+        pool.disconnected("10.0.0.1", 0)
+        # 猶予中は同じキオスクが同じワーカーに戻れる
+        self.assertEqual(pool.pick("10.0.0.1"), 0)
+        time.sleep(0.1)
+        # 猶予が過ぎたら別のキオスク（アドレスが変わった同じ端末など）が空いたワーカーを使える
+        self.assertEqual(pool.pick("10.0.0.3"), 0)
+
+    def test_route_is_kept_while_any_connection_is_open(self):
+        pool = WorkerPool([1, 2], MemoryStateStore(), release_after=0.01)
+        index = pool.pick("lobby")
+        pool.connected("lobby", index)
+        pool.connected("lobby", index)
+        pool.disconnected("lobby", index)
+        time.sleep(0.03)
+        self.assertEqual(pool.store.get("ws_routes", "lobby"), index)
+
+
+class TestStickyRouter(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.servers = []
+        ports = [18731, 18732]
+        for i, port in enumerate(ports):
+            self.servers.append(await _serve(_worker_app(i), port))
+        self.store = MemoryStateStore()
+        self.servers.append(await _serve(create_router(ports, self.store), 18730))
+
+    async def asyncTearDown(self):
+        for server, task in self.servers:
+            server.should_exit = True
+            await task
+
+    async def _ask(self, kiosk: str) -> str:
+        async with websockets.connect(f"ws://127.0.0.1:18730/ws?kiosk={kiosk}") as ws:
+            await ws.send("hi")
+            return await ws.recv()
+
+    async def test_kiosks_stick_to_their_worker(self):
+        first = await self._ask("lobby")
+        second = await self._ask("gate")
+        self.assertNotEqual(first[0], second[0])
+        # 再接続しても同じワーカーへ
+        self.assertEqual(await self._ask("lobby"), first)
+        self.assertEqual(await self._ask("gate"), second)
+
+    async def test_http_is_forwarded(self):
+        import httpx
+
+        async with httpx.AsyncClient() as client:
+            workers = {(await client.get("http://127.0.0.1:18730/whoami")).json()["worker"] for _ in range(4)}
+        self.assertEqual(workers, {0, 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
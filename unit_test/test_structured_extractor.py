@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from src.agent.conversation_state import ConversationState
+from src.llm import llm_manager, structured_extractor
+from src.llm.structured_extractor import ASKING, VisitorUtterance, extract_visitor_utterance, visitor_utterance_prompt
+
+GATHER = ConversationState.GATHER_USER_INFO
+CONFIRM = ConversationState.CONFIRM_USER_INFO
+
+
+class FakeChain:
+    """Counts calls and answers per asked state, like the LLM would with the state in the prompt."""
+
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    async def ainvoke(self, inputs):
+        self.calls.append(inputs)
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("rate limited")
+        if inputs["asking"] == ASKING[CONFIRM]:
+            return VisitorUtterance(name=None, purpose=None, phone=None, intent="correction")
+        return VisitorUtterance(name="山田", purpose="法事の相談", phone="09012345678", intent="unknown")
+
+
+class TestStructuredExtractor(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.chain = FakeChain()
+        patch = mock.patch.object(structured_extractor, "get_visitor_utterance_chain", return_value=self.chain)
+        patch.start()
+        self.addCleanup(patch.stop)
+        structured_extractor._results.clear()
+        self.addCleanup(structured_extractor._results.clear)
+
+    async def test_concurrent_reads_share_one_call(self):
+        results = await asyncio.gather(*(extract_visitor_utterance("いいえ", CONFIRM) for _ in range(3)))
+        self.assertEqual({r.intent for r in results}, {"correction"})
+        self.assertEqual(len(self.chain.calls), 1)
+
+    async def test_every_field_of_a_turn_shares_one_call(self):
+        text = "山田です。法事の相談で、電話は090-1234-5678です"
+        name, purpose = await llm_manager.extract_name_purpose(text)
+        name_only = await llm_manager.extract_name(text)
+        phone = await llm_manager.extract_phone(text)
+        self.assertEqual((name, purpose, name_only, phone), ("山田", "法事の相談", "山田", "09012345678"))
+        self.assertEqual(len(self.chain.calls), 1)
+
+    async def test_cache_is_keyed_on_the_asked_state(self):
+        self.assertEqual((await extract_visitor_utterance("いいえ", GATHER)).intent, "unknown")
+        self.assertEqual((await extract_visitor_utterance("いいえ", CONFIRM)).intent, "correction")
+        self.assertEqual([c["asking"] for c in self.chain.calls], [ASKING[GATHER], ASKING[CONFIRM]])
+
+    async def test_failure_is_not_cached(self):
+        self.chain.fail = True
+        self.assertEqual((await extract_visitor_utterance("山田です", GATHER)).intent, "unknown")
+        await extract_visitor_utterance("山田です", GATHER)
+        self.assertEqual(len(self.chain.calls), 2)
+
+    async def test_unknown_state_is_rejected(self):
+        with self.assertRaises(ValueError):
+            await extract_visitor_utterance("はい", "address")
+
+    def test_every_conversation_state_has_a_question(self):
+        states = {v for k, v in vars(ConversationState).items() if not k.startswith("_")}
+        self.assertEqual(set(ASKING), states)
+
+    def test_prompt_keeps_the_extraction_rules(self):
+        text = visitor_utterance_prompt.format(response="誰かいますか", asking=ASKING[GATHER])
+        for rule in ("住職への面会", "樹木葬墓地のご相談", "睡蓮墓地のご相談", "ペット供養", "お焚き上げ", "訂正します"):
+            self.assertIn(rule, text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import asyncio
+import unittest
+
+from src.helpers.timer_wheel import TimerWheel
+
+
+class TestTimerWheel(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.wheel = TimerWheel(tick=0.01, slots=8)
+        self.fired = []
+
+    async def asyncTearDown(self):
+        self.wheel.close()
+
+    async def test_fires_in_order(self):
+        self.wheel.schedule(0.05, lambda: self.fired.append("late"))
+        self.wheel.schedule(0.02, lambda: self.fired.append("early"))
+        # 0.15 秒は 1 周 (8 tick) を超えるので rounds で数える
+        self.wheel.schedule(0.15, lambda: self.fired.append("next round"))
+        await asyncio.sleep(0.3)
+        self.assertEqual(self.fired, ["early", "late", "next round"])
+        self.assertEqual(len(self.wheel), 0)
+
+    async def test_cancel_and_reset(self):
+        cancelled = self.wheel.schedule(0.03, lambda: self.fired.append("cancelled"))
+        idle = self.wheel.schedule(0.05, lambda: self.fired.append("idle"))
+        cancelled.cancel()
+        for _ in range(5):
+            await asyncio.sleep(0.03)
+            idle.reset()
+        self.assertEqual(self.fired, [])
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.fired, ["idle"])
+
+
+if __name__ == "__main__":
+    unittest.main()
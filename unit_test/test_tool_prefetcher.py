@@ -0,0 +1,71 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from src.agent.tool_prefetcher import ToolPrefetcher, take_prefetched
+from src.api.websocket_manager import WebSocketManager
+from src.message_templates.websocket_message_template import LocationData, WebsocketMessageTemplate
+from src.tools.weather_tool import ShowWeatherTool
+
+
+class _FakeTool:
+    name = "faq_tool"
+
+    def __init__(self):
+        self.calls = []
+
+    async def prefetch(self, user_input):
+        self.calls.append(user_input)
+        return [("passage", 0.9)]
+
+
+class TestToolPrefetcher(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tool = _FakeTool()
+        self.prefetcher = ToolPrefetcher({"faq_tool": ["トイレ"]})
+
+    async def test_same_question_reuses_prefetch(self):
+        async with self.prefetcher.speculate([self.tool], "トイレはどこですか？"):
+            self.assertEqual(await take_prefetched("faq_tool", "トイレはどこですか"), [("passage", 0.9)])
+            self.assertIsNone(await take_prefetched("faq_tool", "トイレはどこですか"))
+
+    async def test_rephrased_question_is_not_served_prefetch(self):
+        async with self.prefetcher.speculate([self.tool], "トイレはどこですか？"):
+            self.assertIsNone(await take_prefetched("faq_tool", "駐車場の場所"))
+
+    async def test_unrouted_input_starts_nothing(self):
+        async with self.prefetcher.speculate([self.tool], "天気は？"):
+            self.assertIsNone(await take_prefetched("faq_tool", "天気は？"))
+        self.assertEqual(self.tool.calls, [])
+
+
+class TestWeatherPrefetch(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.ws_manager = WebSocketManager()
+        self.ws_manager.set_location_data(LocationData(city="千代田区", lat=35.69, lon=139.75, prefecture="東京都"))
+        self.ws_manager.send_to_client = mock.AsyncMock()
+        self.tool = ShowWeatherTool(ws_manager=self.ws_manager, message_manager=WebsocketMessageTemplate())
+        self.prefetcher = ToolPrefetcher({"weather_info": ["天気"]})
+        self.forecast = {"current": {"weather_code": 0, "temperature_2m": 20}, "daily": {}}
+
+    async def test_weather_reuses_prefetch_for_any_wording(self):
+        with mock.patch.object(ShowWeatherTool, "get_weather_forecast", return_value=self.forecast) as fetch:
+            async with self.prefetcher.speculate([self.tool], "今日の天気は？"):
+                message = await self.tool.show_weather_info()
+        fetch.assert_called_once_with(35.69, 139.75)
+        self.assertIn("20", message)
+        self.ws_manager.send_to_client.assert_awaited_once()
+
+    async def test_location_change_refetches(self):
+        with mock.patch.object(ShowWeatherTool, "get_weather_forecast", return_value=self.forecast) as fetch:
+            async with self.prefetcher.speculate([self.tool], "天気を教えて"):
+                await asyncio.sleep(0)    # 先行実行が旧い位置で取得を始める
+                self.ws_manager.set_location_data(LocationData(city="札幌市", lat=43.06, lon=141.35, prefecture="北海道"))
+                await self.tool.show_weather_info()
+        self.assertEqual(fetch.call_args_list, [mock.call(35.69, 139.75), mock.call(43.06, 141.35)])
+
+
+if __name__ == "__main__":
+    unittest.main()
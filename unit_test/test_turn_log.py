@@ -0,0 +1,68 @@
+import json
+import unittest
+from datetime import datetime
+
+from src.agent.context_variables import ContextMemory
+from src.agent.turn_log import AVATAR, USER, TurnLog
+
+
+class TestTurnLog(unittest.TestCase):
+
+    def test_pairs_follow_process_chat_order(self):
+        turns = TurnLog()
+        turns.record("こんにちは", "")
+        self.assertEqual(turns.pairs(), [("こんにちは", "")])
+        turns.record("", "いらっしゃいませ", tool="information", latency_ms=820.0)
+        turns.record("", "ご用件をどうぞ")
+        self.assertEqual(turns.pairs(), [("こんにちは", "いらっしゃいませ"), ("", "ご用件をどうぞ")])
+
+        turn = turns[1]
+        self.assertEqual((turn.role, turn.tool, turn.latency_ms), (AVATAR, "information", 820.0))
+        self.assertIsNone(turns[2].latency_ms)
+
+    def test_reset_history_keeps_log_lines(self):
+        turns = TurnLog()
+        turns.record("山田です", "")
+        turns.record("山田です", "")
+        turns.reset_history()
+        turns.record("天気は？", "晴れです")
+        self.assertEqual(turns.pairs(), [("天気は？", "晴れです")])
+        self.assertEqual(turns.lines(), ["来訪者: 山田です", "来訪者: 天気は？", "アバター: 晴れです"])
+        self.assertEqual(turns.stats()["turns"], 4)
+
+    def test_discard_last_removes_cancelled_input(self):
+        turns = TurnLog()
+        turns.record("天気は？", "")
+        self.assertFalse(turns.discard_last(USER, "別の発話"))
+        self.assertTrue(turns.discard_last(USER, "天気は？"))
+        self.assertEqual((len(turns), turns.pairs()), (0, []))
+
+    def test_tool_name_is_tracked_per_turn(self):
+        ctx = ContextMemory()
+        ctx.last_tool_name = "weather_info"
+        self.assertEqual(ctx.turn_tool, "weather_info")
+        ctx.turn_tool = None
+        self.assertEqual(ctx.last_tool_name, "weather_info")
+
+    def test_context_snapshot_restore_and_clear(self):
+        ctx = ContextMemory(session_id="session_1", name="山田", phone="09012345678")
+        ctx.session_start_time = datetime(2025, 4, 1, 9, 30)
+        ctx.turns.record("こんにちは", "いらっしゃいませ", latency_ms=500.0)
+        snapshot = json.loads(json.dumps(ctx.snapshot(), ensure_ascii=False))
+
+        restored = ContextMemory()
+        restored.restore(snapshot)
+        self.assertEqual(restored.session_start_time, ctx.session_start_time)
+        self.assertEqual(restored.turns.pairs(), [("こんにちは", "いらっしゃいませ")])
+        self.assertEqual(restored.profile.contact, "09012345678")
+
+        restored.clear()
+        self.assertIsNone(restored.session_id)
+        self.assertEqual(len(restored.turns), 0)
+        self.assertEqual(len(ctx.turns), 2)
+        with self.assertRaises(AttributeError):
+            restored.contact = "09012345678"
+
+
+if __name__ == "__main__":
+    unittest.main()
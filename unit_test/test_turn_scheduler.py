@@ -0,0 +1,138 @@
+import asyncio
+import unittest
+
+from src.agent.context_variables import ContextMemory
+from src.agent.turn_scheduler import TurnScheduler
+
+try:
+    from src import app as kiosk_app
+except Exception as e:
+    # app の import には FAQ の xlsx（data/）と OpenAI の API キーが要る
+    kiosk_app, APP_IMPORT_ERROR = None, repr(e)
+else:
+    APP_IMPORT_ERROR = ""
+
+
+class TestTurnScheduler(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.started = []
+        self.finished = []
+        self.release = asyncio.Event()
+
+        async def handler(user_input):
+            self.started.append(user_input)
+            await self.release.wait()
+            self.finished.append(user_input)
+
+        self.scheduler = TurnScheduler(handler, max_pending=2)
+
+    async def test_newer_message_cancels_running_turn(self):
+        self.scheduler.submit("s1", "天気は？")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        self.scheduler.submit("s1", "トイレはどこ？")
+        await asyncio.sleep(0.01)
+        self.release.set()
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.started, ["天気は？", "トイレはどこ？"])
+        self.assertEqual(self.finished, ["トイレはどこ？"])
+        self.assertEqual(self.scheduler.stats["cancelled"], 1)
+        await self.scheduler.cancel_session("s1")
+
+    async def test_serial_without_supersede(self):
+        self.scheduler.supersede = False
+        self.release.set()
+        for text in ("a", "b"):
+            self.scheduler.submit("s1", text)
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.finished, ["a", "b"])
+        await self.scheduler.cancel_session("s1")
+
+    async def test_backpressure_drops_oldest(self):
+        self.scheduler.supersede = False
+        results = [self.scheduler.submit("s1", text) for text in ("a", "b", "c")]
+        self.assertEqual(results, [True, True, False])
+        self.release.set()
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.finished, ["b", "c"])
+        await self.scheduler.cancel_session("s1")
+
+    async def test_session_end_cancels(self):
+        self.scheduler.submit("s1", "a")
+        await asyncio.sleep(0.01)
+        await self.scheduler.cancel_session("s1")
+        self.release.set()
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.finished, [])
+        self.assertEqual(self.scheduler.stats["cancelled"], 1)
+
+
+    async def test_side_effect_turn_is_not_cancelled(self):
+        self.scheduler.can_supersede = lambda: False
+        self.scheduler.submit("s1", "住職を呼んで")
+        await asyncio.sleep(0.01)
+        self.scheduler.submit("s1", "まだですか？")
+        await asyncio.sleep(0.01)
+        self.release.set()
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.finished, ["住職を呼んで", "まだですか？"])
+        self.assertEqual(self.scheduler.stats["kept"], 1)
+        await self.scheduler.cancel_session("s1")
+
+    async def test_inputs_queued_behind_kept_turn_all_run(self):
+        self.scheduler.max_pending = 4
+        self.scheduler.can_supersede = lambda: False
+        self.scheduler.submit("s1", "住職を呼んで")
+        await asyncio.sleep(0.01)
+        self.scheduler.submit("s1", "まだですか？")
+        self.scheduler.submit("s1", "トイレはどこ？")
+        await asyncio.sleep(0.01)
+        self.release.set()
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.finished, ["住職を呼んで", "まだですか？", "トイレはどこ？"])
+        self.assertEqual(self.scheduler.stats["superseded"], 0)
+        await self.scheduler.cancel_session("s1")
+
+    async def test_session_context_gates_supersede(self):
+        # 新しいセッションの既定値（workflow_active=True）のままでも取り消せること
+        context = ContextMemory()
+        self.scheduler.can_supersede = context.can_supersede
+        self.scheduler.submit("s1", "天気は？")
+        await asyncio.sleep(0.01)
+        self.scheduler.submit("s1", "トイレはどこ？")
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.scheduler.stats["cancelled"], 1)
+        context.side_effect_tool = "contact_person"
+        self.scheduler.submit("s1", "住職を呼んで")
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.scheduler.stats["kept"], 1)
+        self.release.set()
+        await self.scheduler.cancel_session("s1")
+
+    async def test_cancelled_input_is_reported(self):
+        cancelled = []
+        self.scheduler.on_cancelled = cancelled.append
+        self.scheduler.submit("s1", "天気は？")
+        await asyncio.sleep(0.01)
+        self.scheduler.submit("s1", "トイレはどこ？")
+        await asyncio.sleep(0.01)
+        self.assertEqual(cancelled, ["天気は？"])
+        self.release.set()
+        await self.scheduler.cancel_session("s1")
+
+@unittest.skipIf(kiosk_app is None, f"src.app cannot be imported here: {APP_IMPORT_ERROR}")
+class TestAppSupersede(unittest.TestCase):
+
+    def test_app_gate_follows_session_context(self):
+        context = kiosk_app.session_manager.get_context_memory()
+        context.clear()
+        self.assertTrue(context.workflow_active)
+        self.assertTrue(kiosk_app._can_supersede())
+        context.side_effect_tool = "contact_person"
+        self.assertFalse(kiosk_app._can_supersede())
+        context.side_effect_tool = None
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+import unittest
+from unittest import mock
+
+import orjson
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from src.api.websocket_manager import WebSocketManager
+
+from src.helpers.enums import ACTION_TYPE_CODES, MESSAGE_TYPE_CODES, ActionType, MessageType
+from src.message_templates import ws_codec
+from src.message_templates.websocket_message_template import (
+    ActionMessage,
+    ChatActionMessage,
+    LocationData,
+    ProtocolError,
+    StaticFrame,
+    WebsocketMessageTemplate,
+)
+
+
+class TestWebsocketMessage(unittest.TestCase):
+
+    def setUp(self):
+        self.template = WebsocketMessageTemplate()
+
+    def test_encode_frames(self):
+        frame = self.template.chat_action_message(
+            "こんにちは", ActionType.SHOW_NAME.value, self.template.contact_param(name="田中")
+        )
+        self.assertEqual(
+            orjson.loads(frame.to_json()),
+            {
+                "type": "chat_action",
+                "message": "こんにちは",
+                "action": {
+                    "action_type": "show_name",
+                    "params": {"name": "田中", "contact": "", "purpose": ""},
+                },
+            },
+        )
+        url_frame = self.template.url_action_message("https://example.com", ActionType.SHOW_MAP.value)
+        self.assertEqual(orjson.loads(url_frame.to_json())["message"], "https://example.com")
+
+    def test_decode_frames(self):
+        chat = self.template.decode('{"type": "chat", "message": "天気は？"}')
+        self.assertEqual((chat.type, chat.message), (MessageType.CHAT.value, "天気は？"))
+
+        action = self.template.decode(
+            b'{"type": "action", "action_type": "set_location", "params": {"city": "Tokyo", "lat": 35.6}}'
+        )
+        self.assertIsInstance(action, ActionMessage)
+        self.assertEqual(action.params, LocationData(city="Tokyo", lat=35.6))
+        action = self.template.decode('{"type": "action", "action_type": "set_location", "params": {"lat": 35, "lon": null}}')
+        self.assertEqual(action.params, LocationData(lat=35))
+
+        chat_action = self.template.decode(
+            '{"type": "chat_action", "message": "button_1", "action": {"action_type": "start_session"}}'
+        )
+        self.assertIsInstance(chat_action, ChatActionMessage)
+        self.assertEqual(chat_action.action.action_type, ActionType.START_SESSION.value)
+
+    def test_reject_malformed_frames(self):
+        for raw in (
+            "not json",
+            "[1, 2]",
+            '{"type": "unknown"}',
+            '{"type": "chat", "message": 3}',
+            '{"type": "action", "action_type": "rm_rf"}',
+            '{"type": "action", "action_type": "touch_action", "params": []}',
+            '{"type": "chat_action", "message": "x"}',
+            '{"type": "action", "action_type": "set_location", "params": {"lat": "35.6"}}',
+            '{"type": "action", "action_type": "set_location", "params": {"lon": true}}',
+            '{"type": "action", "action_type": "set_language", "params": {"name": ["ja"]}}',
+            '{"type": "action", "action_type": "touch_action", "params": {"name": {"first": "a"}}}',
+            '{"type": "chat_action", "message": "x", "action": {"action_type": "start_session", "params": {"contact": 3}}}',
+            '{"type": "chat", "message": "' + "a" * 70000 + '"}',
+        ):
+            with self.assertRaises(ProtocolError, msg=raw[:40]):
+                self.template.decode(raw)
+
+
+class TestTransportCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.template = WebsocketMessageTemplate()
+
+    def test_codes_cover_enums(self):
+        self.assertEqual(set(MESSAGE_TYPE_CODES), set(MessageType))
+        self.assertEqual(set(ACTION_TYPE_CODES), set(ActionType))
+        self.assertEqual(len(set(ACTION_TYPE_CODES.values())), len(ActionType))
+
+    def test_msgpack_round_trip(self):
+        codec = ws_codec.MsgpackCodec()
+        frame = codec.encode({"type": "chat_action", "message": "button_1", "action": {"action_type": "start_session"}})
+        self.assertIsInstance(frame, bytes)
+        decoded = self.template.decode(frame, codec)
+        self.assertEqual(decoded.action.action_type, ActionType.START_SESSION.value)
+        with self.assertRaises(ProtocolError):
+            self.template.decode('{"type": "chat", "message": "x"}', codec)
+
+    def test_negotiate(self):
+        self.assertIsInstance(ws_codec.negotiate(["kiosk.msgpack.v1", "kiosk.json.v1"]), ws_codec.MsgpackCodec)
+        self.assertIs(ws_codec.negotiate(["kiosk.json.v1"]), ws_codec.JSON_CODEC)
+        self.assertIsNone(ws_codec.negotiate([]).subprotocol)
+        self.assertIs(ws_codec.negotiate(["kiosk.msgpack.v1", "kiosk.json.v1"], ["kiosk.json.v1"]), ws_codec.JSON_CODEC)
+
+
+
+class TestStaticFrames(unittest.TestCase):
+
+    def setUp(self):
+        self.template = WebsocketMessageTemplate()
+
+    def test_parameterless_actions_are_pre_encoded(self):
+        frame = self.template.action_message(ActionType.END_SESSION.value)
+        self.assertIsInstance(frame, StaticFrame)
+        self.assertIs(frame, self.template.action_message(ActionType.END_SESSION.value))
+        self.assertEqual(frame.encode(ws_codec.JSON_CODEC), ActionMessage(ActionType.END_SESSION.value).to_json())
+        self.assertNotIsInstance(
+            self.template.action_message(ActionType.SHOW_NAME.value, self.template.contact_param(name="田中")),
+            StaticFrame,
+        )
+
+    def test_greetings_follow_config_reload(self):
+        greeting = self.template.greeting_text("greet", "ja-JP")
+        self.assertIsInstance(self.template.chat_message(greeting), StaticFrame)
+        self.template.build_frame_cache({"greeting": {"greet_ja-JP": "ようこそ"}})
+        self.assertNotIsInstance(self.template.chat_message(greeting), StaticFrame)
+        self.assertEqual(orjson.loads(self.template.chat_message("ようこそ").to_json())["message"], "ようこそ")
+
+
+
+class TestSendLog(unittest.IsolatedAsyncioTestCase):
+
+    async def test_send_logs_type_and_size_only(self):
+        manager = WebSocketManager()
+        manager.active_client = mock.AsyncMock()
+        template = WebsocketMessageTemplate()
+        message = template.chat_action_message("田中様ですね", ActionType.SHOW_NAME.value, template.contact_param(name="田中"))
+        with mock.patch("src.api.websocket_manager.logger") as logger:
+            logger.isEnabledFor.return_value = True
+            await manager._send(message)
+            logger.isEnabledFor.return_value = False
+            await manager._send(message)
+        frame = manager.active_client.send_text.await_args.args[0]
+        logger.info.assert_not_called()
+        logger.debug.assert_called_once_with(f"Websocket Message sent: chat_action/show_name ({len(frame)} bytes)")
+
+
+class TestResume(unittest.TestCase):
+
+    def test_reconnect_replays_outbox(self):
+        manager = WebSocketManager()
+        manager.button_id = "button_1"
+        template = WebsocketMessageTemplate()
+        app = FastAPI()
+
+        @app.websocket("/ws")
+        async def endpoint(websocket: WebSocket):
+            resumed = await manager.connect(websocket, websocket.query_params.get("resume"))
+            if not resumed:
+                manager.clear_resume()
+                manager.issue_resume_token()
+            await manager.send_to_client(template.chat_message("resumed" if resumed else "hello"))
+            try:
+                while True:
+                    await manager.receive_frame(websocket)
+            except WebSocketDisconnect:
+                manager.detach(websocket)
+                # 切断中に送られたフレームは outbox に溜まる
+                await manager.send_to_client(template.chat_message("while away"))
+
+        client = TestClient(app)
+        with client.websocket_connect("/ws") as ws:
+            self.assertEqual(orjson.loads(ws.receive_text())["message"], "hello")
+        self.assertEqual(len(manager.outbox), 1)
+
+        with client.websocket_connect("/ws?resume=wrong") as ws:
+            self.assertEqual(orjson.loads(ws.receive_text())["message"], "hello")
+        self.assertEqual(len(manager.outbox), 1)
+
+        with client.websocket_connect(f"/ws?resume={manager.resume_token}") as ws:
+            self.assertEqual(orjson.loads(ws.receive_text())["message"], "while away")
+            self.assertEqual(orjson.loads(ws.receive_text())["message"], "resumed")
+        manager.clear_resume()
+
+
+if __name__ == "__main__":
+    unittest.main()